@@ -1,5 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Dict, Any
+import io
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 
 from app.database import get_db
@@ -9,6 +13,11 @@ from app.models.category import Category
 from app.models.order import Order
 from app.core.dependencies import get_admin_user
 from app.schemas.user import UserResponse
+from app.services.product_service import product_cache
+from app.services.category_service import category_cache
+from app.services.import_service import CatalogImportService
+from app.services.sync_service import CatalogSyncService
+from app.services.export_service import CatalogExportService
 
 router = APIRouter(
     prefix="/admin",
@@ -117,4 +126,95 @@ async def system_health(
         "database": "connected",
         "memory_usage": "normal",
         "admin_user": current_user.email
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/cache-stats", response_model=Dict[str, Any])
+async def cache_stats(
+    current_user: User = Depends(get_admin_user)
+):
+    """
+    Get hit, miss and eviction counters of this worker's object caches
+    """
+    return {
+        "product": product_cache.stats(),
+        "category": category_cache.stats(),
+    }
+
+
+@router.post("/import/products", response_model=Dict[str, Any])
+def import_products(
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, alias="format", pattern="^(csv|jsonl)$"),
+    current_user: User = Depends(get_admin_user),
+    import_service: CatalogImportService = Depends()
+):
+    """
+    Import products, variants and images from a CSV or JSONL upload (admin only)
+
+    Variants are upserted by SKU and batches commit as they go; rows that
+    cannot be imported are listed in the report with their line numbers.
+    """
+    if file_format is None:
+        file_format = "jsonl" if (file.filename or "").endswith((".jsonl", ".ndjson")) else "csv"
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return import_service.import_file(stream, file_format=file_format)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The file must be UTF-8 encoded"
+        )
+
+
+@router.post("/sync/products", response_model=Dict[str, Any])
+def sync_products(
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, alias="format", pattern="^(csv|jsonl)$"),
+    deactivate_missing: bool = True,
+    current_user: User = Depends(get_admin_user),
+    sync_service: CatalogSyncService = Depends()
+):
+    """
+    Sync the catalog to a full CSV or JSONL feed, writing only what changed (admin only)
+
+    Same file layout as /admin/import/products, with a slug on every
+    product. Unchanged products and variants are skipped by content hash,
+    and synced ones missing from the feed are deactivated unless
+    `deactivate_missing=false` or the feed has errors.
+    """
+    if file_format is None:
+        file_format = "jsonl" if (file.filename or "").endswith((".jsonl", ".ndjson")) else "csv"
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return sync_service.sync_file(stream, file_format=file_format, deactivate_missing=deactivate_missing)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The file must be UTF-8 encoded"
+        )
+
+
+@router.get("/export/catalog")
+def export_catalog(
+    file_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    compress: bool = Query(True, alias="gzip"),
+    current_user: User = Depends(get_admin_user),
+    export_service: CatalogExportService = Depends()
+):
+    """
+    Download every product with its variants and images (admin only)
+
+    Streamed from a server-side cursor and gzip-compressed on the fly by
+    default; the file can be imported again with /admin/import/products.
+    """
+    filename = f"catalog-{date.today().isoformat()}.{file_format}"
+    media_type = "text/csv" if file_format == "csv" else "application/x-ndjson"
+    if compress:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        export_service.export(file_format, compress=compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
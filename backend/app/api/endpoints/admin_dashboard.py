@@ -8,7 +8,7 @@ import json
 from app.database import get_db
 from app.models.user import User
 from app.models.product import Product, ProductVariant
-from app.models.category import Category
+from app.models.category import Category, CategoryProductCount
 from app.models.order import Order
 from app.core.dependencies import get_admin_user
 
@@ -48,14 +48,16 @@ async def admin_dashboard_summary(
             "count": count
         })
     
-    # Product categories data
-    categories = db.query(Category).all()
+    # Product categories data, from the trigger-maintained counts
+    category_rows = db.query(
+        Category.name, CategoryProductCount.product_count, CategoryProductCount.subtree_product_count
+    ).join(CategoryProductCount, CategoryProductCount.category_id == Category.id).order_by(Category.id).all()
     category_data = []
-    for category in categories:
-        product_count = db.query(Product).filter(Product.category_id == category.id).count()
+    for name, product_count, subtree_product_count in category_rows:
         category_data.append({
-            "name": category.name,
-            "count": product_count
+            "name": name,
+            "count": product_count,
+            "count_with_subcategories": subtree_product_count
         })
     
     # Product distribution data
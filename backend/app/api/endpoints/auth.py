@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.services.auth_service import AuthService
+from app.services.guest_cart_service import GuestCartService
 from app.schemas.auth import UserCreate, Token
 from app.models.user import User
 
@@ -30,11 +31,15 @@ def register_user(
 
 @router.post("/login", response_model=Token)
 def login_for_access_token(
+    response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(),
     auth_service: AuthService = Depends(),
+    guest_cart_service: GuestCartService = Depends(),
 ):
     """
     OAuth2 compatible token login, get an access token for future requests
+
+    A guest cart held by the browser is merged into the user's cart.
     """
     user = auth_service.authenticate_user(form_data.username, form_data.password)
     if not user:
@@ -44,4 +49,5 @@ def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    guest_cart_service.persist(user.id, response)
     return auth_service.create_user_token(user.id)
\ No newline at end of file
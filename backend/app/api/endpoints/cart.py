@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
+from typing import Dict, Any, Optional
 
 from app.services.cart_service import CartService
-from app.schemas.cart import CartItemCreate, CartItemUpdate, CartResponse
+from app.schemas.cart import CartItemCreate, CartItemUpdate, CartResponse, CartBatch, CartMerge, GuestCartResponse
+from app.services.guest_cart_service import GuestCartService
 from app.models.user import User
 from app.core.dependencies import get_current_user
 
@@ -15,13 +16,14 @@ router = APIRouter(
 
 @router.get("/", response_model=CartResponse)
 async def get_cart(
+    coupon: Optional[str] = Query(None, max_length=50),
     current_user: User = Depends(get_current_user),
     cart_service: CartService = Depends()
 ):
     """
-    Get the current user's shopping cart
+    Get the current user's shopping cart, priced with the coupon code if given
     """
-    return cart_service.get_cart_with_details(current_user.id)
+    return cart_service.get_cart_with_details(current_user.id, coupon)
 
 
 @router.post("/items", status_code=status.HTTP_201_CREATED)
@@ -37,6 +39,106 @@ async def add_to_cart(
     return {"message": "Item added to cart", "item_id": cart_item.id}
 
 
+@router.post("/batch", response_model=CartResponse)
+async def apply_cart_batch(
+    batch: CartBatch,
+    current_user: User = Depends(get_current_user),
+    cart_service: CartService = Depends()
+):
+    """
+    Apply several add, update and remove operations at once, in order
+
+    All operations succeed or none is applied. Returns the updated cart.
+    """
+    cart_service.apply_operations(current_user.id, batch.operations)
+    return cart_service.get_cart_with_details(current_user.id)
+
+
+@router.post("/merge", response_model=CartResponse)
+async def merge_guest_cart(
+    guest_cart: CartMerge,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    cart_service: CartService = Depends(),
+    guest_cart_service: GuestCartService = Depends()
+):
+    """
+    Merge a guest cart into the current user's cart, e.g. when checkout starts
+
+    Merges the given items and the guest cart of the cookie, if any.
+    Quantities of variants already in the cart are added up; variants no
+    longer available are skipped. Returns the merged cart.
+    """
+    cart_service.merge_items(current_user.id, guest_cart.items)
+    guest_cart_service.persist(current_user.id, response)
+    return cart_service.get_cart_with_details(current_user.id)
+
+
+@router.get("/guest", response_model=GuestCartResponse)
+async def get_guest_cart(
+    coupon: Optional[str] = Query(None, max_length=50),
+    guest_cart_service: GuestCartService = Depends()
+):
+    """
+    Get the guest cart of the cookie, with current prices and stock
+
+    Priced with the coupon code, if one is given.
+    """
+    return guest_cart_service.get_cart(coupon)
+
+
+@router.post("/guest/items", status_code=status.HTTP_201_CREATED)
+async def add_to_guest_cart(
+    item_data: CartItemCreate,
+    response: Response,
+    guest_cart_service: GuestCartService = Depends()
+):
+    """
+    Add an item to the guest cart, starting one if needed
+    """
+    quantity = guest_cart_service.add_item(item_data, response)
+    return {"message": "Item added to cart", "variant_id": item_data.variant_id, "quantity": quantity}
+
+
+@router.put("/guest/items/{variant_id}")
+async def update_guest_cart_item(
+    variant_id: int,
+    item_data: CartItemUpdate,
+    response: Response,
+    guest_cart_service: GuestCartService = Depends()
+):
+    """
+    Update the quantity of a variant in the guest cart
+    """
+    guest_cart_service.update_item(variant_id, item_data.quantity, response)
+    return {"message": "Cart item updated"}
+
+
+@router.delete("/guest/items/{variant_id}")
+async def remove_from_guest_cart(
+    variant_id: int,
+    response: Response,
+    guest_cart_service: GuestCartService = Depends()
+):
+    """
+    Remove a variant from the guest cart
+    """
+    guest_cart_service.remove_item(variant_id, response)
+    return {"message": "Item removed from cart"}
+
+
+@router.delete("/guest")
+async def clear_guest_cart(
+    response: Response,
+    guest_cart_service: GuestCartService = Depends()
+):
+    """
+    Clear the guest cart
+    """
+    guest_cart_service.clear(response)
+    return {"message": "Cart cleared"}
+
+
 @router.put("/items/{item_id}")
 async def update_cart_item(
     item_id: int,
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.services.category_service import CategoryService
-from app.schemas.category import Category, CategoryCreate, CategoryUpdate, CategoryWithSubcategories
+from app.schemas.category import Category, CategoryCreate, CategoryUpdate, CategoryWithSubcategories, CategoryProductCounts
 from app.models.user import User
 from app.core.dependencies import get_admin_user
+from app.core.catalog_version import CATALOG, CATEGORIES
+from app.core.http_cache import CatalogCache
 
 router = APIRouter(
     prefix="/categories",
@@ -15,7 +17,7 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=List[Category])
+@router.get("/", response_model=List[Category], dependencies=[Depends(CatalogCache(CATEGORIES))])
 async def read_categories(
     skip: int = 0, 
     limit: int = 100,
@@ -30,16 +32,29 @@ async def read_categories(
 
 @router.get("/tree", response_model=List[CategoryWithSubcategories])
 async def read_categories_tree(
+    cache_headers: Dict[str, str] = Depends(CatalogCache(CATEGORIES)),
     category_service: CategoryService = Depends()
 ):
     """
     Get categories as a tree structure with subcategories
+
+    Served from the worker's category snapshot, already encoded as JSON.
     """
-    categories = category_service.get_categories_tree()
-    return categories
+    tree = category_service.get_categories_tree()
+    return Response(content=tree.tree_json, media_type="application/json", headers=cache_headers)
+
+
+@router.get("/product-counts", response_model=List[CategoryProductCounts], dependencies=[Depends(CatalogCache(CATALOG))])
+async def read_category_product_counts(
+    category_service: CategoryService = Depends()
+):
+    """
+    Get product counts per category, direct and including subcategories
+    """
+    return category_service.get_product_counts()
 
 
-@router.get("/{category_id}", response_model=Category)
+@router.get("/{category_id}", response_model=Category, dependencies=[Depends(CatalogCache(CATEGORIES))])
 async def read_category(
     category_id: int,
     category_service: CategoryService = Depends()
@@ -47,10 +62,10 @@ async def read_category(
     """
     Get a specific category by ID
     """
-    return category_service.get_category_by_id(category_id)
+    return category_service.get_category_detail(category_id)
 
 
-@router.get("/slug/{slug}", response_model=Category)
+@router.get("/slug/{slug}", response_model=Category, dependencies=[Depends(CatalogCache(CATEGORIES))])
 async def read_category_by_slug(
     slug: str,
     category_service: CategoryService = Depends()
@@ -58,7 +73,18 @@ async def read_category_by_slug(
     """
     Get a specific category by slug
     """
-    return category_service.get_category_by_slug(slug)
+    return category_service.get_category_detail_by_slug(slug)
+
+
+@router.get("/slug/{slug}/breadcrumbs", response_model=List[Category], dependencies=[Depends(CatalogCache(CATEGORIES))])
+async def read_category_breadcrumbs(
+    slug: str,
+    category_service: CategoryService = Depends()
+):
+    """
+    Get the category with this slug and its ancestors, root first
+    """
+    return category_service.get_breadcrumbs(slug)
 
 
 @router.post("/", response_model=Category, status_code=status.HTTP_201_CREATED)
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Form, UploadFile, File
-from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Form, UploadFile, File, Response, Request
+from typing import List, Optional, Union, Dict, Any
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.services.product_service import ProductService
+from app.services.suggest_service import suggest_index
+from app.services.image_service import ImageService, MAX_IMAGE_BYTES
 from app.schemas.product import (
     Product, ProductCreate, ProductUpdate, ProductResponse,
     ProductVariant, ProductVariantCreate, ProductVariantUpdate,
-    ProductImage, ProductImageCreate, ProductImageUpdate
+    ProductImage, ProductImageCreate, ProductImageUpdate, SearchSuggestion, ProductFacets,
+    ProductCard, ProductBatch, VariantBulkUpdate, VariantBulkUpdateResult
 )
+from app.core.serialization import dumps
+from app.core.catalog_version import CATALOG
+from app.core.http_cache import CatalogCache
 from app.models.user import User
 from app.core.dependencies import get_current_user, get_admin_user
 
@@ -18,52 +24,190 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+# Query parameter prefixes for product_metadata and variant attribute filters
+ATTRIBUTE_PREFIX = "attr."
+VARIANT_ATTRIBUTE_PREFIX = "variant."
 
-@router.get("/", response_model=List[ProductResponse])
-async def read_products(
-    skip: int = 0,
-    limit: int = 100,
+
+def _prefixed_filters(request: Request, prefix: str) -> Dict[str, List[str]]:
+    """Collect `<prefix><name>=<value>[,<value>...]` query parameters by name"""
+    filters: Dict[str, List[str]] = {}
+    for name, value in request.query_params.multi_items():
+        if name.startswith(prefix) and len(name) > len(prefix):
+            values = [item.strip() for item in value.split(",") if item.strip()]
+            if values:
+                filters.setdefault(name[len(prefix):], []).extend(values)
+    return filters
+
+
+def product_filters(
+    request: Request,
     category_id: Optional[int] = None,
+    include_subcategories: bool = True,
     search: Optional[str] = None,
-    sort_by: Optional[str] = None,
-    sort_order: str = "asc",
+    search_prefix: bool = False,
     is_active: Optional[bool] = None,
     is_featured: Optional[bool] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Listing filter query parameters shared by the product list endpoints
+
+    `category_id` includes products of all its subcategories unless
+    `include_subcategories=false`.
+
+    Product attributes are filtered with `attr.<name>=<value>` parameters,
+    e.g. `attr.fabric=silk&attr.state=kerala`. Repeat a parameter or
+    separate values with commas to accept any of several values.
+    Variant attributes work the same way with `variant.<name>`, e.g.
+    `variant.colour=red&in_stock=true`; all variant filters must match the
+    same variant, and the matching variants are returned per product.
+    """
+    return {
+        "category_id": category_id,
+        "include_subcategories": include_subcategories,
+        "search": search,
+        "search_prefix": search_prefix,
+        "is_active": is_active,
+        "is_featured": is_featured,
+        "min_price": min_price,
+        "max_price": max_price,
+        "attributes": _prefixed_filters(request, ATTRIBUTE_PREFIX) or None,
+        "variant_attributes": _prefixed_filters(request, VARIANT_ATTRIBUTE_PREFIX) or None,
+        "in_stock": in_stock,
+    }
+
+
+@router.get("/", response_model=List[ProductResponse], dependencies=[Depends(CatalogCache(CATALOG))])
+async def read_products(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    sort_by: Optional[str] = None,
+    sort_order: str = "asc",
+    cursor: Optional[str] = None,
+    filters: Dict[str, Any] = Depends(product_filters),
     product_service: ProductService = Depends()
 ):
     """
     Get all products with filtering and sorting options
+
+    Pass the `X-Next-Cursor` response header back as `cursor` to fetch the
+    next page; `skip` is ignored when a cursor is given. Searches are
+    relevance-ranked unless `sort_by` is set; `search_prefix` matches
+    partial words. Send the `ETag` back as `If-None-Match` to get a 304
+    while the catalog is unchanged.
     """
     products = product_service.get_products(
         skip=skip,
         limit=limit,
-        category_id=category_id,
-        search=search,
         sort_by=sort_by,
         sort_order=sort_order,
-        is_active=is_active,
-        is_featured=is_featured,
-        min_price=min_price,
-        max_price=max_price
+        cursor=cursor,
+        **filters
     )
     
-    # Add calculated final_price field to the response
-    product_responses = []
-    for product in products:
-        # Calculate final_price
-        final_price = round(product.base_price * (1 - product.discount_percent / 100), 2)
-        
-        # Create a dict from the product and add the calculated field
-        product_dict = {**product.__dict__}
-        product_dict["final_price"] = final_price
-        product_responses.append(product_dict)
+    next_cursor = product_service.get_next_cursor(products, limit, sort_by, sort_order, filters["search"])
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    return product_responses
+    return products
 
 
-@router.get("/{product_id}", response_model=ProductResponse)
+@router.get("/cards", response_model=List[ProductCard])
+async def read_product_cards(
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=200),
+    sort_by: Optional[str] = None,
+    sort_order: str = "asc",
+    cursor: Optional[str] = None,
+    filters: Dict[str, Any] = Depends(product_filters),
+    cache_headers: Dict[str, str] = Depends(CatalogCache(CATALOG)),
+    product_service: ProductService = Depends()
+):
+    """
+    Get lightweight product cards for listing pages
+
+    Accepts the same filters, sorting and cursors as the product listing but
+    returns only card fields, read as plain rows and written straight to JSON.
+    """
+    cards = product_service.get_product_cards(
+        skip=skip,
+        limit=limit,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        cursor=cursor,
+        **filters
+    )
+    
+    response = Response(content=dumps(cards), media_type="application/json", headers=cache_headers)
+    next_cursor = product_service.get_next_cursor(cards, limit, sort_by, sort_order, filters["search"])
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+@router.get("/batch", response_model=ProductBatch, dependencies=[Depends(CatalogCache(CATALOG))])
+async def read_product_batch(
+    ids: Optional[str] = Query(None, description="Comma-separated product IDs"),
+    slugs: Optional[str] = Query(None, description="Comma-separated product slugs"),
+    product_service: ProductService = Depends()
+):
+    """
+    Get many products by ID and/or slug in one request
+
+    Products come back in request order (ids first, then slugs); anything
+    that was not found is listed in `missing`.
+    """
+    id_list = [value for value in (ids or "").split(",") if value.strip()]
+    slug_list = [value.strip() for value in (slugs or "").split(",") if value.strip()]
+    if not id_list and not slug_list:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide ids or slugs"
+        )
+    try:
+        id_list = [int(value) for value in id_list]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be comma-separated integers"
+        )
+    
+    return product_service.get_product_batch(ids=id_list, slugs=slug_list)
+
+
+@router.get("/suggest", response_model=List[SearchSuggestion])
+async def suggest_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=25),
+    db: Session = Depends(get_db)
+):
+    """
+    Search-as-you-type suggestions for product, brand and category names
+
+    Served from an in-memory prefix index; the database is only read when
+    the index is first built or has expired.
+    """
+    suggest_index.ensure_loaded(db)
+    return suggest_index.search(q, limit)
+
+
+@router.get("/facets", response_model=ProductFacets, dependencies=[Depends(CatalogCache(CATALOG))])
+async def read_product_facets(
+    filters: Dict[str, Any] = Depends(product_filters),
+    product_service: ProductService = Depends()
+):
+    """
+    Get product counts per category, brand, price range and featured flag
+    for the same filters as the product listing
+    """
+    return product_service.get_facets(**filters)
+
+
+@router.get("/{product_id}", response_model=ProductResponse, dependencies=[Depends(CatalogCache(CATALOG))])
 async def read_product(
     product_id: int,
     product_service: ProductService = Depends()
@@ -71,19 +215,10 @@ async def read_product(
     """
     Get a specific product by ID
     """
-    product = product_service.get_product_by_id(product_id)
-    
-    # Calculate final_price for response
-    final_price = round(product.base_price * (1 - product.discount_percent / 100), 2)
-    
-    # Create a dict from the product and add the calculated field
-    product_dict = {**product.__dict__}
-    product_dict["final_price"] = final_price
-    
-    return product_dict
+    return product_service.get_product_detail(product_id)
 
 
-@router.get("/slug/{slug}", response_model=ProductResponse)
+@router.get("/slug/{slug}", response_model=ProductResponse, dependencies=[Depends(CatalogCache(CATALOG))])
 async def read_product_by_slug(
     slug: str,
     product_service: ProductService = Depends()
@@ -91,16 +226,7 @@ async def read_product_by_slug(
     """
     Get a specific product by slug
     """
-    product = product_service.get_product_by_slug(slug)
-    
-    # Calculate final_price for response
-    final_price = round(product.base_price * (1 - product.discount_percent / 100), 2)
-    
-    # Create a dict from the product and add the calculated field
-    product_dict = {**product.__dict__}
-    product_dict["final_price"] = final_price
-    
-    return product_dict
+    return product_service.get_product_detail_by_slug(slug)
 
 
 @router.post("/", response_model=Product, status_code=status.HTTP_201_CREATED)
@@ -141,6 +267,22 @@ async def delete_product(
     return None
 
 
+@router.patch("/variants/bulk", response_model=VariantBulkUpdateResult)
+async def bulk_update_variants(
+    update: VariantBulkUpdate,
+    current_user: User = Depends(get_admin_user),
+    product_service: ProductService = Depends()
+):
+    """
+    Update price, stock and status of many variants by id or SKU (admin only)
+
+    Each item names a variant by `id` or `sku` and sets any of `price`,
+    `stock_qty` or `is_active`; `stock_change` adjusts stock relative to
+    the current level instead. The batch is applied all or nothing.
+    """
+    return product_service.bulk_update_variants(update)
+
+
 @router.post("/{product_id}/variants", response_model=ProductVariant)
 async def add_product_variant(
     product_id: int,
@@ -167,6 +309,29 @@ async def add_product_image(
     return product_service.add_product_image(product_id, image_data)
 
 
+@router.post("/{product_id}/images/upload", response_model=ProductImage, status_code=status.HTTP_201_CREATED)
+def upload_product_image(
+    product_id: int,
+    file: UploadFile = File(...),
+    alt_text: Optional[str] = Form(None),
+    is_primary: bool = Form(False),
+    order: int = Form(0),
+    current_user: User = Depends(get_admin_user),
+    image_service: ImageService = Depends()
+):
+    """
+    Upload a JPEG, PNG or WebP image for a product (admin only)
+
+    The original is stored under its content hash; resized WebP and JPEG
+    derivatives appear on the image shortly after the upload returns.
+    """
+    # One byte over the limit is enough to reject it
+    data = file.file.read(MAX_IMAGE_BYTES + 1)
+    return image_service.upload_product_image(
+        product_id, data, alt_text=alt_text, is_primary=is_primary, order=order
+    )
+
+
 @router.post("/generate-slug")
 async def generate_slug(
     name: str,
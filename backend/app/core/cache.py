@@ -0,0 +1,200 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import redis
+
+from app.core.redis import get_redis
+from app.core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Small thread-safe least-recently-used cache for per-worker results
+
+    Entries optionally expire `ttl` seconds after they were set. Hits,
+    misses and evictions (capacity, expiry and explicit) are counted.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class TieredCache:
+    """
+    Cache-aside store with a per-worker LRU in front of shared Redis
+
+    Values must be JSON-serializable (Decimals and datetimes are converted)
+    and are stored in Redis as compact JSON under "<namespace>:<key>". Local
+    entries expire quickly so evictions made by other workers are picked up
+    within `local_ttl`; Redis entries expire after `remote_ttl`. Redis errors
+    are logged and treated as misses, so an outage only costs database reads.
+    """
+
+    def __init__(self, namespace: str, maxsize: int = 1024, local_ttl: float = 30, remote_ttl: int = 600):
+        self.namespace = namespace
+        self.remote_ttl = remote_ttl
+        self.local = LRUCache(maxsize=maxsize, ttl=local_ttl)
+        self.remote_hits = 0
+        self.remote_misses = 0
+        self.remote_errors = 0
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        try:
+            raw = get_redis().get(self._key(key))
+        except redis.RedisError:
+            self.remote_errors += 1
+            logger.warning("Redis read failed for %s", self._key(key), exc_info=True)
+            return None
+        if raw is None:
+            self.remote_misses += 1
+            return None
+
+        self.remote_hits += 1
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> Any:
+        """Store a value in both tiers; returns it as readers will see it"""
+        payload = dumps(value)
+        value = json.loads(payload)
+        self.local.set(key, value)
+        try:
+            get_redis().set(self._key(key), payload, ex=self.remote_ttl)
+        except redis.RedisError:
+            self.remote_errors += 1
+            logger.warning("Redis write failed for %s", self._key(key), exc_info=True)
+        return value
+
+    def get_many(self, keys: List[Hashable]) -> Dict[Hashable, Any]:
+        """Cached values for the keys that have one, with a single Redis round trip"""
+        found = {}
+        remote_keys = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                remote_keys.append(key)
+        if not remote_keys:
+            return found
+
+        try:
+            raws = get_redis().mget([self._key(key) for key in remote_keys])
+        except redis.RedisError:
+            self.remote_errors += 1
+            logger.warning("Redis read failed for %d %s keys", len(remote_keys), self.namespace, exc_info=True)
+            return found
+
+        for key, raw in zip(remote_keys, raws):
+            if raw is None:
+                self.remote_misses += 1
+                continue
+            self.remote_hits += 1
+            found[key] = json.loads(raw)
+            self.local.set(key, found[key])
+        return found
+
+    def set_many(self, items: Dict[Hashable, Any]) -> Dict[Hashable, Any]:
+        """Store several values with one pipelined Redis write"""
+        payloads = {key: dumps(value) for key, value in items.items()}
+        stored = {key: json.loads(payload) for key, payload in payloads.items()}
+        for key, value in stored.items():
+            self.local.set(key, value)
+        try:
+            with get_redis().pipeline(transaction=False) as pipe:
+                for key, payload in payloads.items():
+                    pipe.set(self._key(key), payload, ex=self.remote_ttl)
+                pipe.execute()
+        except redis.RedisError:
+            self.remote_errors += 1
+            logger.warning("Redis write failed for %d %s keys", len(items), self.namespace, exc_info=True)
+        return stored
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for key, calling loader on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = self.set(key, loader())
+        return value
+
+    def evict(self, *keys: Hashable) -> None:
+        """Drop keys from both tiers after the rows behind them changed"""
+        for key in keys:
+            self.local.delete(key)
+        try:
+            get_redis().delete(*(self._key(key) for key in keys))
+        except redis.RedisError:
+            self.remote_errors += 1
+            logger.error("Redis eviction failed for %s", keys, exc_info=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "local": self.local.stats(),
+            "remote": {
+                "hits": self.remote_hits,
+                "misses": self.remote_misses,
+                "errors": self.remote_errors,
+            },
+        }
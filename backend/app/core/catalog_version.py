@@ -0,0 +1,100 @@
+import logging
+import time
+from itertools import chain
+from typing import Optional
+
+import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.redis import get_redis
+from app.models.product import Product, ProductVariant, ProductImage
+from app.models.category import Category
+from app.models.coupon import Coupon
+
+logger = logging.getLogger(__name__)
+
+# Version counters bumped whenever the rows behind them change. Caches and
+# ETags key their entries on the current version, so a bump invalidates them
+# all. Counters live in Redis so every worker sees the same value.
+CATALOG = "catalog"
+CATEGORIES = "categories"
+COUPONS = "coupons"
+
+_MODEL_VERSIONS = {
+    Product: (CATALOG,),
+    ProductVariant: (CATALOG,),
+    ProductImage: (CATALOG,),
+    Category: (CATALOG, CATEGORIES),
+    Coupon: (COUPONS,),
+}
+
+
+def _key(name: str) -> str:
+    return f"version:{name}"
+
+
+def _seed(client, name: str) -> None:
+    # Start from the clock rather than 0, so a counter lost with a Redis
+    # flush never repeats a version (and ETag) handed out before it
+    client.set(_key(name), time.time_ns() // 1000, nx=True)
+
+
+def get_version(name: str = CATALOG) -> Optional[int]:
+    """
+    Current value of a version counter
+
+    Returns None when Redis is unavailable; callers must not cache then.
+    """
+    client = get_redis()
+    try:
+        value = client.get(_key(name))
+        if value is None:
+            _seed(client, name)
+            value = client.get(_key(name))
+        return int(value)
+    except redis.RedisError:
+        logger.warning("Could not read the %s version from Redis", name, exc_info=True)
+        return None
+
+
+def bump_version(*names: str) -> None:
+    """Invalidate everything cached against the given versions"""
+    client = get_redis()
+    for name in names or (CATALOG,):
+        try:
+            _seed(client, name)
+            client.incr(_key(name))
+        except redis.RedisError:
+            logger.error("Could not bump the %s version in Redis", name, exc_info=True)
+
+
+def _mark(session: Session, mapper_class) -> None:
+    names = _MODEL_VERSIONS.get(mapper_class)
+    if names:
+        session.info.setdefault("touched_versions", set()).update(names)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        _mark(session, type(obj))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(orm_execute_state):
+    # query(...).update()/.delete() skip the flush, so record them here
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper:
+        _mark(orm_execute_state.session, orm_execute_state.bind_mapper.class_)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed(session):
+    names = session.info.pop("touched_versions", None)
+    if names:
+        bump_version(*names)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop("touched_versions", None)
@@ -0,0 +1,166 @@
+import gzip
+import mimetypes
+import os
+import stat
+from typing import Optional
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Bodies smaller than this gain less than the encoding header costs
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# CPU budget per response. Up to COMPRESSION_FAST_ABOVE bytes, brotli 4 /
+# gzip 6 (a 130 KB product listing: ~5 ms / ~3 ms, 6-8% of its size);
+# larger bodies use the fastest levels (~1 ms per 130 KB, 7-9%), so no
+# response holds a worker for long. Maximum levels cost up to 200x the CPU
+# for a few percent and are left to precompressed static files.
+COMPRESSION_FAST_ABOVE = int(os.getenv("COMPRESSION_FAST_ABOVE", str(256 * 1024)))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Dynamic responses worth compressing; static files are precompressed instead
+COMPRESSIBLE_TYPES = {"application/json", "text/html"}
+
+# Static file types that get precompressed siblings; other static files
+# (images, fonts) are compressed formats already
+PRECOMPRESSED_EXTENSIONS = (".css", ".js", ".mjs", ".json", ".map", ".svg", ".html", ".txt", ".xml", ".webmanifest")
+
+# Encodings in order of preference, with the suffix of their precompressed files
+ENCODINGS = (("br", ".br"), ("gzip", ".gz")) if brotli else (("gzip", ".gz"),)
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Content codings an Accept-Encoding header allows (q > 0)"""
+    accepted, rejected = set(), set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        (accepted if quality > 0 else rejected).add(coding.strip())
+    if "*" in accepted:
+        accepted.update(coding for coding, _ in ENCODINGS if coding not in rejected)
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = accepted_encodings(accept_encoding)
+    for coding, _ in ENCODINGS:
+        if coding in accepted:
+            return coding
+    return None
+
+
+def compress(data: bytes, coding: str, maximum: bool = False) -> bytes:
+    """Encode a body; `maximum` trades CPU for size, for build-time compression"""
+    fast = not maximum and len(data) > COMPRESSION_FAST_ABOVE
+    if coding == "br":
+        quality = 11 if maximum else 1 if fast else BROTLI_QUALITY
+        return brotli.compress(data, quality=quality)
+    level = 9 if maximum else 1 if fast else GZIP_LEVEL
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON and HTML responses with brotli or gzip, as accepted
+
+    Only complete bodies of at least `minimum_size` bytes are compressed;
+    streamed responses and anything already encoded pass through. A
+    compressed response gets a weak ETag (its bytes differ from the
+    identity encoding), which conditional requests still match.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        coding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+            if media_type not in COMPRESSIBLE_TYPES or "content-encoding" in headers:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            # The representation depends on Accept-Encoding whether or not this one is compressed
+            headers.add_vary_header("Accept-Encoding")
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or coding is None or len(body) < self.minimum_size:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            body = compress(body, coding)
+            headers["Content-Encoding"] = coding
+            headers["Content-Length"] = str(len(body))
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Static files served from their .br / .gz siblings when accepted
+
+    The siblings are written ahead of time (scripts/precompress_static.py),
+    so compressed assets cost no CPU per request. Each encoding is its own
+    file with its own ETag.
+    """
+
+    async def get_response(self, path: str, scope: Scope):
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        for coding, suffix in ENCODINGS:
+            if coding not in accepted or not path.endswith(PRECOMPRESSED_EXTENSIONS):
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                response = self.file_response(full_path, stat_result, scope)
+                media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                if media_type.startswith("text/"):
+                    media_type += "; charset=utf-8"
+                response.headers["Content-Type"] = media_type
+                response.headers["Content-Encoding"] = coding
+                response.headers.add_vary_header("Accept-Encoding")
+                return response
+
+        response = await super().get_response(path, scope)
+        if path.endswith(PRECOMPRESSED_EXTENSIONS):
+            response.headers.add_vary_header("Accept-Encoding")
+        return response
@@ -0,0 +1,58 @@
+import os
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.core.catalog_version import get_version
+
+# How long browsers and the CDN may reuse a catalog response without asking,
+# and how much longer they may serve it stale while revalidating in the
+# background. Revalidation is a cheap 304 as long as the catalog is unchanged.
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_CACHE_MAX_AGE", "60"))
+CATALOG_STALE_WHILE_REVALIDATE = int(os.getenv("CATALOG_CACHE_STALE_WHILE_REVALIDATE", "300"))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison: weak, over a list of tags or "*" """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+class CatalogCache:
+    """
+    Route dependency that makes a catalog GET conditional
+
+    The ETag is derived from the version counters the response depends on,
+    so it is known before the database is touched. A matching If-None-Match
+    is answered with 304 straight from here and the endpoint never runs.
+    Otherwise the ETag and Cache-Control are added to the response, and
+    returned for endpoints that build their own Response.
+    """
+
+    def __init__(self, *names: str, max_age: int = CATALOG_MAX_AGE,
+                 stale_while_revalidate: int = CATALOG_STALE_WHILE_REVALIDATE):
+        self.names = names
+        self.cache_control = f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}"
+
+    def __call__(self, request: Request, response: Response) -> Dict[str, str]:
+        versions = [get_version(name) for name in self.names]
+        if None in versions:
+            # Without versions a stale response cannot be detected
+            headers = {"Cache-Control": "no-cache"}
+        else:
+            etag = '"' + "-".join(format(version, "x") for version in versions) + '"'
+            headers = {"ETag": etag, "Cache-Control": self.cache_control}
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+        return headers
@@ -0,0 +1,54 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, last_id: int) -> str:
+    """
+    Encode the position after the last row of a page as an opaque cursor
+
+    Args:
+        sort_by: Sort key the page was ordered by
+        sort_order: "asc" or "desc"
+        value: Value of the sort column on the last row
+        last_id: Primary key of the last row (tie-breaker)
+
+    Returns:
+        URL-safe cursor string
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+
+    payload = {"s": sort_by, "o": sort_order, "v": value, "id": last_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return {
+            "sort_by": payload["s"],
+            "sort_order": payload["o"],
+            "value": payload["v"],
+            "id": int(payload["id"]),
+        }
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
@@ -0,0 +1,69 @@
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block of code issues more statements or rows than allowed"""
+
+
+class QueryCounter:
+    """Statements executed and rows returned while the counter is attached"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+        self.rows = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if cursor.description is not None and cursor.rowcount > 0:
+            self.rows += cursor.rowcount
+
+
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[QueryCounter]:
+    """
+    Count the statements and result rows an engine sees inside the block
+
+    Example:
+        with count_queries(engine) as counter:
+            client.get("/api/v1/products/")
+        print(counter.count, counter.rows)
+    """
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter._before_execute)
+    event.listen(engine, "after_cursor_execute", counter._after_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter._before_execute)
+        event.remove(engine, "after_cursor_execute", counter._after_execute)
+
+
+@contextmanager
+def query_budget(engine: Engine, max_statements: int, max_rows: Optional[int] = None) -> Iterator[QueryCounter]:
+    """
+    Fail if the block issues more than `max_statements` statements or reads
+    more than `max_rows` rows
+
+    Raises:
+        QueryBudgetExceeded: If either limit is exceeded
+    """
+    with count_queries(engine) as counter:
+        yield counter
+
+    if counter.count > max_statements:
+        raise QueryBudgetExceeded(
+            f"{counter.count} statements executed, budget is {max_statements}:\n"
+            + "\n".join(counter.statements)
+        )
+    if max_rows is not None and counter.rows > max_rows:
+        raise QueryBudgetExceeded(f"{counter.rows} rows read, budget is {max_rows}")
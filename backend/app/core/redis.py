@@ -0,0 +1,190 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+
+# Shared Redis for state every worker must agree on. Without REDIS_URL an
+# in-process stand-in is used, which is only correct for a single worker.
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Keep requests fast when Redis is slow or down; callers treat errors as misses
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.25"))
+
+
+class MemoryRedis:
+    """
+    In-process stand-in for the subset of the Redis client the app uses
+
+    Values are stored as bytes (hashes as dicts of bytes) and expire like
+    Redis keys, so code written against it behaves the same against a real
+    server.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, name: str) -> Any:
+        item = self._data.get(name)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[name]
+            return None
+        return value
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode()
+
+    def ping(self) -> bool:
+        return True
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            return self._live(name)
+
+    def mget(self, names: List[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            return [self._live(name) for name in names]
+
+    def set(self, name: str, value: Any, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        with self._lock:
+            if nx and self._live(name) is not None:
+                return None
+            expires_at = time.monotonic() + ex if ex else None
+            self._data[name] = (self._encode(value), expires_at)
+            return True
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            current = self._live(name)
+            value = int(current) + amount if current is not None else amount
+            expires_at = self._data[name][1] if current is not None else None
+            self._data[name] = (self._encode(value), expires_at)
+            return value
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            removed = 0
+            for name in names:
+                if self._live(name) is not None:
+                    removed += 1
+                self._data.pop(name, None)
+            return removed
+
+    def expire(self, name: str, seconds: int) -> bool:
+        with self._lock:
+            value = self._live(name)
+            if value is None:
+                return False
+            self._data[name] = (value, time.monotonic() + seconds)
+            return True
+
+    def hget(self, name: str, key: Any) -> Optional[bytes]:
+        with self._lock:
+            return (self._live(name) or {}).get(self._encode(key))
+
+    def hgetall(self, name: str) -> Dict[bytes, bytes]:
+        with self._lock:
+            return dict(self._live(name) or {})
+
+    def hset(self, name: str, key: Any, value: Any) -> int:
+        with self._lock:
+            fields = self._hash(name)
+            added = self._encode(key) not in fields
+            fields[self._encode(key)] = self._encode(value)
+            return int(added)
+
+    def hincrby(self, name: str, key: Any, amount: int = 1) -> int:
+        with self._lock:
+            fields = self._hash(name)
+            current = fields.get(self._encode(key))
+            value = int(current) + amount if current is not None else amount
+            fields[self._encode(key)] = self._encode(value)
+            return value
+
+    def hdel(self, name: str, *keys: Any) -> int:
+        with self._lock:
+            fields = self._live(name)
+            if fields is None:
+                return 0
+            removed = sum(fields.pop(self._encode(key), None) is not None for key in keys)
+            if not fields:
+                del self._data[name]
+            return removed
+
+    def hlen(self, name: str) -> int:
+        with self._lock:
+            return len(self._live(name) or {})
+
+    def _hash(self, name: str) -> Dict[bytes, bytes]:
+        fields = self._live(name)
+        if fields is None:
+            fields = {}
+            self._data[name] = (fields, None)
+        return fields
+
+    def flushdb(self) -> bool:
+        with self._lock:
+            self._data.clear()
+            return True
+
+    def pipeline(self, transaction: bool = True) -> "MemoryPipeline":
+        return MemoryPipeline(self)
+
+
+class MemoryPipeline:
+    """Queues MemoryRedis commands and runs them on execute(), like a Redis pipeline"""
+
+    def __init__(self, client: MemoryRedis):
+        self._client = client
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        return [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in commands]
+
+    def __enter__(self) -> "MemoryPipeline":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._commands = []
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_redis():
+    """Process-wide Redis client, or the in-memory stand-in without REDIS_URL"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if REDIS_URL:
+                    _client = redis.Redis.from_url(
+                        REDIS_URL,
+                        socket_timeout=REDIS_SOCKET_TIMEOUT,
+                        socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+                    )
+                else:
+                    _client = MemoryRedis()
+    return _client
+
+
+def set_redis(client) -> None:
+    """Replace the process-wide client, e.g. with a MemoryRedis in scripts"""
+    global _client
+    _client = client
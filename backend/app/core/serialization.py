@@ -0,0 +1,18 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+
+def json_default(value: Any) -> Any:
+    """json.dumps fallback for the column types our rows carry"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> str:
+    """Compact JSON for rows that skip Pydantic serialization"""
+    return json.dumps(value, default=json_default, separators=(",", ":"))
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import boto3
+from botocore.exceptions import ClientError
+
+from app.core.compression import PrecompressedStaticFiles
+
+# Where uploaded media lives: "local" (a directory the app serves) or "s3"
+# (any S3-compatible store, e.g. behind a CDN)
+MEDIA_STORAGE = os.getenv("MEDIA_STORAGE", "local")
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", str(Path(__file__).resolve().parents[2] / "media"))
+# Public prefix of media URLs; the local backend is mounted here when it is a path
+MEDIA_URL = os.getenv("MEDIA_URL", "/media/")
+
+MEDIA_S3_BUCKET = os.getenv("MEDIA_S3_BUCKET")
+MEDIA_S3_PREFIX = os.getenv("MEDIA_S3_PREFIX", "")
+MEDIA_S3_ENDPOINT_URL = os.getenv("MEDIA_S3_ENDPOINT_URL")  # unset for AWS
+
+# Media keys are content addressed, so a URL never changes what it serves
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class LocalStorage:
+    """Media files in a local directory, served by the app at MEDIA_URL"""
+
+    def __init__(self, root: str = MEDIA_ROOT, base_url: str = MEDIA_URL):
+        self.root = Path(root)
+        self.base_url = base_url
+
+    def save(self, key: str, data: bytes, content_type: str) -> None:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed, so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def read(self, key: str) -> bytes:
+        return (self.root / key).read_bytes()
+
+    def exists(self, key: str) -> bool:
+        return (self.root / key).is_file()
+
+    def url(self, key: str) -> str:
+        return self.base_url + key
+
+
+class S3Storage:
+    """Media objects in an S3-compatible bucket, served from MEDIA_URL"""
+
+    def __init__(
+        self,
+        bucket: str = MEDIA_S3_BUCKET,
+        prefix: str = MEDIA_S3_PREFIX,
+        base_url: str = MEDIA_URL,
+        endpoint_url: str = MEDIA_S3_ENDPOINT_URL,
+    ):
+        if not bucket:
+            raise RuntimeError("MEDIA_S3_BUCKET must be set for S3 media storage")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.base_url = base_url
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def save(self, key: str, data: bytes, content_type: str) -> None:
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self.prefix + key,
+            Body=data,
+            ContentType=content_type,
+            CacheControl=IMMUTABLE_CACHE_CONTROL,
+        )
+
+    def read(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"].read()
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def url(self, key: str) -> str:
+        return self.base_url + key
+
+
+class ImmutableStaticFiles(PrecompressedStaticFiles):
+    """Static files served with a far-future, immutable Cache-Control"""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Process-wide media storage backend selected by MEDIA_STORAGE"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if MEDIA_STORAGE == "s3":
+                    _storage = S3Storage()
+                elif MEDIA_STORAGE == "local":
+                    _storage = LocalStorage()
+                else:
+                    raise RuntimeError(f"Unknown MEDIA_STORAGE: {MEDIA_STORAGE}")
+    return _storage
+
+
+def set_storage(storage) -> None:
+    """Replace the process-wide backend, e.g. with a LocalStorage in scripts"""
+    global _storage
+    _storage = storage
@@ -1,10 +1,12 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
 import os
 from pathlib import Path
 
+from app.core.compression import CompressionMiddleware, PrecompressedStaticFiles
+from app.core.storage import ImmutableStaticFiles, MEDIA_ROOT, MEDIA_STORAGE, MEDIA_URL
+
 # Create static directory if it doesn't exist
 static_dir = Path(__file__).parent / "static"
 static_dir.mkdir(parents=True, exist_ok=True)
@@ -43,10 +45,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# JSON and HTML responses, brotli or gzip as the client accepts
+app.add_middleware(CompressionMiddleware)
+
 # Mount static files
-app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory=str(static_dir)), name="static")
+
+# Uploaded media, when stored locally; content-addressed, so cached for good
+if MEDIA_STORAGE == "local" and MEDIA_URL.startswith("/"):
+    Path(MEDIA_ROOT).mkdir(parents=True, exist_ok=True)
+    app.mount(MEDIA_URL.rstrip("/"), ImmutableStaticFiles(directory=MEDIA_ROOT), name="media")
 
 # Import and include API router
 from app.api import api_router
@@ -1,5 +1,5 @@
 from app.models.user import User
-from app.models.category import Category
+from app.models.category import Category, CategoryClosure, CategoryProductCount
 from app.models.product import Product, ProductVariant, ProductImage
 from app.models.inventory import InventoryMovement
 from app.models.order import Order, OrderItem, Payment
@@ -12,6 +12,8 @@ from app.models.coupon import Coupon
 __all__ = [
     "User",
     "Category",
+    "CategoryClosure",
+    "CategoryProductCount",
     "Product",
     "ProductVariant",
     "ProductImage",
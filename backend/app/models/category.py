@@ -18,4 +18,35 @@ class Category(Base):
     parent = relationship("Category", remote_side=[id], backref="subcategories")
     
     # Relationships
-    products = relationship("Product", back_populates="category")
\ No newline at end of file
+    products = relationship("Product", back_populates="category")
+
+
+class CategoryClosure(Base):
+    """
+    Every (ancestor, descendant) pair of the category hierarchy, including
+    each category paired with itself at depth 0
+
+    Maintained by database triggers on categories (see the category_closure
+    migration), so it follows inserts, deletes and parent_id changes.
+    """
+    __tablename__ = "category_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True, index=True)
+    depth = Column(Integer, nullable=False)
+
+
+class CategoryProductCount(Base):
+    """
+    Product counts of a category, directly and including all descendants
+
+    Maintained by database triggers on products and categories (see the
+    category_product_counts migration); never written by the application.
+    """
+    __tablename__ = "category_product_counts"
+
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    product_count = Column(Integer, nullable=False, server_default="0")
+    active_count = Column(Integer, nullable=False, server_default="0")
+    subtree_product_count = Column(Integer, nullable=False, server_default="0")
+    subtree_active_count = Column(Integer, nullable=False, server_default="0")
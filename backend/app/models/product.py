@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Numeric, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Numeric, Index, Computed, FetchedValue, text
+from sqlalchemy.dialects.postgresql import TSVECTOR, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
 from app.database import Base
 
+# Text search configuration used for the product search vector and queries
+SEARCH_CONFIG = "english"
+
 class Product(Base):
     __tablename__ = "products"
 
@@ -11,16 +15,54 @@ class Product(Base):
     name = Column(String(200), nullable=False)
     slug = Column(String(250), unique=True, nullable=False, index=True)
     description = Column(Text)
-    category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL"), nullable=True, index=True)
     brand = Column(String(100))
     base_price = Column(Numeric(10, 2), nullable=False)
     discount_percent = Column(Numeric(5, 2), default=0)
     is_active = Column(Boolean, default=True)
     is_featured = Column(Boolean, default=False)
-    product_metadata = Column(JSON)  # Renamed from metadata to product_metadata
+    product_metadata = Column(JSONB)  # Renamed from metadata to product_metadata
+
+    # Hash of the record a catalog sync last applied (see CatalogSyncService);
+    # NULL for products the sync does not manage
+    content_hash = Column(String(32))
+
+    # product_metadata with lower-cased keys and every value as a lower-cased
+    # array, for case-insensitive attribute filters through a containment
+    # GIN index (see the product_metadata_jsonb migration)
+    metadata_normalized = Column(JSONB, Computed("products_normalize_metadata(product_metadata)", persisted=True))
+
+    # Maintained by database triggers (see the product_prices migration): the
+    # discounted base price, and the range of active variant prices less the
+    # same discount, which falls back to final_price without active variants
+    final_price = Column(Numeric(10, 2), server_default=FetchedValue(), server_onupdate=FetchedValue())
+    min_variant_price = Column(Numeric(10, 2), server_default=FetchedValue(), server_onupdate=FetchedValue())
+    max_variant_price = Column(Numeric(10, 2), server_default=FetchedValue(), server_onupdate=FetchedValue())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    # Weighted full-text document (name > brand > description), kept current by Postgres
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(brand, '')), 'B') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'C')",
+            persisted=True,
+        ),
+    )
+
+    # Keyset pagination indexes, one per listing sort key
+    __table_args__ = (
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_base_price_id", "base_price", "id"),
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_min_variant_price_id", "min_variant_price", "id"),
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_products_metadata_normalized", "metadata_normalized", postgresql_using="gin",
+              postgresql_ops={"metadata_normalized": "jsonb_path_ops"}),
+    )
+
     # Relationships
     category = relationship("Category", back_populates="products")
     variants = relationship("ProductVariant", back_populates="product", cascade="all, delete-orphan")
@@ -32,13 +74,25 @@ class ProductVariant(Base):
     __tablename__ = "product_variants"
 
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
     sku = Column(String(100), unique=True, nullable=False, index=True)
     variant_name = Column(String(150))
     price = Column(Numeric(10, 2), nullable=False)
     stock_qty = Column(Integer, default=0)
-    attributes = Column(JSON)
+    attributes = Column(JSONB)
     is_active = Column(Boolean, default=True)
+    content_hash = Column(String(32))  # as on Product
+
+    # Normalized like Product.metadata_normalized, for variant attribute filters
+    attributes_normalized = Column(JSONB, Computed("products_normalize_metadata(attributes)", persisted=True))
+
+    __table_args__ = (
+        Index("ix_product_variants_attributes_normalized", "attributes_normalized", postgresql_using="gin",
+              postgresql_ops={"attributes_normalized": "jsonb_path_ops"}),
+        # Stock checks in listings only ever look for sellable variants
+        Index("ix_product_variants_in_stock", "product_id",
+              postgresql_where=text("is_active AND stock_qty > 0")),
+    )
 
     # Relationships
     product = relationship("Product", back_populates="variants")
@@ -52,11 +106,19 @@ class ProductImage(Base):
     __tablename__ = "product_images"
 
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
     image_url = Column(Text, nullable=False)
     alt_text = Column(String(255))
     is_primary = Column(Boolean, default=False)
     order = Column(Integer, default=0)
 
+    # Set for uploaded images (see ImageService): SHA-256 of the original,
+    # which also addresses its files in media storage, and its pixel size
+    content_hash = Column(String(64), index=True)
+    width = Column(Integer)
+    height = Column(Integer)
+    # Resized renditions as [{"width", "format", "url"}]; NULL while they are generated
+    derivatives = Column(JSONB)
+
     # Relationships
     product = relationship("Product", back_populates="images")
\ No newline at end of file
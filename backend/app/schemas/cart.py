@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, root_validator
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
@@ -16,6 +16,32 @@ class CartItemUpdate(BaseModel):
     quantity: int = Field(..., gt=0)
 
 
+class CartOperation(BaseModel):
+    op: Literal["add", "update", "remove"]
+    variant_id: Optional[int] = None  # add
+    item_id: Optional[int] = None  # update, remove
+    quantity: Optional[int] = Field(None, gt=0)  # add, update
+
+    @root_validator(skip_on_failure=True)
+    def validate_operation(cls, values):
+        op = values.get('op')
+        if op == 'add' and values.get('variant_id') is None:
+            raise ValueError('add needs a variant_id')
+        if op != 'add' and values.get('item_id') is None:
+            raise ValueError(f'{op} needs an item_id')
+        if op != 'remove' and values.get('quantity') is None:
+            raise ValueError(f'{op} needs a quantity')
+        return values
+
+
+class CartBatch(BaseModel):
+    operations: List[CartOperation] = Field(..., min_items=1)  # applied in order
+
+
+class CartMerge(BaseModel):
+    items: List[CartItemCreate] = []  # the guest cart
+
+
 class CartItem(CartItemBase):
     id: int
     cart_id: int
@@ -23,6 +49,8 @@ class CartItem(CartItemBase):
     # Additional fields from variant
     variant_name: Optional[str] = None
     price: Optional[float] = None
+    unit_price: Optional[float] = None  # price less the product discount
+    line_total: Optional[float] = None
     product_name: Optional[str] = None
     product_slug: Optional[str] = None
     image_url: Optional[str] = None
@@ -50,7 +78,32 @@ class CartResponse(BaseModel):
     updated_at: datetime
     items: List[CartItem] = []
     total_items: int
-    subtotal: float
+    subtotal: float  # of the line totals
+    coupon_code: Optional[str] = None
+    coupon_discount: float = 0.0
+    total: float
     
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class GuestCartItem(BaseModel):
+    variant_id: int
+    quantity: int
+    price: float
+    unit_price: float  # price less the product discount
+    line_total: float
+    variant_name: Optional[str] = None
+    product_name: str
+    product_slug: str
+    image_url: Optional[str] = None
+    in_stock: bool  # enough stock for the quantity
+
+
+class GuestCartResponse(BaseModel):
+    items: List[GuestCartItem] = []
+    total_items: int
+    subtotal: float  # of the line totals
+    coupon_code: Optional[str] = None
+    coupon_discount: float = 0.0
+    total: float
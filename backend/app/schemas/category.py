@@ -37,6 +37,17 @@ class Category(CategoryBase):
         orm_mode = True
 
 
+class CategoryProductCounts(BaseModel):
+    category_id: int
+    product_count: int
+    active_count: int
+    subtree_product_count: int
+    subtree_active_count: int
+    
+    class Config:
+        orm_mode = True
+
+
 class CategoryWithSubcategories(Category):
     subcategories: List['CategoryWithSubcategories'] = []
     
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, validator, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, validator, root_validator, Field
+from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
 
 from app.schemas.category import Category
@@ -20,9 +20,19 @@ class ProductImageUpdate(ProductImageBase):
     image_url: Optional[str] = None
 
 
+class ImageDerivative(BaseModel):
+    width: int
+    format: str  # "webp" or "jpeg"
+    url: str
+
+
 class ProductImage(ProductImageBase):
     id: int
     product_id: int
+    # Uploaded images only; derivatives stay empty until they are generated
+    width: Optional[int] = None
+    height: Optional[int] = None
+    derivatives: Optional[List[ImageDerivative]] = None
     
     class Config:
         orm_mode = True
@@ -54,6 +64,47 @@ class ProductVariant(ProductVariantBase):
         orm_mode = True
 
 
+class VariantBulkUpdateItem(BaseModel):
+    id: Optional[int] = None
+    sku: Optional[str] = None
+    price: Optional[float] = None
+    stock_qty: Optional[int] = None  # new stock level
+    stock_change: Optional[int] = None  # or an adjustment to the current level
+    is_active: Optional[bool] = None
+
+    @validator('price')
+    def validate_price(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError('price must be positive')
+        return v
+
+    @validator('stock_qty')
+    def validate_stock_qty(cls, v):
+        if v is not None and v < 0:
+            raise ValueError('stock_qty cannot be negative')
+        return v
+
+    @root_validator(skip_on_failure=True)
+    def validate_item(cls, values):
+        if (values.get('id') is None) == (values.get('sku') is None):
+            raise ValueError('exactly one of id or sku is required')
+        if values.get('stock_qty') is not None and values.get('stock_change') is not None:
+            raise ValueError('stock_qty and stock_change cannot be combined')
+        return values
+
+
+class VariantBulkUpdate(BaseModel):
+    items: List[VariantBulkUpdateItem] = Field(..., min_items=1)
+    reason: str = Field("bulk_update", max_length=100)  # recorded on inventory movements
+
+
+class VariantBulkUpdateResult(BaseModel):
+    updated: int  # variants whose price, stock or status changed
+    unchanged: int
+    movements: int  # inventory movements recorded for stock changes
+    missing: List[Union[int, str]] = []  # requested ids and SKUs with no variant
+
+
 class ProductBase(BaseModel):
     name: str
     slug: str
@@ -92,6 +143,9 @@ class ProductUpdate(ProductBase):
 
 class Product(ProductBase):
     id: int
+    final_price: Optional[float] = None
+    min_variant_price: Optional[float] = None
+    max_variant_price: Optional[float] = None
     created_at: datetime
     updated_at: datetime
     variants: List[ProductVariant] = []
@@ -105,12 +159,48 @@ class ProductWithCategory(Product):
     category: Optional["Category"] = None
 
 
-# Extended product response with calculated fields
+# Product response for catalog reads; prices are stored on the product row
 class ProductResponse(Product):
     final_price: float
-    
-    @validator('final_price', pre=True)
-    def calculate_final_price(cls, v, values):
-        base_price = values.get('base_price', 0)
-        discount = values.get('discount_percent', 0)
-        return round(base_price * (1 - discount / 100), 2)
\ No newline at end of file
+    matched_variant_ids: Optional[List[int]] = None  # set when listing with variant filters
+
+
+class ProductBatch(BaseModel):
+    products: List[ProductResponse] = []
+    missing: List[Union[int, str]] = []  # requested ids and slugs with no product
+
+
+class ProductCard(BaseModel):
+    id: int
+    name: str
+    slug: str
+    base_price: float
+    final_price: float
+    min_variant_price: float
+    max_variant_price: float
+    image_url: Optional[str] = None
+    category_name: Optional[str] = None
+    in_stock: bool
+    matched_variant_ids: Optional[List[int]] = None
+    created_at: datetime
+
+
+class SearchSuggestion(BaseModel):
+    text: str
+    type: str  # "product", "brand" or "category"
+    id: Optional[int] = None
+    slug: Optional[str] = None
+
+
+class FacetCount(BaseModel):
+    value: Union[int, bool, str, None] = None
+    label: Optional[str] = None
+    count: int
+
+
+class ProductFacets(BaseModel):
+    total: int
+    categories: List[FacetCount] = []
+    brands: List[FacetCount] = []
+    price_ranges: List[FacetCount] = []
+    featured: List[FacetCount] = []
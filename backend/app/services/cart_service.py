@@ -1,11 +1,75 @@
 from typing import List, Optional, Dict, Any
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session, joinedload
 from fastapi import Depends, HTTPException, status
 
 from app.database import get_db
 from app.models.cart import Cart, CartItem
 from app.models.product import ProductVariant, Product, ProductImage
-from app.schemas.cart import CartItemCreate, CartItemUpdate
+from app.schemas.cart import CartItemCreate, CartItemUpdate, CartOperation
+from app.services.pricing_service import PricingService, price_cart
+
+# Most operations (or guest cart items) a single batch (or merge) may apply
+MAX_CART_OPERATIONS = 200
+
+# Adds a variant to a user's cart in one statement: the variant must exist
+# and be active, the cart is created on first use, and an item already in
+# the cart has its quantity increased. The unique constraints on
+# carts.user_id and cart_items (cart_id, variant_id) make concurrent adds
+# merge rather than duplicate. No row is returned for an unknown or
+# inactive variant, and then nothing is written.
+ADD_TO_CART = """
+WITH variant AS (
+    SELECT id FROM product_variants WHERE id = :variant_id AND is_active
+), cart AS (
+    INSERT INTO carts (user_id)
+    SELECT :user_id FROM variant
+    ON CONFLICT (user_id) DO UPDATE SET updated_at = now()
+    RETURNING id
+)
+INSERT INTO cart_items (cart_id, variant_id, quantity)
+SELECT cart.id, :variant_id, :quantity FROM cart
+ON CONFLICT (cart_id, variant_id) DO UPDATE SET quantity = cart_items.quantity + EXCLUDED.quantity
+RETURNING id, cart_id, variant_id, quantity
+"""
+
+UPDATE_CART_ITEM = """
+UPDATE cart_items
+SET quantity = :quantity
+FROM carts
+WHERE cart_items.id = :item_id AND cart_items.cart_id = carts.id AND carts.user_id = :user_id
+RETURNING cart_items.id, cart_items.cart_id, cart_items.variant_id, cart_items.quantity
+"""
+
+
+REMOVE_CART_ITEM = """
+DELETE FROM cart_items
+USING carts
+WHERE cart_items.id = :item_id AND cart_items.cart_id = carts.id AND carts.user_id = :user_id
+RETURNING cart_items.id
+"""
+
+# Merges a guest cart into a user's cart in one statement: quantities of a
+# variant are summed, both within the guest cart and with the user's item,
+# and variants that are gone or inactive since they were added are skipped
+MERGE_CART = """
+WITH items AS (
+    SELECT item.variant_id, sum(item.quantity) AS quantity
+    FROM unnest(CAST(:variant_ids AS integer[]), CAST(:quantities AS integer[])) AS item(variant_id, quantity)
+    JOIN product_variants ON product_variants.id = item.variant_id AND product_variants.is_active
+    GROUP BY item.variant_id
+), cart AS (
+    INSERT INTO carts (user_id)
+    SELECT :user_id WHERE EXISTS (SELECT 1 FROM items)
+    ON CONFLICT (user_id) DO UPDATE SET updated_at = now()
+    RETURNING id
+)
+INSERT INTO cart_items (cart_id, variant_id, quantity)
+SELECT cart.id, items.variant_id, items.quantity FROM cart, items
+ON CONFLICT (cart_id, variant_id) DO UPDATE SET quantity = cart_items.quantity + EXCLUDED.quantity
+RETURNING id
+"""
 
 
 class CartService:
@@ -17,107 +81,123 @@ class CartService:
         # Try to find existing active cart
         cart = self.db.query(Cart).filter(Cart.user_id == user_id).first()
         
-        # If no cart exists, create one
+        # If no cart exists, create one; a concurrent request may just have
         if not cart:
-            cart = Cart(user_id=user_id)
-            self.db.add(cart)
+            self.db.execute(
+                insert(Cart).values(user_id=user_id).on_conflict_do_nothing(index_elements=[Cart.user_id])
+            )
             self.db.commit()
-            self.db.refresh(cart)
+            cart = self.db.query(Cart).filter(Cart.user_id == user_id).first()
         
         return cart
     
     def add_to_cart(self, user_id: int, item_data: CartItemCreate) -> CartItem:
-        """Add an item to the user's cart"""
-        # Get or create cart
-        cart = self.get_user_cart(user_id)
-        
-        # Check if the variant exists
-        variant = self.db.query(ProductVariant).filter(
-            ProductVariant.id == item_data.variant_id,
-            ProductVariant.is_active == True
-        ).first()
-        
-        if not variant:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Product variant not found or is not active"
-            )
-        
-        # Check if the item is already in the cart
-        existing_item = self.db.query(CartItem).filter(
-            CartItem.cart_id == cart.id,
-            CartItem.variant_id == item_data.variant_id
-        ).first()
-        
-        if existing_item:
-            # Update quantity if item exists
-            existing_item.quantity += item_data.quantity
-            self.db.add(existing_item)
-            self.db.commit()
-            self.db.refresh(existing_item)
-            return existing_item
-        
-        # Create new cart item
-        cart_item = CartItem(
-            cart_id=cart.id,
-            variant_id=item_data.variant_id,
-            quantity=item_data.quantity
-        )
-        
-        self.db.add(cart_item)
+        """Add an item to the user's cart, or increase its quantity if it is there"""
+        cart_item = self._add_item(user_id, item_data.variant_id, item_data.quantity)
         self.db.commit()
-        self.db.refresh(cart_item)
-        
         return cart_item
     
     def update_cart_item(self, user_id: int, item_id: int, item_data: CartItemUpdate) -> CartItem:
         """Update the quantity of a cart item"""
-        # Get user's cart
-        cart = self.get_user_cart(user_id)
-        
-        # Find the cart item
-        cart_item = self.db.query(CartItem).filter(
-            CartItem.id == item_id,
-            CartItem.cart_id == cart.id
-        ).first()
+        cart_item = self._update_item(user_id, item_id, item_data.quantity)
+        self.db.commit()
+        return cart_item
+    
+    def remove_from_cart(self, user_id: int, item_id: int) -> bool:
+        """Remove an item from the cart"""
+        self._remove_item(user_id, item_id)
+        self.db.commit()
+        return True
+    
+    def apply_operations(self, user_id: int, operations: List[CartOperation]) -> None:
+        """
+        Apply add, update and remove operations in order, in one transaction
         
-        if not cart_item:
+        Either every operation is applied or, if one fails, none is; the
+        error names the failing operation by its index.
+        """
+        if len(operations) > MAX_CART_OPERATIONS:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Cart item not found"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {MAX_CART_OPERATIONS} cart operations can be applied at once"
             )
         
-        # Update quantity
-        cart_item.quantity = item_data.quantity
+        for index, operation in enumerate(operations):
+            try:
+                if operation.op == "add":
+                    self._add_item(user_id, operation.variant_id, operation.quantity)
+                elif operation.op == "update":
+                    self._update_item(user_id, operation.item_id, operation.quantity)
+                else:
+                    self._remove_item(user_id, operation.item_id)
+            except HTTPException as exc:
+                self.db.rollback()
+                raise HTTPException(
+                    status_code=exc.status_code,
+                    detail=f"operations[{index}]: {exc.detail}"
+                ) from None
         
-        self.db.add(cart_item)
         self.db.commit()
-        self.db.refresh(cart_item)
+    
+    def merge_items(self, user_id: int, items: List[CartItemCreate]) -> int:
+        """Merge guest cart items into the user's cart; returns how many items were merged"""
+        if len(items) > MAX_CART_OPERATIONS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {MAX_CART_OPERATIONS} cart items can be merged at once"
+            )
+        if not items:
+            return 0
         
-        return cart_item
+        merged = self.db.execute(text(MERGE_CART), {
+            "user_id": user_id,
+            "variant_ids": [item.variant_id for item in items],
+            "quantities": [item.quantity for item in items]
+        }).all()
+        self.db.commit()
+        return len(merged)
     
-    def remove_from_cart(self, user_id: int, item_id: int) -> bool:
-        """Remove an item from the cart"""
-        # Get user's cart
-        cart = self.get_user_cart(user_id)
+    def _add_item(self, user_id: int, variant_id: int, quantity: int) -> CartItem:
+        row = self.db.execute(text(ADD_TO_CART), {
+            "user_id": user_id,
+            "variant_id": variant_id,
+            "quantity": quantity
+        }).first()
         
-        # Find the cart item
-        cart_item = self.db.query(CartItem).filter(
-            CartItem.id == item_id,
-            CartItem.cart_id == cart.id
-        ).first()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product variant not found or is not active"
+            )
+        
+        return CartItem(id=row.id, cart_id=row.cart_id, variant_id=row.variant_id, quantity=row.quantity)
+    
+    def _update_item(self, user_id: int, item_id: int, quantity: int) -> CartItem:
+        row = self.db.execute(text(UPDATE_CART_ITEM), {
+            "user_id": user_id,
+            "item_id": item_id,
+            "quantity": quantity
+        }).first()
         
-        if not cart_item:
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Cart item not found"
             )
         
-        # Delete the cart item
-        self.db.delete(cart_item)
-        self.db.commit()
+        return CartItem(id=row.id, cart_id=row.cart_id, variant_id=row.variant_id, quantity=row.quantity)
+    
+    def _remove_item(self, user_id: int, item_id: int) -> None:
+        removed = self.db.execute(text(REMOVE_CART_ITEM), {
+            "user_id": user_id,
+            "item_id": item_id
+        }).first()
         
-        return True
+        if not removed:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cart item not found"
+            )
     
     def clear_cart(self, user_id: int) -> bool:
         """Remove all items from a user's cart"""
@@ -130,8 +210,10 @@ class CartService:
         
         return True
     
-    def get_cart_with_details(self, user_id: int) -> Dict[str, Any]:
-        """Get cart with product details and calculated totals"""
+    def get_cart_with_details(self, user_id: int, coupon_code: Optional[str] = None) -> Dict[str, Any]:
+        """Get cart with product details and calculated totals, less the coupon if one is given"""
+        coupon = PricingService(self.db).get_coupon(coupon_code) if coupon_code else None
+        
         # Get user's cart
         cart = self.get_user_cart(user_id)
         
@@ -141,6 +223,7 @@ class CartService:
                 CartItem,
                 ProductVariant.price,
                 ProductVariant.variant_name,
+                Product.discount_percent,
                 Product.name.label("product_name"),
                 Product.slug.label("product_slug"),
                 ProductImage.image_url
@@ -156,16 +239,8 @@ class CartService:
             .all()
         )
         
-        # Calculate total items and subtotal
-        total_items = 0
-        subtotal = 0.0
-        
         cart_items = []
-        for item, price, variant_name, product_name, product_slug, image_url in cart_items_query:
-            total_items += item.quantity
-            item_subtotal = price * item.quantity
-            subtotal += item_subtotal
-            
+        for item, price, variant_name, discount_percent, product_name, product_slug, image_url in cart_items_query:
             # Create a dict with all the item details
             cart_item_dict = {
                 "id": item.id,
@@ -173,6 +248,7 @@ class CartService:
                 "variant_id": item.variant_id,
                 "quantity": item.quantity,
                 "price": price,
+                "discount_percent": discount_percent,
                 "variant_name": variant_name,
                 "product_name": product_name,
                 "product_slug": product_slug,
@@ -188,8 +264,7 @@ class CartService:
             "created_at": cart.created_at,
             "updated_at": cart.updated_at,
             "items": cart_items,
-            "total_items": total_items,
-            "subtotal": round(subtotal, 2)
+            **price_cart(cart_items, coupon)
         }
         
         return cart_response
\ No newline at end of file
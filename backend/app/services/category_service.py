@@ -4,8 +4,16 @@ from fastapi import Depends, HTTPException, status
 from slugify import slugify
 
 from app.database import get_db
-from app.models.category import Category
-from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.models.category import Category, CategoryClosure, CategoryProductCount
+from app.models.product import Product
+from app.schemas.category import CategoryCreate, CategoryUpdate, Category as CategorySchema
+from app.core.cache import TieredCache
+from app.services.category_tree import CategoryTree, get_category_tree
+from app.services.suggest_service import suggest_index
+from app.services.product_service import product_cache
+
+# Serialized categories by id, plus "slug:<slug>" -> id
+category_cache = TieredCache("category", maxsize=1024)
 
 
 class CategoryService:
@@ -16,9 +24,21 @@ class CategoryService:
         """Get all categories with optional pagination"""
         return self.db.query(Category).offset(skip).limit(limit).all()
     
-    def get_categories_tree(self) -> List[Category]:
-        """Get all root categories with their subcategories"""
-        return self.db.query(Category).filter(Category.parent_id.is_(None)).all()
+    def get_categories_tree(self) -> CategoryTree:
+        """Snapshot of the whole category hierarchy, built from one query"""
+        return get_category_tree(self.db)
+    
+    def get_breadcrumbs(self, slug: str) -> List[Dict[str, Any]]:
+        """The category with this slug and its ancestors, root first"""
+        tree = get_category_tree(self.db)
+        node = tree.get_by_slug(slug)
+        if node is None:
+            raise HTTPException(status_code=404, detail="Category not found")
+        return [ancestor.public() for ancestor in tree.ancestors(node.id)]
+    
+    def get_product_counts(self) -> List[CategoryProductCount]:
+        """Maintained product counts of every category, direct and including subcategories"""
+        return self.db.query(CategoryProductCount).order_by(CategoryProductCount.category_id).all()
     
     def get_category_by_id(self, category_id: int) -> Optional[Category]:
         """Get a category by its ID"""
@@ -34,6 +54,27 @@ class CategoryService:
             raise HTTPException(status_code=404, detail="Category not found")
         return category
     
+    def get_category_detail(self, category_id: int) -> Dict[str, Any]:
+        """Serialized category by ID, served from the category cache"""
+        return category_cache.get_or_load(
+            category_id, lambda: self._detail(self.get_category_by_id(category_id))
+        )
+    
+    def get_category_detail_by_slug(self, slug: str) -> Dict[str, Any]:
+        """Serialized category by slug, served from the category cache"""
+        category_id = category_cache.get(f"slug:{slug}")
+        if category_id is not None:
+            return self.get_category_detail(category_id)
+        
+        detail = self._detail(self.get_category_by_slug(slug))
+        category_cache.set(detail["id"], detail)
+        category_cache.set(f"slug:{slug}", detail["id"])
+        return detail
+    
+    @staticmethod
+    def _detail(category: Category) -> Dict[str, Any]:
+        return CategorySchema.model_validate(category, from_attributes=True).model_dump()
+    
     def create_category(self, category_data: CategoryCreate) -> Category:
         """Create a new category"""
         # Check for duplicate slug
@@ -50,6 +91,7 @@ class CategoryService:
         self.db.add(db_category)
         self.db.commit()
         self.db.refresh(db_category)
+        suggest_index.upsert_category(db_category)
         
         return db_category
     
@@ -66,7 +108,20 @@ class CategoryService:
                     detail="A category with this slug already exists"
                 )
         
+        # A category cannot move under itself or anything in its subtree
+        if category_data.parent_id is not None and category_data.parent_id != db_category.parent_id:
+            in_subtree = self.db.query(CategoryClosure).filter(
+                CategoryClosure.ancestor_id == category_id,
+                CategoryClosure.descendant_id == category_data.parent_id
+            ).first()
+            if in_subtree:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="A category cannot be moved under itself or one of its subcategories"
+                )
+        
         # Update fields
+        old_slug = db_category.slug
         update_data = category_data.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_category, key, value)
@@ -74,6 +129,8 @@ class CategoryService:
         self.db.add(db_category)
         self.db.commit()
         self.db.refresh(db_category)
+        category_cache.evict(category_id, f"slug:{old_slug}", f"slug:{db_category.slug}")
+        suggest_index.upsert_category(db_category)
         
         return db_category
     
@@ -89,8 +146,15 @@ class CategoryService:
                 detail="Cannot delete a category with subcategories"
             )
         
+        # Products in the category are detached from it, so their cached copies change too
+        slug = db_category.slug
+        product_ids = [product_id for product_id, in self.db.query(Product.id).filter(Product.category_id == category_id)]
         self.db.delete(db_category)
         self.db.commit()
+        category_cache.evict(category_id, f"slug:{slug}")
+        if product_ids:
+            product_cache.evict(*product_ids)
+        suggest_index.remove_category(category_id)
         
         return True
     
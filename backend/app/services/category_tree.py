@@ -0,0 +1,141 @@
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.catalog_version import get_version, CATEGORIES
+from app.core.serialization import dumps
+from app.models.category import Category
+
+
+class CategoryNode(NamedTuple):
+    id: int
+    name: str
+    slug: str
+    parent_id: Optional[int]
+    description: Optional[str]
+    created_at: Any
+    depth: int
+    children: Tuple[int, ...]
+
+    def public(self) -> Dict[str, Any]:
+        """Fields of the Category schema"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "slug": self.slug,
+            "parent_id": self.parent_id,
+            "description": self.description,
+            "created_at": self.created_at,
+        }
+
+
+class CategoryTree:
+    """
+    Read-only snapshot of the whole category hierarchy
+
+    Built from a single SELECT over categories; parent links are resolved
+    in memory. Nodes are tuples and the lookups are read-only mappings, so
+    one snapshot can be shared by every request of a worker. The nested
+    tree is also pre-encoded as JSON since it is served as is.
+    """
+
+    def __init__(self, rows: List[Tuple], version: Optional[int] = None):
+        self.version = version
+
+        children: Dict[Optional[int], List[int]] = {}
+        ids = {row[0] for row in rows}
+        for row in rows:
+            parent_id = row[3] if row[3] in ids else None
+            children.setdefault(parent_id, []).append(row[0])
+
+        nodes: Dict[int, CategoryNode] = {}
+        by_id = {row[0]: row for row in rows}
+        # Walk from the roots so every node knows its depth
+        stack = [(category_id, 0) for category_id in reversed(children.get(None, []))]
+        while stack:
+            category_id, depth = stack.pop()
+            row = by_id[category_id]
+            kids = tuple(children.get(category_id, ()))
+            nodes[category_id] = CategoryNode(*row[:6], depth=depth, children=kids)
+            stack.extend((child_id, depth + 1) for child_id in reversed(kids))
+
+        self.roots: Tuple[int, ...] = tuple(children.get(None, ()))
+        self.nodes: Mapping[int, CategoryNode] = MappingProxyType(nodes)
+        self.by_slug: Mapping[str, int] = MappingProxyType({node.slug: node.id for node in nodes.values()})
+        self.tree_json: str = dumps([self._nested(category_id) for category_id in self.roots])
+
+    @classmethod
+    def load(cls, db: Session, version: Optional[int] = None) -> "CategoryTree":
+        rows = db.query(
+            Category.id,
+            Category.name,
+            Category.slug,
+            Category.parent_id,
+            Category.description,
+            Category.created_at,
+        ).order_by(Category.id).all()
+        return cls([tuple(row) for row in rows], version)
+
+    def _nested(self, category_id: int) -> Dict[str, Any]:
+        node = self.nodes[category_id]
+        item = node.public()
+        item["subcategories"] = [self._nested(child_id) for child_id in node.children]
+        return item
+
+    def get(self, category_id: int) -> Optional[CategoryNode]:
+        return self.nodes.get(category_id)
+
+    def get_by_slug(self, slug: str) -> Optional[CategoryNode]:
+        category_id = self.by_slug.get(slug)
+        return self.nodes[category_id] if category_id is not None else None
+
+    def ancestors(self, category_id: int) -> List[CategoryNode]:
+        """The category and its ancestors, root first"""
+        path = []
+        node = self.nodes.get(category_id)
+        while node is not None:
+            path.append(node)
+            node = self.nodes.get(node.parent_id) if node.parent_id is not None else None
+        path.reverse()
+        return path
+
+    def descendant_ids(self, category_id: int) -> List[int]:
+        """The category and everything below it, in depth-first order"""
+        if category_id not in self.nodes:
+            return []
+        result = []
+        stack = [category_id]
+        while stack:
+            current = stack.pop()
+            result.append(current)
+            stack.extend(reversed(self.nodes[current].children))
+        return result
+
+
+_snapshot: Optional[CategoryTree] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_category_tree(db: Session) -> CategoryTree:
+    """
+    Current category snapshot of this worker
+
+    Rebuilt when the categories version has moved on since it was built,
+    which create, update and delete do on commit. Without a version (Redis
+    down) a fresh snapshot is built and not kept.
+    """
+    global _snapshot
+    version = get_version(CATEGORIES)
+    if version is None:
+        return CategoryTree.load(db)
+
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = CategoryTree.load(db, version)
+        return _snapshot
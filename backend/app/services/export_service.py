@@ -0,0 +1,150 @@
+import csv
+import io
+import os
+import zlib
+from typing import Iterator
+
+from fastapi import Depends
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.import_service import CSV_PRODUCT_FIELDS, CSV_VARIANT_FIELDS, IMAGE_SEPARATOR
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "2000"))
+
+# Characters collected before a chunk is encoded, compressed and yielded
+EXPORT_CHUNK_SIZE = 256 * 1024
+
+# Same columns the importer reads, so an export can be imported again
+CSV_COLUMNS = tuple(field for field in CSV_PRODUCT_FIELDS if field != "category_id") + CSV_VARIANT_FIELDS + ("images",)
+
+# One row per variant (or per product without variants), products in id
+# order; image URLs are aggregated once per product. Values arrive as text
+# where Python would only convert them back.
+CSV_QUERY = f"""
+SELECT p.id, p.slug, p.name, p.description, c.slug, p.brand, p.base_price::text, p.discount_percent::text,
+       p.is_active, p.is_featured, p.product_metadata::text,
+       v.sku, v.variant_name, v.price::text, v.stock_qty, v.attributes::text, v.is_active,
+       i.images
+FROM products p
+LEFT JOIN categories c ON c.id = p.category_id
+LEFT JOIN LATERAL (
+    SELECT string_agg(image_url, '{IMAGE_SEPARATOR}' ORDER BY "order", id) AS images
+    FROM product_images
+    WHERE product_id = p.id
+) i ON true
+LEFT JOIN product_variants v ON v.product_id = p.id
+ORDER BY p.id, v.id
+"""
+
+# One JSON document per product, built by Postgres in the importer's shape
+NDJSON_QUERY = """
+SELECT json_build_object(
+    'slug', p.slug,
+    'name', p.name,
+    'description', p.description,
+    'category', c.slug,
+    'brand', p.brand,
+    'base_price', p.base_price,
+    'discount_percent', p.discount_percent,
+    'is_active', p.is_active,
+    'is_featured', p.is_featured,
+    'product_metadata', p.product_metadata,
+    'variants', coalesce((
+        SELECT json_agg(json_build_object(
+            'sku', v.sku,
+            'variant_name', v.variant_name,
+            'price', v.price,
+            'stock_qty', v.stock_qty,
+            'attributes', v.attributes,
+            'is_active', v.is_active
+        ) ORDER BY v.id)
+        FROM product_variants v
+        WHERE v.product_id = p.id
+    ), '[]'),
+    'images', coalesce((
+        SELECT json_agg(json_build_object(
+            'image_url', i.image_url,
+            'alt_text', i.alt_text,
+            'is_primary', i.is_primary,
+            'order', i."order"
+        ) ORDER BY i."order", i.id)
+        FROM product_images i
+        WHERE i.product_id = p.id
+    ), '[]')
+)::text
+FROM products p
+LEFT JOIN categories c ON c.id = p.category_id
+ORDER BY p.id
+"""
+
+
+class CatalogExportService:
+    """
+    Streams the whole catalog as CSV or NDJSON, optionally gzip-compressed
+
+    Rows come from a server-side cursor a few thousand at a time and are
+    written out in fixed-size chunks, so memory use does not grow with the
+    catalog. The output can be fed back to the catalog importer.
+    """
+
+    def __init__(self, db: Session = Depends(get_db)):
+        self.db = db
+
+    def export(self, file_format: str = "csv", compress: bool = True) -> Iterator[bytes]:
+        """Chunks of the export in `file_format` ("csv" or "ndjson")"""
+        if file_format not in ("csv", "ndjson"):
+            raise ValueError(f"Unsupported export format: {file_format}")
+        text_chunks = self._csv() if file_format == "csv" else self._ndjson()
+        chunks = (chunk.encode() for chunk in text_chunks if chunk)
+        return self._gzip(chunks) if compress else chunks
+
+    def _rows(self, query: str) -> Iterator[tuple]:
+        # A connection of its own: a streamed response outlives the request's session
+        with self.db.get_bind().connect() as connection:
+            result = connection.execution_options(yield_per=EXPORT_FETCH_SIZE).execute(text(query))
+            for row in result:
+                yield row
+
+    def _csv(self) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_COLUMNS)
+        previous_id = None
+        for row in self._rows(CSV_QUERY):
+            values = list(row[1:])
+            # Images go with the first row of each product only
+            if row[0] == previous_id:
+                values[-1] = None
+            previous_id = row[0]
+            writer.writerow(values)
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def _ndjson(self) -> Iterator[str]:
+        lines = []
+        size = 0
+        for document, in self._rows(NDJSON_QUERY):
+            lines.append(document)
+            size += len(document) + 1
+            if size >= EXPORT_CHUNK_SIZE:
+                lines.append("")
+                yield "\n".join(lines)
+                lines, size = [], 0
+        if lines:
+            lines.append("")
+            yield "\n".join(lines)
+
+    @staticmethod
+    def _gzip(chunks: Iterator[bytes], level: int = 6) -> Iterator[bytes]:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
@@ -0,0 +1,227 @@
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import redis
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.auth import SECRET_KEY
+from app.core.redis import get_redis
+from app.database import get_db
+from app.schemas.cart import CartItemCreate
+from app.services.cart_service import CartService, MAX_CART_OPERATIONS
+from app.services.pricing_service import PricingService, price_cart
+
+logger = logging.getLogger(__name__)
+
+GUEST_CART_COOKIE = os.getenv("GUEST_CART_COOKIE", "guest_cart")
+# A guest cart is dropped after this long without changes; each change extends it
+GUEST_CART_TTL = int(os.getenv("GUEST_CART_TTL", str(7 * 24 * 3600)))
+GUEST_CART_COOKIE_SECURE = os.getenv("GUEST_CART_COOKIE_SECURE", "false").lower() == "true"
+
+VARIANT_IS_ACTIVE = text("SELECT 1 FROM product_variants WHERE id = :id AND is_active")
+
+# Price and stock of every variant in a guest cart, in one query
+GUEST_CART_DETAILS = text("""
+SELECT
+    product_variants.id,
+    product_variants.price,
+    product_variants.variant_name,
+    product_variants.stock_qty,
+    products.discount_percent,
+    products.name AS product_name,
+    products.slug AS product_slug,
+    (
+        SELECT image_url FROM product_images
+        WHERE product_images.product_id = products.id AND product_images.is_primary
+        LIMIT 1
+    ) AS image_url
+FROM product_variants
+JOIN products ON products.id = product_variants.product_id
+WHERE product_variants.id = ANY(:ids) AND product_variants.is_active
+""")
+
+
+def _signature(token: str) -> str:
+    return hmac.new(SECRET_KEY.encode(), f"guest_cart:{token}".encode(), hashlib.sha256).hexdigest()
+
+
+def _cart_key(token: str) -> str:
+    return f"guest_cart:{token}"
+
+
+@contextmanager
+def _guest_cart_storage():
+    try:
+        yield
+    except redis.RedisError:
+        logger.warning("Guest cart storage failed", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Guest carts are temporarily unavailable"
+        )
+
+
+class GuestCartService:
+    """
+    Carts of shoppers who are not logged in, kept in Redis
+
+    A guest cart is a Redis hash of variant id -> quantity under a random
+    token, which the browser holds in a signed cookie; it expires
+    GUEST_CART_TTL after its last change. Guest carts never write to
+    Postgres: they are merged into the shopper's cart in one statement when
+    they log in, or start checkout logged in. Reading one looks up the
+    prices and stock of its variants in a single query (plus the coupon's,
+    when it is not cached).
+    """
+
+    def __init__(self, request: Request, db: Session = Depends(get_db)):
+        self.db = db
+        self.redis = get_redis()
+        self.token = self._verified_token(request.cookies.get(GUEST_CART_COOKIE))
+
+    def get_cart(self, coupon_code: Optional[str] = None) -> Dict[str, Any]:
+        """The guest cart with current prices and stock, less the coupon if given; unavailable variants are left out"""
+        coupon = PricingService(self.db).get_coupon(coupon_code) if coupon_code else None
+        with _guest_cart_storage():
+            quantities = self._quantities()
+
+        items = []
+        if quantities:
+            rows = self.db.execute(GUEST_CART_DETAILS, {"ids": list(quantities)}).all()
+            for row in sorted(rows, key=lambda row: row.id):
+                items.append({
+                    "variant_id": row.id,
+                    "quantity": quantities[row.id],
+                    "price": row.price,
+                    "discount_percent": row.discount_percent,
+                    "variant_name": row.variant_name,
+                    "product_name": row.product_name,
+                    "product_slug": row.product_slug,
+                    "image_url": row.image_url,
+                    "in_stock": row.stock_qty >= quantities[row.id],
+                })
+
+        return {"items": items, **price_cart(items, coupon)}
+
+    def add_item(self, item_data: CartItemCreate, response: Response) -> int:
+        """Add a variant to the guest cart, starting one if needed; returns its new quantity"""
+        if self.db.execute(VARIANT_IS_ACTIVE, {"id": item_data.variant_id}).first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product variant not found or is not active"
+            )
+
+        token = self.token or secrets.token_urlsafe(16)
+        key = _cart_key(token)
+        with _guest_cart_storage():
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hget(key, item_data.variant_id)
+                pipe.hlen(key)
+                current, item_count = pipe.execute()
+            if current is None and item_count >= MAX_CART_OPERATIONS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"A guest cart can hold at most {MAX_CART_OPERATIONS} items"
+                )
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hincrby(key, item_data.variant_id, item_data.quantity)
+                pipe.expire(key, GUEST_CART_TTL)
+                quantity, _ = pipe.execute()
+
+        self._set_cookie(response, token)
+        return quantity
+
+    def update_item(self, variant_id: int, quantity: int, response: Response) -> None:
+        """Set the quantity of a variant in the guest cart"""
+        with _guest_cart_storage():
+            key = self._existing_key(variant_id)
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hset(key, variant_id, quantity)
+                pipe.expire(key, GUEST_CART_TTL)
+                pipe.execute()
+        self._set_cookie(response, self.token)
+
+    def remove_item(self, variant_id: int, response: Response) -> None:
+        """Remove a variant from the guest cart"""
+        with _guest_cart_storage():
+            key = self._existing_key(variant_id)
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hdel(key, variant_id)
+                pipe.expire(key, GUEST_CART_TTL)
+                pipe.execute()
+        self._set_cookie(response, self.token)
+
+    def clear(self, response: Response) -> None:
+        """Drop the guest cart"""
+        if self.token is not None:
+            with _guest_cart_storage():
+                self.redis.delete(_cart_key(self.token))
+        response.delete_cookie(GUEST_CART_COOKIE)
+
+    def persist(self, user_id: int, response: Response) -> int:
+        """
+        Merge the guest cart into a user's cart and drop it
+
+        Returns how many items were merged. Never fails on Redis errors, as
+        it runs during login: the guest cart is then kept for a later try.
+        """
+        if self.token is None:
+            return 0
+        key = _cart_key(self.token)
+        try:
+            quantities = self._quantities()
+        except redis.RedisError:
+            logger.warning("Could not read guest cart for user %s", user_id, exc_info=True)
+            return 0
+
+        items = [CartItemCreate(variant_id=variant_id, quantity=quantity)
+                 for variant_id, quantity in quantities.items()]
+        merged = CartService(self.db).merge_items(user_id, items[:MAX_CART_OPERATIONS])
+        try:
+            self.redis.delete(key)
+        except redis.RedisError:
+            logger.warning("Could not drop merged guest cart of user %s", user_id, exc_info=True)
+        response.delete_cookie(GUEST_CART_COOKIE)
+        self.token = None
+        return merged
+
+    def _quantities(self) -> Dict[int, int]:
+        if self.token is None:
+            return {}
+        fields = self.redis.hgetall(_cart_key(self.token))
+        return {int(variant_id): int(quantity) for variant_id, quantity in fields.items()}
+
+    def _existing_key(self, variant_id: int) -> str:
+        """Key of the guest cart, which must hold the variant"""
+        if self.token is None or self.redis.hget(_cart_key(self.token), variant_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cart item not found"
+            )
+        return _cart_key(self.token)
+
+    def _set_cookie(self, response: Response, token: str) -> None:
+        self.token = token
+        response.set_cookie(
+            GUEST_CART_COOKIE,
+            f"{token}.{_signature(token)}",
+            max_age=GUEST_CART_TTL,
+            httponly=True,
+            samesite="lax",
+            secure=GUEST_CART_COOKIE_SECURE,
+        )
+
+    @staticmethod
+    def _verified_token(cookie: Optional[str]) -> Optional[str]:
+        """The token of a guest cart cookie, or None when it is missing or forged"""
+        token, _, signature = (cookie or "").partition(".")
+        if token and hmac.compare_digest(signature, _signature(token)):
+            return token
+        return None
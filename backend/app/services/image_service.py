@@ -0,0 +1,237 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Depends, HTTPException, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.database import get_db, SessionLocal
+from app.models.product import Product, ProductImage
+from app.core.storage import get_storage
+from app.services.product_service import product_cache
+
+logger = logging.getLogger(__name__)
+
+# Widths (px) every upload is rendered at, in each derivative format. Images
+# narrower than a width get their own size under that width's name, so every
+# width exists for every image.
+IMAGE_WIDTHS = tuple(int(width) for width in os.getenv("IMAGE_WIDTHS", "320,640,960,1280,1920").split(","))
+
+# Derivative formats as name -> (Pillow format, file extension, content type, save options)
+DERIVATIVE_FORMATS = {
+    "webp": ("WEBP", "webp", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+# Accepted uploads as Pillow format -> (file extension, content type)
+UPLOAD_FORMATS = {
+    "JPEG": ("jpg", "image/jpeg"),
+    "PNG": ("png", "image/png"),
+    "WEBP": ("webp", "image/webp"),
+}
+
+EXIF_ORIENTATION = 0x0112
+
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(20 * 1024 * 1024)))
+
+# Processes rendering derivatives, shared by all requests of a worker
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+
+def media_key(content_hash: str, name: str) -> str:
+    """Storage key of one file of an image, e.g. "images/3f/3f9a.../640.webp" """
+    return f"images/{content_hash[:2]}/{content_hash}/{name}"
+
+
+def render_derivatives(content_hash: str, data: bytes, widths: Tuple[int, ...] = IMAGE_WIDTHS) -> List[Dict[str, Any]]:
+    """
+    Resize an original to every width and format and store the results
+
+    Runs in the image process pool, so decoding, resampling, encoding and
+    uploading all stay out of the web process. Returns the derivatives as
+    stored on ProductImage.derivatives.
+    """
+    storage = get_storage()
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+
+    derivatives = []
+    encoded: Dict[int, Dict[str, bytes]] = {}
+    for width in sorted(widths, reverse=True):
+        target = min(width, image.width)
+        if target not in encoded:
+            height = max(1, round(image.height * target / image.width))
+            resized = image if target == image.width else image.resize(
+                (target, height), Image.Resampling.LANCZOS, reducing_gap=3.0
+            )
+            encoded[target] = {name: _encode(resized, name) for name in DERIVATIVE_FORMATS}
+        for name, body in encoded[target].items():
+            _, extension, content_type, _ = DERIVATIVE_FORMATS[name]
+            key = media_key(content_hash, f"{width}.{extension}")
+            storage.save(key, body, content_type)
+            derivatives.append({"width": width, "format": name, "url": storage.url(key)})
+    derivatives.sort(key=lambda derivative: (derivative["format"], derivative["width"]))
+    return derivatives
+
+
+def _encode(image: Image.Image, name: str) -> bytes:
+    pillow_format, _, _, options = DERIVATIVE_FORMATS[name]
+    if pillow_format == "JPEG" and image.mode == "RGBA":
+        # JPEG has no alpha channel; flatten onto white
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, pillow_format, **options)
+    return buffer.getvalue()
+
+
+def save_derivatives(db: Session, content_hash: str, derivatives: List[Dict[str, Any]]) -> None:
+    """Attach derivatives to every image of this content and drop the affected cached products"""
+    product_ids = db.execute(
+        update(ProductImage)
+        .where(ProductImage.content_hash == content_hash)
+        .values(derivatives=derivatives)
+        .returning(ProductImage.product_id)
+    ).scalars().all()
+    db.commit()
+    if product_ids:
+        product_cache.evict(*set(product_ids))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Spawned rather than forked: the web process has threads and open connections
+                _pool = ProcessPoolExecutor(
+                    max_workers=IMAGE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def _derivatives_rendered(content_hash: str, future: Future) -> None:
+    try:
+        derivatives = future.result()
+    except Exception:
+        logger.exception("Rendering derivatives of image %s failed", content_hash)
+        return
+    db = SessionLocal()
+    try:
+        save_derivatives(db, content_hash, derivatives)
+    except Exception:
+        logger.exception("Saving derivatives of image %s failed", content_hash)
+    finally:
+        db.close()
+
+
+def schedule_derivatives(content_hash: str, data: bytes) -> Future:
+    """Render derivatives in the process pool; the images are updated when they are done"""
+    future = _get_pool().submit(render_derivatives, content_hash, data)
+    future.add_done_callback(partial(_derivatives_rendered, content_hash))
+    return future
+
+
+class ImageService:
+    """
+    Stores uploaded product images and their resized derivatives
+
+    Originals are stored under their SHA-256, so the same file is kept once
+    however often it is uploaded, and every URL can be cached forever.
+    Derivatives at IMAGE_WIDTHS in WebP and JPEG are rendered in a process
+    pool after the upload has been answered.
+    """
+
+    def __init__(self, db: Session = Depends(get_db)):
+        self.db = db
+        self.storage = get_storage()
+
+    def upload_product_image(
+        self,
+        product_id: int,
+        data: bytes,
+        alt_text: Optional[str] = None,
+        is_primary: bool = False,
+        order: int = 0,
+    ) -> ProductImage:
+        """Store an uploaded original and add it to a product"""
+        if self.db.query(Product.id).filter(Product.id == product_id).first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        if len(data) > MAX_IMAGE_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Images can be at most {MAX_IMAGE_BYTES // (1024 * 1024)} MB"
+            )
+        pillow_format, width, height = self._inspect(data)
+        extension, content_type = UPLOAD_FORMATS[pillow_format]
+
+        content_hash = hashlib.sha256(data).hexdigest()
+        key = media_key(content_hash, f"original.{extension}")
+        if not self.storage.exists(key):
+            self.storage.save(key, data, content_type)
+        # Content uploaded before already has its derivatives
+        derivatives = self.db.query(ProductImage.derivatives).filter(
+            ProductImage.content_hash == content_hash,
+            ProductImage.derivatives.isnot(None)
+        ).limit(1).scalar()
+
+        if is_primary:
+            self.db.query(ProductImage).filter(
+                ProductImage.product_id == product_id,
+                ProductImage.is_primary == True
+            ).update({"is_primary": False})
+        db_image = ProductImage(
+            product_id=product_id,
+            image_url=self.storage.url(key),
+            alt_text=alt_text,
+            is_primary=is_primary,
+            order=order,
+            content_hash=content_hash,
+            width=width,
+            height=height,
+            derivatives=derivatives,
+        )
+        self.db.add(db_image)
+        self.db.commit()
+        self.db.refresh(db_image)
+        product_cache.evict(product_id)
+
+        if derivatives is None:
+            schedule_derivatives(content_hash, data)
+        return db_image
+
+    @staticmethod
+    def _inspect(data: bytes) -> Tuple[str, int, int]:
+        """Format and size of an upload, read from its header without decoding it"""
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                pillow_format, (width, height) = image.format, image.size
+                # EXIF orientations 5-8 are displayed rotated by 90 degrees
+                if image.getexif().get(EXIF_ORIENTATION, 1) > 4:
+                    width, height = height, width
+        except (UnidentifiedImageError, Image.DecompressionBombError):
+            pillow_format = None
+        if pillow_format not in UPLOAD_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Upload a JPEG, PNG or WebP image"
+            )
+        return pillow_format, width, height
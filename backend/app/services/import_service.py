@@ -0,0 +1,802 @@
+import csv
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from operator import itemgetter
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Set, Tuple
+
+import psycopg2
+from fastapi import Depends
+from slugify import slugify
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.product import Product, ProductVariant, ProductImage
+from app.core.catalog_version import bump_version, CATALOG
+from app.services.product_service import product_cache
+from app.services.suggest_service import suggest_index
+
+logger = logging.getLogger(__name__)
+
+# Variant rows (or variant-less products) staged and committed together
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+
+# Errors kept in the report; the count covers all of them
+MAX_REPORTED_ERRORS = 1000
+
+# "-1" .. "-N" suffixes probed in one query when a slug is taken
+SLUG_PROBE_SIZE = 20
+
+# Columns of a CSV row that describe the product; all rows of a product
+# repeat (or leave empty) these and add one variant each
+CSV_PRODUCT_FIELDS = (
+    "slug", "name", "description", "category_id", "category", "brand", "base_price",
+    "discount_percent", "is_active", "is_featured", "product_metadata",
+)
+CSV_VARIANT_FIELDS = ("sku", "variant_name", "price", "stock_qty", "attributes", "variant_is_active")
+
+# Metadata and variant attribute columns, named like the listing filters
+ATTRIBUTE_PREFIX = "attr."
+VARIANT_ATTRIBUTE_PREFIX = "variant."
+
+# Several image URLs in one CSV cell; the first is the primary image
+IMAGE_SEPARATOR = "|"
+
+STAGING_TABLES = """
+CREATE TEMP TABLE IF NOT EXISTS import_products (
+    key integer PRIMARY KEY,
+    line integer NOT NULL,
+    slug text,
+    slug_base text,
+    name text,
+    description text,
+    category_id integer,
+    category_slug text,
+    brand text,
+    base_price numeric(10, 2),
+    discount_percent numeric(5, 2),
+    is_active boolean,
+    is_featured boolean,
+    product_metadata jsonb,
+    content_hash text,
+    product_id integer,
+    created boolean NOT NULL DEFAULT false
+) ON COMMIT DELETE ROWS;
+CREATE TEMP TABLE IF NOT EXISTS import_variants (
+    product_key integer NOT NULL,
+    line integer NOT NULL,
+    sku text NOT NULL,
+    variant_name text,
+    price numeric(10, 2),
+    stock_qty integer,
+    attributes jsonb,
+    is_active boolean,
+    content_hash text
+) ON COMMIT DELETE ROWS;
+CREATE TEMP TABLE IF NOT EXISTS import_images (
+    product_key integer NOT NULL,
+    line integer NOT NULL,
+    image_url text NOT NULL,
+    alt_text text,
+    is_primary boolean NOT NULL,
+    "order" integer NOT NULL
+) ON COMMIT DELETE ROWS;
+"""
+
+PRODUCT_COLUMNS = (
+    "key", "line", "slug", "slug_base", "name", "description", "category_id", "category_slug",
+    "brand", "base_price", "discount_percent", "is_active", "is_featured", "product_metadata", "content_hash",
+)
+VARIANT_COLUMNS = (
+    "product_key", "line", "sku", "variant_name", "price", "stock_qty", "attributes", "is_active", "content_hash",
+)
+IMAGE_COLUMNS = ("product_key", "line", "image_url", "alt_text", "is_primary", "order")
+JSON_COLUMNS = {"product_metadata", "attributes"}
+
+_PRODUCT_VALUES = itemgetter(*PRODUCT_COLUMNS[1:])
+_VARIANT_VALUES = itemgetter(*VARIANT_COLUMNS[1:])
+_IMAGE_VALUES = itemgetter(*IMAGE_COLUMNS[1:])
+
+# Each check removes the staged rows it rejects and returns them as errors
+REJECT_UNKNOWN_CATEGORIES = """
+DELETE FROM import_products s
+WHERE (s.category_slug IS NOT NULL AND s.category_id IS NULL)
+   OR (s.category_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM categories c WHERE c.id = s.category_id))
+RETURNING s.line, NULL, 'Unknown category ' || coalesce(s.category_slug, s.category_id::text)
+"""
+
+REJECT_INCOMPLETE_PRODUCTS = """
+DELETE FROM import_products s
+WHERE s.product_id IS NULL AND (s.name IS NULL OR s.base_price IS NULL)
+RETURNING s.line, NULL, 'name and base_price are required for new products'
+"""
+
+REJECT_FOREIGN_SKUS = """
+DELETE FROM import_variants iv
+USING import_products s, product_variants pv
+WHERE s.key = iv.product_key AND pv.sku = iv.sku AND pv.product_id IS DISTINCT FROM s.product_id
+RETURNING iv.line, iv.sku, 'SKU belongs to another product (id ' || pv.product_id || ')'
+"""
+
+REJECT_INCOMPLETE_VARIANTS = """
+DELETE FROM import_variants iv
+USING import_products s
+WHERE s.key = iv.product_key AND iv.price IS NULL AND NOT EXISTS (SELECT 1 FROM product_variants pv WHERE pv.sku = iv.sku)
+RETURNING iv.line, iv.sku, 'price is required for new variants'
+"""
+
+# Products are matched by slug, or without one by any SKU they already own
+RESOLVE_BY_SLUG = """
+UPDATE import_products s SET product_id = p.id
+FROM products p
+WHERE s.slug IS NOT NULL AND p.slug = s.slug
+"""
+
+RESOLVE_BY_SKU = """
+UPDATE import_products s SET product_id = owner.product_id
+FROM (
+    SELECT DISTINCT ON (iv.product_key) iv.product_key, pv.product_id
+    FROM import_variants iv
+    JOIN product_variants pv ON pv.sku = iv.sku
+    ORDER BY iv.product_key, pv.product_id
+) owner
+WHERE s.product_id IS NULL AND s.slug IS NULL AND s.key = owner.product_key
+"""
+
+# Empty fields keep the stored value; unchanged rows are not rewritten. Plain
+# imports stage no content hash and keep the one a sync stored.
+UPDATE_PRODUCTS = """
+UPDATE products p
+SET slug = coalesce(s.slug, p.slug),
+    name = coalesce(s.name, p.name),
+    description = coalesce(s.description, p.description),
+    category_id = coalesce(s.category_id, p.category_id),
+    brand = coalesce(s.brand, p.brand),
+    base_price = coalesce(s.base_price, p.base_price),
+    discount_percent = coalesce(s.discount_percent, p.discount_percent),
+    is_active = coalesce(s.is_active, p.is_active),
+    is_featured = coalesce(s.is_featured, p.is_featured),
+    product_metadata = coalesce(s.product_metadata, p.product_metadata),
+    content_hash = coalesce(s.content_hash, p.content_hash),
+    updated_at = now()
+FROM import_products s
+WHERE p.id = s.product_id
+  AND (coalesce(s.slug, p.slug), coalesce(s.name, p.name), coalesce(s.description, p.description),
+       coalesce(s.category_id, p.category_id), coalesce(s.brand, p.brand),
+       coalesce(s.base_price, p.base_price), coalesce(s.discount_percent, p.discount_percent),
+       coalesce(s.is_active, p.is_active), coalesce(s.is_featured, p.is_featured),
+       coalesce(s.product_metadata, p.product_metadata), coalesce(s.content_hash, p.content_hash))
+      IS DISTINCT FROM
+      (p.slug, p.name, p.description, p.category_id, p.brand, p.base_price, p.discount_percent,
+       p.is_active, p.is_featured, p.product_metadata, p.content_hash)
+"""
+
+# A slug taken by a concurrent writer since allocation leaves the row unmatched
+INSERT_PRODUCTS = """
+WITH inserted AS (
+    INSERT INTO products (name, slug, description, category_id, brand, base_price,
+                          discount_percent, is_active, is_featured, product_metadata, content_hash)
+    SELECT name, slug, description, category_id, brand, base_price,
+           coalesce(discount_percent, 0), coalesce(is_active, true), coalesce(is_featured, false),
+           product_metadata, content_hash
+    FROM import_products
+    WHERE product_id IS NULL
+    ORDER BY key
+    ON CONFLICT (slug) DO NOTHING
+    RETURNING id, slug
+)
+UPDATE import_products s SET product_id = inserted.id, created = true
+FROM inserted
+WHERE s.product_id IS NULL AND s.slug = inserted.slug
+"""
+
+REJECT_SLUG_CONFLICTS = """
+DELETE FROM import_products s
+WHERE s.product_id IS NULL
+RETURNING s.line, NULL, 'Slug ' || s.slug || ' was taken while importing'
+"""
+
+# Upserts by SKU. Empty fields keep the stored value, unchanged variants are
+# not rewritten, and every stock change is recorded as an inventory movement.
+UPSERT_VARIANTS = """
+WITH staged AS (
+    SELECT s.product_id, iv.sku,
+           coalesce(iv.variant_name, cur.variant_name) AS variant_name,
+           coalesce(iv.price, cur.price) AS price,
+           coalesce(iv.stock_qty, cur.stock_qty, 0) AS stock_qty,
+           coalesce(iv.attributes, cur.attributes) AS attributes,
+           coalesce(iv.is_active, cur.is_active, true) AS is_active,
+           coalesce(iv.content_hash, cur.content_hash) AS content_hash,
+           cur.stock_qty AS previous_stock
+    FROM import_variants iv
+    JOIN import_products s ON s.key = iv.product_key
+    LEFT JOIN product_variants cur ON cur.sku = iv.sku
+    -- Re-imports mostly repeat what is stored; those rows are not written
+    WHERE cur.id IS NULL
+       OR (coalesce(iv.variant_name, cur.variant_name), coalesce(iv.price, cur.price),
+           coalesce(iv.stock_qty, cur.stock_qty), coalesce(iv.attributes, cur.attributes),
+           coalesce(iv.is_active, cur.is_active), coalesce(iv.content_hash, cur.content_hash))
+          IS DISTINCT FROM
+          (cur.variant_name, cur.price, cur.stock_qty, cur.attributes, cur.is_active, cur.content_hash)
+),
+upserted AS (
+    INSERT INTO product_variants AS pv (product_id, sku, variant_name, price, stock_qty, attributes, is_active, content_hash)
+    SELECT product_id, sku, variant_name, price, stock_qty, attributes, is_active, content_hash
+    FROM staged
+    ORDER BY sku
+    ON CONFLICT (sku) DO UPDATE
+    SET variant_name = EXCLUDED.variant_name,
+        price = EXCLUDED.price,
+        stock_qty = EXCLUDED.stock_qty,
+        attributes = EXCLUDED.attributes,
+        is_active = EXCLUDED.is_active,
+        content_hash = EXCLUDED.content_hash
+    WHERE (pv.variant_name, pv.price, pv.stock_qty, pv.attributes, pv.is_active, pv.content_hash)
+          IS DISTINCT FROM
+          (EXCLUDED.variant_name, EXCLUDED.price, EXCLUDED.stock_qty, EXCLUDED.attributes, EXCLUDED.is_active,
+           EXCLUDED.content_hash)
+    RETURNING pv.id, pv.sku, pv.stock_qty, pv.xmax = 0 AS inserted
+),
+movements AS (
+    INSERT INTO inventory_movements (variant_id, change_qty, reason)
+    SELECT upserted.id, upserted.stock_qty - coalesce(staged.previous_stock, 0), 'import'
+    FROM upserted
+    JOIN staged ON staged.sku = upserted.sku
+    WHERE upserted.stock_qty <> coalesce(staged.previous_stock, 0)
+)
+SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted
+"""
+
+# Images are added by URL; a product keeps at most the one primary image it has
+INSERT_IMAGES = """
+INSERT INTO product_images (product_id, image_url, alt_text, is_primary, "order")
+SELECT DISTINCT ON (s.product_id, ii.image_url)
+       s.product_id, ii.image_url, ii.alt_text,
+       ii.is_primary AND NOT EXISTS (
+           SELECT 1 FROM product_images pi WHERE pi.product_id = s.product_id AND pi.is_primary
+       ),
+       ii."order"
+FROM import_images ii
+JOIN import_products s ON s.key = ii.product_key
+WHERE NOT EXISTS (
+    SELECT 1 FROM product_images pi WHERE pi.product_id = s.product_id AND pi.image_url = ii.image_url
+)
+ORDER BY s.product_id, ii.image_url, ii.line
+"""
+
+
+class ImportRowError(ValueError):
+    """A row (or product) that cannot be imported; the rest of the file continues"""
+
+
+def _column_lengths(*models) -> Dict[str, int]:
+    lengths = {}
+    for model in models:
+        for column in model.__table__.columns:
+            length = getattr(column.type, "length", None)
+            if length:
+                lengths[column.name] = length
+    return lengths
+
+
+# Longest accepted value per string column, checked before staging
+_MAX_LENGTHS = _column_lengths(Product, ProductVariant, ProductImage)
+
+
+def _text(value: Any, field: str) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    limit = _MAX_LENGTHS.get(field)
+    if limit and len(value) > limit:
+        raise ImportRowError(f"{field} is longer than {limit} characters")
+    return value
+
+
+def _decimal(value: Any, field: str, limit: Decimal) -> Optional[Decimal]:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ImportRowError(f"{field} is not a number: {value!r}")
+    # Checked again once rounded: 99999999.995 rounds up to 1e8
+    if number.is_finite() and 0 <= number < limit:
+        number = number.quantize(Decimal("0.01"))
+    if not number.is_finite() or number < 0 or number >= limit:
+        raise ImportRowError(f"{field} must be between 0 and {limit}")
+    return number
+
+
+MAX_PRICE = Decimal("1e8")
+
+# Prices like "1299" or "1299.5", which always fit numeric(10,2), are passed
+# to COPY as written, which skips Decimal parsing per row; anything else is
+# validated by _decimal
+_PLAIN_PRICE = re.compile(r"\d{1,8}(?:\.\d{1,2})?")
+
+
+def _price(value: Any, field: str) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        if _PLAIN_PRICE.fullmatch(value):
+            return value
+    return _decimal(value, field, MAX_PRICE)
+
+
+def _int(value: Any, field: str) -> Optional[int]:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise ImportRowError(f"{field} is not an integer: {value!r}")
+    if not -2 ** 31 <= number < 2 ** 31:
+        raise ImportRowError(f"{field} is out of range")
+    return number
+
+
+_TRUE = {"true", "t", "yes", "y", "1"}
+_FALSE = {"false", "f", "no", "n", "0"}
+
+
+def _bool(value: Any, field: str) -> Optional[bool]:
+    if value is None or isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if not value:
+        return None
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ImportRowError(f"{field} is not a boolean: {value!r}")
+
+
+def _object(value: Any, field: str) -> Optional[Dict[str, Any]]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ImportRowError(f"{field} is not valid JSON")
+    if not isinstance(value, dict):
+        raise ImportRowError(f"{field} must be a JSON object")
+    return value
+
+
+def _prefixed(row: Dict[str, Any], columns: List[str], prefix: str) -> Dict[str, Any]:
+    """Non-empty attribute columns like "attr.fabric" of a CSV row, without the prefix"""
+    values = {}
+    for column in columns:
+        value = row[column]
+        if value and value.strip():
+            values[column[len(prefix):]] = value.strip()
+    return values
+
+
+class CatalogImportService:
+    """
+    Streams a CSV or JSONL catalog file into products, variants and images
+
+    Rows are parsed and validated in Python, then staged batch by batch
+    with COPY into temporary tables and merged with a handful of set-based
+    statements: products are matched by slug or by a SKU they own, new
+    products get slugs allocated in bulk, and variants are upserted by SKU.
+    Every batch commits on its own; rows that cannot be imported are
+    reported with their line number and skipped.
+    """
+
+    def __init__(self, db: Session = Depends(get_db)):
+        self.db = db
+
+    def import_file(
+        self,
+        stream: IO[str],
+        file_format: str = "csv",
+        batch_size: int = IMPORT_BATCH_SIZE,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """Import a text stream of `file_format` ("csv" or "jsonl"); returns the report"""
+        records = self.parse_file(stream, file_format)
+        started = time.monotonic()
+
+        def report_progress():
+            self._report["seconds"] = round(time.monotonic() - started, 3)
+            if progress:
+                progress(self._report)
+
+        # The next batch is parsed while the database merges the previous one
+        with ThreadPoolExecutor(max_workers=1) as merger:
+            merging = None
+            batch: List[Dict[str, Any]] = []
+            staged_rows = 0
+            for record in records:
+                batch.append(record)
+                staged_rows += max(len(record["variants"]), 1)
+                if staged_rows >= batch_size:
+                    if merging is not None:
+                        merging.result()
+                        report_progress()
+                    merging = merger.submit(self._import_batch, batch)
+                    batch, staged_rows = [], 0
+            if merging is not None:
+                merging.result()
+            if batch:
+                self._import_batch(batch)
+
+        report_progress()
+        # Searches rebuild the suggestion index rather than replaying every row
+        if self._report["products_created"] or self._report["products_updated"]:
+            suggest_index.invalidate()
+        return self._report
+
+    def parse_file(self, stream: IO[str], file_format: str = "csv") -> Iterator[Dict[str, Any]]:
+        """
+        Parsed product records of a text stream, each with its variants and images
+
+        Starts a new report: rows that fail validation are recorded in it
+        instead of being yielded. Does not touch the database.
+        """
+        if file_format not in ("csv", "jsonl"):
+            raise ValueError(f"Unsupported import format: {file_format}")
+
+        self._report = self._new_report()
+        self._seen_skus: Set[str] = set()
+        self._seen_slugs: Set[str] = set()
+        self._lock = threading.Lock()
+        return self._records(stream, file_format)
+
+    @property
+    def report(self) -> Dict[str, Any]:
+        """Report of the current or last import"""
+        return self._report
+
+    def _new_report(self) -> Dict[str, Any]:
+        return {
+            "rows": 0,
+            "products_created": 0,
+            "products_updated": 0,
+            "variants_created": 0,
+            "variants_updated": 0,
+            "images_added": 0,
+            "error_count": 0,
+            "errors": [],
+            "seconds": 0.0,
+        }
+
+    def _records(self, stream: IO[str], file_format: str) -> Iterator[Dict[str, Any]]:
+        """Parsed product records, each with its variants and images"""
+        return self._read_csv(stream) if file_format == "csv" else self._read_jsonl(stream)
+
+    def _error(self, line: int, message: str, sku: Optional[str] = None) -> None:
+        with self._lock:
+            self._report["error_count"] += 1
+            if len(self._report["errors"]) < MAX_REPORTED_ERRORS:
+                error = {"line": line, "error": message}
+                if sku:
+                    error["sku"] = sku
+                self._report["errors"].append(error)
+
+    # Parsing
+
+    def _product_fields(self, data: Dict[str, Any], line: int) -> Dict[str, Any]:
+        slug = _text(data.get("slug"), "slug")
+        if slug and " " in slug:
+            raise ImportRowError("slug cannot contain spaces")
+        name = _text(data.get("name"), "name")
+        if name and not slug and not slugify(name):
+            raise ImportRowError("a slug is required when the name has no letters or digits")
+        category = data.get("category")
+        return {
+            "line": line,
+            "slug": slug,
+            "slug_base": slugify(name)[:_MAX_LENGTHS["slug"] - 8] if name and not slug else None,
+            "name": name,
+            "description": _text(data.get("description"), "description"),
+            "category_id": _int(data.get("category_id"), "category_id"),
+            "category_slug": _text(category, "category") if isinstance(category, str) else None,
+            "brand": _text(data.get("brand"), "brand"),
+            "base_price": _price(data.get("base_price"), "base_price"),
+            "discount_percent": _decimal(data.get("discount_percent"), "discount_percent", Decimal("100.01")),
+            "is_active": _bool(data.get("is_active"), "is_active"),
+            "is_featured": _bool(data.get("is_featured"), "is_featured"),
+            "product_metadata": _object(data.get("product_metadata"), "product_metadata"),
+            "content_hash": None,
+            "variants": [],
+            "images": [],
+        }
+
+    def _variant_fields(self, data: Dict[str, Any], line: int, is_active_field: str = "is_active") -> Dict[str, Any]:
+        sku = _text(data.get("sku"), "sku")
+        if not sku:
+            raise ImportRowError("sku is required")
+        if sku in self._seen_skus:
+            raise ImportRowError(f"SKU {sku} appears more than once in the file")
+        variant = {
+            "line": line,
+            "sku": sku,
+            "variant_name": _text(data.get("variant_name"), "variant_name"),
+            "price": _price(data.get("price"), "price"),
+            "stock_qty": _int(data.get("stock_qty"), "stock_qty"),
+            "attributes": _object(data.get("attributes"), "attributes"),
+            "is_active": _bool(data.get(is_active_field), is_active_field),
+            "content_hash": None,
+        }
+        self._seen_skus.add(sku)
+        return variant
+
+    def _image_fields(self, data: Any, line: int, position: int) -> Dict[str, Any]:
+        if isinstance(data, str):
+            data = {"image_url": data}
+        if not isinstance(data, dict):
+            raise ImportRowError("images must be URLs or objects")
+        image_url = _text(data.get("image_url"), "image_url")
+        if not image_url:
+            raise ImportRowError("image_url is required")
+        is_primary = _bool(data.get("is_primary"), "is_primary")
+        order = _int(data.get("order"), "order")
+        return {
+            "line": line,
+            "image_url": image_url,
+            "alt_text": _text(data.get("alt_text"), "alt_text"),
+            "is_primary": position == 0 if is_primary is None else is_primary,
+            "order": position if order is None else order,
+        }
+
+    def _claim_slug(self, record: Dict[str, Any]) -> None:
+        slug = record["slug"]
+        if slug:
+            if slug in self._seen_slugs:
+                raise ImportRowError(f"Product {slug} appears more than once in the file")
+            self._seen_slugs.add(slug)
+
+    def _read_csv(self, stream: IO[str]) -> Iterator[Dict[str, Any]]:
+        """
+        One row per variant. A product's first row carries its fields; the
+        rows after it belong to it while they repeat its slug, or have no
+        slug and repeat its name or leave it empty.
+        """
+        reader = csv.DictReader(stream)
+        fieldnames = reader.fieldnames or []
+        metadata_columns = [name for name in fieldnames if name and name.startswith(ATTRIBUTE_PREFIX)]
+        attribute_columns = [name for name in fieldnames if name and name.startswith(VARIANT_ATTRIBUTE_PREFIX)]
+        record = None
+        group: Optional[Tuple[str, str]] = None  # slug and name of the product's first row
+        for row in reader:
+            line = reader.line_num
+            self._report["rows"] += 1
+            slug = (row.get("slug") or "").strip()
+            name = (row.get("name") or "").strip()
+            continues = group is not None and (slug == group[0] if slug else name in ("", group[1]))
+
+            if not continues:
+                if record is not None:
+                    yield record
+                record, group = None, (slug, name)
+                try:
+                    metadata = _prefixed(row, metadata_columns, ATTRIBUTE_PREFIX)
+                    record = self._product_fields(row, line)
+                    if metadata:
+                        record["product_metadata"] = {**(record["product_metadata"] or {}), **metadata}
+                    self._claim_slug(record)
+                except ImportRowError as exc:
+                    self._error(line, str(exc), (row.get("sku") or "").strip() or None)
+                    record = None
+                    continue
+            elif record is None:
+                self._error(line, "Skipped with its product", (row.get("sku") or "").strip() or None)
+                continue
+
+            try:
+                if (row.get("sku") or "").strip():
+                    variant = self._variant_fields(row, line, "variant_is_active")
+                    attributes = _prefixed(row, attribute_columns, VARIANT_ATTRIBUTE_PREFIX)
+                    if attributes:
+                        variant["attributes"] = {**(variant["attributes"] or {}), **attributes}
+                    record["variants"].append(variant)
+                urls = [url for url in (row.get("images") or "").split(IMAGE_SEPARATOR) if url.strip()]
+                known = {image["image_url"] for image in record["images"]}
+                for url in urls:
+                    if url.strip() not in known:
+                        record["images"].append(self._image_fields(url, line, len(record["images"])))
+            except ImportRowError as exc:
+                self._error(line, str(exc), (row.get("sku") or "").strip() or None)
+        if record is not None:
+            yield record
+
+    def _read_jsonl(self, stream: IO[str]) -> Iterator[Dict[str, Any]]:
+        """One product per line, shaped like ProductCreate with "category" as a slug"""
+        for line, raw in enumerate(stream, start=1):
+            if not raw.strip():
+                continue
+            self._report["rows"] += 1
+            try:
+                data = json.loads(raw)
+                if not isinstance(data, dict):
+                    raise ImportRowError("each line must be a JSON object")
+                record = self._product_fields(data, line)
+                self._claim_slug(record)
+            except ValueError as exc:
+                self._error(line, str(exc) if isinstance(exc, ImportRowError) else "Invalid JSON")
+                continue
+
+            for variant in data.get("variants") or []:
+                try:
+                    if not isinstance(variant, dict):
+                        raise ImportRowError("variants must be objects")
+                    record["variants"].append(self._variant_fields(variant, line))
+                except ImportRowError as exc:
+                    self._error(line, str(exc), variant.get("sku") if isinstance(variant, dict) else None)
+            for position, image in enumerate(data.get("images") or []):
+                try:
+                    record["images"].append(self._image_fields(image, line, position))
+                except ImportRowError as exc:
+                    self._error(line, str(exc))
+            yield record
+
+    # Merging
+
+    def _import_batch(self, records: List[Dict[str, Any]]) -> None:
+        try:
+            evict = self._merge_batch(records)
+            self.db.commit()
+        except (SQLAlchemyError, psycopg2.Error) as exc:
+            # COPY runs on the raw DBAPI cursor, so its errors are not wrapped
+            self.db.rollback()
+            logger.exception("Import batch starting at line %d failed", records[0]["line"])
+            message = f"Batch failed: {getattr(exc, 'orig', exc)}".strip()
+            for record in records:
+                self._error(record["line"], message)
+            return
+
+        if evict:
+            product_cache.evict(*evict)
+        bump_version(CATALOG)
+
+    def _merge_batch(self, records: List[Dict[str, Any]]) -> List[Any]:
+        """Stage one batch and merge it; returns the product cache keys to evict"""
+        connection = self.db.connection()
+        connection.exec_driver_sql(STAGING_TABLES)
+
+        products, variants, images = [], [], []
+        for key, record in enumerate(records):
+            products.append((key,) + _PRODUCT_VALUES(record))
+            variants.extend((key,) + _VARIANT_VALUES(variant) for variant in record["variants"])
+            images.extend((key,) + _IMAGE_VALUES(image) for image in record["images"])
+        self._copy(connection, "import_products", PRODUCT_COLUMNS, products)
+        self._copy(connection, "import_variants", VARIANT_COLUMNS, variants)
+        self._copy(connection, "import_images", IMAGE_COLUMNS, images)
+        # Temporary tables are never auto-analyzed; the joins below need estimates
+        connection.exec_driver_sql("ANALYZE import_products, import_variants, import_images")
+
+        execute = self.db.execute
+        execute(text(
+            "UPDATE import_products s SET category_id = c.id FROM categories c "
+            "WHERE s.category_slug IS NOT NULL AND c.slug = s.category_slug"
+        ))
+        self._reject(REJECT_UNKNOWN_CATEGORIES)
+        execute(text(RESOLVE_BY_SLUG))
+        execute(text(RESOLVE_BY_SKU))
+        self._reject(REJECT_INCOMPLETE_PRODUCTS)
+        self._reject(REJECT_FOREIGN_SKUS)
+        self._reject(REJECT_INCOMPLETE_VARIANTS)
+        self._allocate_slugs()
+
+        previous = execute(text(
+            "SELECT p.id, p.slug FROM products p JOIN import_products s ON s.product_id = p.id"
+        )).all()
+        self._report["products_updated"] += self._update_products()
+        self._report["products_created"] += execute(text(INSERT_PRODUCTS)).rowcount
+        self._reject(REJECT_SLUG_CONFLICTS)
+
+        created, updated = execute(text(UPSERT_VARIANTS)).one()
+        self._report["variants_created"] += created
+        self._report["variants_updated"] += updated
+        self._report["images_added"] += execute(text(INSERT_IMAGES)).rowcount
+
+        evict = []
+        for product_id, slug in previous:
+            evict += [product_id, f"slug:{slug}"]
+        return evict
+
+    def _update_products(self) -> int:
+        """Apply the staged fields to the matched products; returns how many changed"""
+        return self.db.execute(text(UPDATE_PRODUCTS)).rowcount
+
+    @staticmethod
+    def _copy(connection, table: str, columns: Tuple[str, ...], rows: List[Tuple[Any, ...]]) -> None:
+        """COPY rows into a staging table; None is written as NULL, dicts as JSON"""
+        if not rows:
+            return
+        json_positions = [i for i, column in enumerate(columns) if column in JSON_COLUMNS]
+        if json_positions:
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for i in json_positions:
+                    if row[i] is not None:
+                        row[i] = json.dumps(row[i])
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+
+    def _reject(self, statement: str) -> None:
+        for line, sku, message in self.db.execute(text(statement)):
+            self._error(line, message, sku)
+
+    def _allocate_slugs(self) -> None:
+        """
+        Give every new product without a slug one derived from its name
+
+        The free base slugs are found with one query; bases that are taken
+        probe "-1" .. "-N" suffixes with a second one, so a batch costs at
+        most three queries however many products it creates.
+        """
+        pending = self.db.execute(text(
+            "SELECT key, slug_base FROM import_products "
+            "WHERE product_id IS NULL AND slug IS NULL ORDER BY key"
+        )).all()
+        if not pending:
+            return
+
+        bases = sorted({base for _, base in pending})
+        taken = set(self.db.execute(
+            text("SELECT slug FROM products WHERE slug = ANY(:slugs)"), {"slugs": bases}
+        ).scalars())
+        # Slugs named explicitly elsewhere in this batch are spoken for as well
+        taken.update(self.db.execute(
+            text("SELECT slug FROM import_products WHERE slug IS NOT NULL")
+        ).scalars())
+
+        counts: Dict[str, int] = {}
+        for _, base in pending:
+            counts[base] = counts.get(base, 0) + 1
+        crowded = [base for base in bases if base in taken or counts[base] > 1]
+        if crowded:
+            candidates = [f"{base}-{n}" for base in crowded for n in range(1, SLUG_PROBE_SIZE + 1)]
+            taken.update(self.db.execute(
+                text("SELECT slug FROM products WHERE slug = ANY(:slugs)"), {"slugs": candidates}
+            ).scalars())
+
+        keys, slugs = [], []
+        next_suffix: Dict[str, int] = {}
+        for key, base in pending:
+            suffix = next_suffix.get(base, 0)
+            slug = f"{base}-{suffix}" if suffix else base
+            # Past the probed suffixes, fall back to one lookup per candidate
+            while slug in taken or (
+                suffix > SLUG_PROBE_SIZE
+                and self.db.query(Product.id).filter(Product.slug == slug).first() is not None
+            ):
+                suffix += 1
+                slug = f"{base}-{suffix}"
+            next_suffix[base] = suffix
+            taken.add(slug)
+            keys.append(key)
+            slugs.append(slug)
+
+        self.db.execute(
+            text(
+                "UPDATE import_products s SET slug = allocated.slug "
+                "FROM unnest(CAST(:keys AS integer[]), CAST(:slugs AS text[])) AS allocated (key, slug) "
+                "WHERE s.key = allocated.key"
+            ),
+            {"keys": keys, "slugs": slugs},
+        )
@@ -0,0 +1,147 @@
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.catalog_version import get_version, COUPONS
+from app.database import get_db
+from app.models.coupon import Coupon
+
+CENTS = Decimal("0.01")
+HUNDRED = Decimal("100")
+
+# Coupon definitions (or False for unknown codes) per (coupons version, code)
+_coupon_cache = LRUCache(maxsize=1024)
+
+# Whether a limited coupon has uses left; read on every pricing, uncached
+COUPON_HAS_USES_LEFT = text("""
+SELECT 1 FROM coupons WHERE id = :id AND coalesce(used_count, 0) < max_uses
+""")
+
+# Redeems a coupon in one statement. Concurrent checkouts only queue on the
+# row for the instant of the update; the condition is re-checked on the
+# latest row, so the coupon is never used more than max_uses times.
+REDEEM_COUPON = text("""
+UPDATE coupons
+SET used_count = coalesce(used_count, 0) + 1
+WHERE code = :code
+  AND is_active
+  AND (max_uses IS NULL OR coalesce(used_count, 0) < max_uses)
+  AND (valid_from IS NULL OR valid_from <= CURRENT_DATE)
+  AND (valid_to IS NULL OR valid_to >= CURRENT_DATE)
+RETURNING id
+""")
+
+
+class CouponRule(NamedTuple):
+    """What a coupon grants; its use count is never cached"""
+    id: int
+    code: str
+    discount_percent: Decimal
+    max_uses: Optional[int]
+    valid_from: Optional[date]
+    valid_to: Optional[date]
+
+    def is_valid_on(self, day: date) -> bool:
+        return (self.valid_from is None or self.valid_from <= day) and (self.valid_to is None or day <= self.valid_to)
+
+
+def to_cents(amount: Decimal) -> Decimal:
+    return amount.quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def discounted(price: Decimal, discount_percent: Optional[Decimal]) -> Decimal:
+    """A price less a percentage, rounded as products.final_price is"""
+    return to_cents(price * (1 - (discount_percent or 0) / HUNDRED))
+
+
+def price_cart(items: List[Dict[str, Any]], coupon: Optional[CouponRule] = None) -> Dict[str, Any]:
+    """
+    Price cart lines and totals in Decimal
+
+    Each item needs its variant `price`, the product's `discount_percent`
+    and a `quantity`; its `unit_price` (the discounted price) and
+    `line_total` are filled in. The coupon discount is taken off the
+    subtotal of the line totals. Returns the cart totals.
+    """
+    total_items = 0
+    subtotal = Decimal("0")
+    for item in items:
+        item["unit_price"] = discounted(Decimal(item["price"]), item.pop("discount_percent", None))
+        item["line_total"] = item["unit_price"] * item["quantity"]
+        total_items += item["quantity"]
+        subtotal += item["line_total"]
+
+    coupon_discount = to_cents(subtotal * coupon.discount_percent / HUNDRED) if coupon else Decimal("0")
+    return {
+        "total_items": total_items,
+        "subtotal": subtotal,
+        "coupon_code": coupon.code if coupon else None,
+        "coupon_discount": coupon_discount,
+        "total": subtotal - coupon_discount,
+    }
+
+
+class PricingService:
+    """
+    Looks up and redeems coupons
+
+    Coupon definitions are cached per worker until the coupons version
+    moves on, which any ORM write to coupons does on commit. Use counts
+    are not cached, so redemptions do not invalidate it: a coupon with
+    max_uses costs one primary-key read per lookup, and redemption checks
+    the count again atomically.
+    """
+
+    def __init__(self, db: Session = Depends(get_db)):
+        self.db = db
+
+    def get_coupon(self, code: str) -> CouponRule:
+        """A coupon that is active and valid today, by its code"""
+        code = code.strip()
+        version = get_version(COUPONS)
+        cache_key = (version, code)
+        coupon = _coupon_cache.get(cache_key) if version is not None else None
+        if coupon is None:
+            row = self.db.query(Coupon).filter(Coupon.code == code, Coupon.is_active == True).first()
+            coupon = CouponRule(
+                id=row.id,
+                code=row.code,
+                discount_percent=row.discount_percent or Decimal("0"),
+                max_uses=row.max_uses,
+                valid_from=row.valid_from,
+                valid_to=row.valid_to,
+            ) if row else False
+            if version is not None:
+                _coupon_cache.set(cache_key, coupon)
+
+        if not coupon or not coupon.is_valid_on(date.today()):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Coupon not found or is not valid"
+            )
+        if coupon.max_uses is not None and self.db.execute(COUPON_HAS_USES_LEFT, {"id": coupon.id}).first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Coupon is not valid or has been fully redeemed"
+            )
+        return coupon
+
+    def redeem_coupon(self, code: str) -> int:
+        """
+        Count one use of a coupon; returns the coupon id
+
+        Does not commit: run it as the last statement of the checkout
+        transaction, so the coupon row is locked only until that commits.
+        """
+        coupon_id = self.db.execute(REDEEM_COUPON, {"code": code.strip()}).scalar()
+        if coupon_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Coupon is not valid or has been fully redeemed"
+            )
+        return coupon_id
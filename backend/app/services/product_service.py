@@ -1,13 +1,112 @@
-from typing import List, Optional, Dict, Any, Union
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from typing import List, Optional, Dict, Any, Union, Tuple
+from datetime import datetime
+import re
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func, tuple_, select, case, literal, literal_column, exists, or_, text
+from sqlalchemy.dialects.postgresql import JSONB
 from fastapi import Depends, HTTPException, status
 from slugify import slugify
 
 from app.database import get_db
-from app.models.product import Product, ProductVariant, ProductImage
-from app.models.category import Category
-from app.schemas.product import ProductCreate, ProductUpdate, ProductVariantCreate, ProductImageCreate
+from app.models.product import Product, ProductVariant, ProductImage, SEARCH_CONFIG
+from app.models.category import Category, CategoryClosure
+from app.schemas.product import ProductCreate, ProductUpdate, ProductVariantCreate, ProductImageCreate, ProductResponse, VariantBulkUpdate
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.cache import LRUCache, TieredCache
+from app.core.catalog_version import get_version, bump_version, CATALOG
+from app.services.suggest_service import suggest_index
+
+
+# Sort keys accepted by listings; each has a matching (column, id) index.
+# "price" is the lowest price a customer can pay for the product.
+SORTABLE_COLUMNS = {
+    "created_at": Product.created_at,
+    "base_price": Product.base_price,
+    "price": Product.min_variant_price,
+    "name": Product.name,
+}
+
+# Relationship loading for full product responses. The many-to-one category
+# is joined; the variant and image collections are each fetched with one
+# "WHERE product_id IN (...)" query, so a page costs three statements
+# whatever its size and LIMIT applies to products rather than joined rows.
+PRODUCT_LOAD_OPTIONS = (
+    joinedload(Product.category),
+    selectinload(Product.variants),
+    selectinload(Product.images),
+)
+
+# Price facet buckets as (lower, upper, label); upper is exclusive
+PRICE_RANGES = [
+    (0, 1000, "0-1000"),
+    (1000, 2500, "1000-2500"),
+    (2500, 5000, "2500-5000"),
+    (5000, 10000, "5000-10000"),
+    (10000, None, "10000+"),
+]
+
+# Facet counts per (catalog version, normalized filters)
+_facet_cache = LRUCache(maxsize=512)
+
+# Serialized product detail responses by id, plus "slug:<slug>" -> id.
+# Writes below evict the affected keys explicitly.
+product_cache = TieredCache("product", maxsize=2048)
+
+# Most ids plus slugs a single batch lookup may ask for
+MAX_BATCH_SIZE = 100
+
+# Most variants a single bulk update may change
+MAX_BULK_VARIANT_UPDATES = 10000
+
+# Locks the variants of a bulk update, in id order so that concurrent
+# updates of overlapping sets cannot deadlock
+LOCK_VARIANTS = text("""
+SELECT id, sku, stock_qty
+FROM product_variants
+WHERE id = ANY(:ids) OR sku = ANY(:skus)
+ORDER BY id
+FOR UPDATE
+""")
+
+# Applies a whole bulk update in one statement from parallel arrays; NULL
+# keeps the current value. Only variants that actually change are written,
+# and each stock change is recorded as an inventory movement.
+BULK_UPDATE_VARIANTS = text("""
+WITH changes AS (
+    SELECT c.id, c.price::numeric(10, 2) AS price, c.stock_qty, c.is_active, c.old_stock
+    FROM unnest(CAST(:ids AS integer[]), CAST(:prices AS numeric[]), CAST(:stock_qtys AS integer[]),
+                CAST(:actives AS boolean[]), CAST(:old_stocks AS integer[]))
+         AS c(id, price, stock_qty, is_active, old_stock)
+), updated AS (
+    UPDATE product_variants v
+    SET price = coalesce(c.price, v.price),
+        stock_qty = coalesce(c.stock_qty, v.stock_qty),
+        is_active = coalesce(c.is_active, v.is_active)
+    FROM changes c
+    WHERE v.id = c.id
+      AND (coalesce(c.price, v.price), coalesce(c.stock_qty, v.stock_qty), coalesce(c.is_active, v.is_active))
+          IS DISTINCT FROM (v.price, v.stock_qty, v.is_active)
+    RETURNING v.id, v.product_id, v.stock_qty - coalesce(c.old_stock, 0) AS change_qty
+), movements AS (
+    INSERT INTO inventory_movements (variant_id, change_qty, reason)
+    SELECT id, change_qty, :reason
+    FROM updated
+    WHERE change_qty <> 0
+    RETURNING 1
+)
+SELECT coalesce(array_agg(DISTINCT product_id), '{}'), count(*), (SELECT count(*) FROM movements)
+FROM updated
+""")
+
+
+def _normalized_document(document: Dict[str, List[str]]) -> Any:
+    """
+    A containment document for the normalized attribute columns
+
+    Normalized by the same SQL function that computes those columns, so
+    filter values are lower-cased exactly as the stored ones are.
+    """
+    return func.products_normalize_metadata(literal(document, JSONB), type_=JSONB)
 
 
 class ProductService:
@@ -25,67 +124,431 @@ class ProductService:
         is_active: Optional[bool] = None,
         is_featured: Optional[bool] = None,
         min_price: Optional[float] = None,
-        max_price: Optional[float] = None
+        max_price: Optional[float] = None,
+        cursor: Optional[str] = None,
+        search_prefix: bool = False,
+        attributes: Optional[Dict[str, List[str]]] = None,
+        variant_attributes: Optional[Dict[str, List[str]]] = None,
+        in_stock: Optional[bool] = None,
+        include_subcategories: bool = True
     ) -> List[Product]:
         """
-        Get products with various filters and sorting options
+        Get products with various filters and sorting options, see
+        _order_and_page for how cursors and search ranking apply
+
+        With variant filters each product gets a `matched_variant_ids` list.
         """
-        query = self.db.query(Product)
+        query = self.db.query(Product).filter(*self.filter_conditions(
+            category_id=category_id,
+            search=search,
+            search_prefix=search_prefix,
+            is_active=is_active,
+            is_featured=is_featured,
+            min_price=min_price,
+            max_price=max_price,
+            attributes=attributes,
+            variant_attributes=variant_attributes,
+            in_stock=in_stock,
+            include_subcategories=include_subcategories
+        ))
+        query = self._order_and_page(query, skip, limit, sort_by, sort_order, cursor, search, search_prefix)
+        products = query.options(*PRODUCT_LOAD_OPTIONS).all()
         
-        # Apply filters
-        if category_id:
-            query = query.filter(Product.category_id == category_id)
-        
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                Product.name.ilike(search_term) | 
-                Product.description.ilike(search_term) |
-                Product.brand.ilike(search_term)
+        if products and (variant_attributes or in_stock is not None):
+            matched = self.get_matched_variant_ids([product.id for product in products], variant_attributes, in_stock)
+            for product in products:
+                product.matched_variant_ids = matched.get(product.id, [])
+        
+        return products
+    
+    def get_product_cards(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        sort_by: Optional[str] = None,
+        sort_order: str = "asc",
+        cursor: Optional[str] = None,
+        **filters
+    ) -> List[Dict[str, Any]]:
+        """
+        Get listing cards as plain rows, without loading any ORM objects
+
+        Takes the same filters, sorting and cursors as get_products but selects
+        only what a product card shows: the primary image and stock flag are
+        subqueries and the category name comes from a join.
+        """
+        primary_image = (
+            select(ProductImage.image_url)
+            .where(ProductImage.product_id == Product.id)
+            .order_by(ProductImage.is_primary.desc(), ProductImage.order.asc(), ProductImage.id.asc())
+            .limit(1)
+            .correlate(Product)
+            .scalar_subquery()
+        )
+        has_stock = exists().where(
+            ProductVariant.product_id == Product.id,
+            ProductVariant.is_active == True,
+            ProductVariant.stock_qty > 0
+        )
+        
+        variant_filters = filters.get("variant_attributes") or filters.get("in_stock") is not None
+        matched_variants = (
+            func.array(
+                select(ProductVariant.id)
+                .where(ProductVariant.product_id == Product.id,
+                       *self.variant_conditions(filters.get("variant_attributes"), filters.get("in_stock")))
+                .order_by(ProductVariant.id)
+                .correlate(Product)
+                .scalar_subquery()
+            ) if variant_filters else literal_column("NULL")
+        )
+        
+        stmt = (
+            select(
+                Product.id,
+                Product.name,
+                Product.slug,
+                Product.base_price,
+                Product.final_price,
+                Product.min_variant_price,
+                Product.max_variant_price,
+                primary_image.label("image_url"),
+                Category.name.label("category_name"),
+                has_stock.label("in_stock"),
+                matched_variants.label("matched_variant_ids"),
+                Product.created_at
             )
+            .outerjoin(Category, Category.id == Product.category_id)
+            .where(*self.filter_conditions(**filters))
+        )
+        stmt = self._order_and_page(
+            stmt, skip, limit, sort_by, sort_order, cursor,
+            filters.get("search"), filters.get("search_prefix", False)
+        )
+        
+        return [dict(row) for row in self.db.execute(stmt).mappings()]
+    
+    def _order_and_page(self, query, skip, limit, sort_by, sort_order, cursor, search, search_prefix):
+        """
+        Apply listing order and pagination to a product Query or select()
+
+        When a cursor is given the page starts right after the row it points
+        to (keyset pagination) and skip is ignored. Searches without an
+        explicit sort_by are ordered by full-text relevance.
+        """
+        ts_query = self.build_search_query(search, search_prefix) if search else None
+        
+        # Rank search results unless the caller asked for a specific order
+        if ts_query is not None and sort_by not in SORTABLE_COLUMNS:
+            if cursor:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Cursor pagination requires an explicit sort_by when searching"
+                )
+            
+            rank = func.ts_rank_cd(Product.search_vector, ts_query)
+            return query.order_by(rank.desc(), Product.id.desc()).offset(skip).limit(limit)
+        
+        # Apply sorting, always tie-broken on id so pages are deterministic
+        sort_by, sort_order = self.resolve_sort(sort_by, sort_order)
+        column = SORTABLE_COLUMNS[sort_by]
+        
+        if cursor:
+            position = decode_cursor(cursor)
+            if (position["sort_by"], position["sort_order"]) != (sort_by, sort_order):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Cursor does not match the requested sort order"
+                )
+            
+            value = self._cursor_value(column, position["value"])
+            if sort_order == "desc":
+                query = query.where(tuple_(column, Product.id) < tuple_(value, position["id"]))
+            else:
+                query = query.where(tuple_(column, Product.id) > tuple_(value, position["id"]))
+        
+        if sort_order == "desc":
+            query = query.order_by(column.desc(), Product.id.desc())
+        else:
+            query = query.order_by(column.asc(), Product.id.asc())
+        
+        if not cursor:
+            query = query.offset(skip)
+        
+        return query.limit(limit)
+    
+    def filter_conditions(
+        self,
+        category_id: Optional[int] = None,
+        search: Optional[str] = None,
+        search_prefix: bool = False,
+        is_active: Optional[bool] = None,
+        is_featured: Optional[bool] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        attributes: Optional[Dict[str, List[str]]] = None,
+        variant_attributes: Optional[Dict[str, List[str]]] = None,
+        in_stock: Optional[bool] = None,
+        include_subcategories: bool = True
+    ) -> List[Any]:
+        """
+        WHERE clauses for the listing filters, shared by listings and facets
+
+        `category_id` matches the whole subtree of that category through the
+        category closure table, unless `include_subcategories` is False.
+
+        `attributes` maps product_metadata keys to accepted values: a product
+        matches when every key has one of its values, compared
+        case-insensitively, either as the stored value or inside a stored list.
+        `variant_attributes` does the same for variant attributes; together
+        with `in_stock` it must hold for a single active variant, checked with
+        an EXISTS semi-join. `in_stock=False` keeps products that have no
+        such variant in stock.
+        """
+        conditions = []
+        
+        if category_id:
+            if include_subcategories:
+                subtree = select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id == category_id)
+                conditions.append(Product.category_id.in_(subtree))
+            else:
+                conditions.append(Product.category_id == category_id)
+        
+        ts_query = self.build_search_query(search, search_prefix) if search else None
+        if ts_query is not None:
+            conditions.append(Product.search_vector.op("@@")(ts_query))
         
         if is_active is not None:
-            query = query.filter(Product.is_active == is_active)
+            conditions.append(Product.is_active == is_active)
             
         if is_featured is not None:
-            query = query.filter(Product.is_featured == is_featured)
+            conditions.append(Product.is_featured == is_featured)
             
+        # Price bounds match products whose variant price range overlaps them
         if min_price is not None:
-            query = query.filter(Product.base_price >= min_price)
+            conditions.append(Product.max_variant_price >= min_price)
             
         if max_price is not None:
-            query = query.filter(Product.base_price <= max_price)
-        
-        # Apply sorting
-        if sort_by:
-            column = getattr(Product, sort_by, None)
-            if column is not None:
-                if sort_order.lower() == "desc":
-                    query = query.order_by(column.desc())
-                else:
-                    query = query.order_by(column.asc())
+            conditions.append(Product.min_variant_price <= max_price)
+        
+        if attributes:
+            conditions.extend(self._containment_conditions(Product.metadata_normalized, attributes))
+        
+        if variant_attributes or in_stock is not None:
+            matches = exists().where(
+                ProductVariant.product_id == Product.id,
+                *self.variant_conditions(variant_attributes, in_stock=in_stock or None)
+            )
+            if in_stock is False:
+                in_stock_matches = exists().where(
+                    ProductVariant.product_id == Product.id,
+                    *self.variant_conditions(variant_attributes, in_stock=True)
+                )
+                conditions.append(~in_stock_matches)
+                if variant_attributes:
+                    conditions.append(matches)
             else:
-                # Default sort by created_at
-                query = query.order_by(Product.created_at.desc())
-        else:
-            # Default sort by created_at
-            query = query.order_by(Product.created_at.desc())
-        
-        # Apply pagination and load relationships
-        return query.options(
-            joinedload(Product.variants),
-            joinedload(Product.images),
-            joinedload(Product.category)
-        ).offset(skip).limit(limit).all()
+                conditions.append(matches)
+        
+        return conditions
+    
+    def variant_conditions(
+        self,
+        variant_attributes: Optional[Dict[str, List[str]]] = None,
+        in_stock: Optional[bool] = None
+    ) -> List[Any]:
+        """Conditions on one active variant for the variant listing filters"""
+        conditions = [ProductVariant.is_active == True]
+        if in_stock:
+            conditions.append(ProductVariant.stock_qty > 0)
+        if variant_attributes:
+            conditions.extend(self._containment_conditions(ProductVariant.attributes_normalized, variant_attributes))
+        return conditions
+    
+    def get_matched_variant_ids(
+        self,
+        product_ids: List[int],
+        variant_attributes: Optional[Dict[str, List[str]]] = None,
+        in_stock: Optional[bool] = None
+    ) -> Dict[int, List[int]]:
+        """Ids of the variants matching the variant filters, per product, in one query"""
+        rows = self.db.execute(
+            select(ProductVariant.product_id, ProductVariant.id)
+            .where(ProductVariant.product_id.in_(product_ids),
+                   *self.variant_conditions(variant_attributes, in_stock))
+            .order_by(ProductVariant.product_id, ProductVariant.id)
+        )
+        matched: Dict[int, List[int]] = {}
+        for product_id, variant_id in rows:
+            matched.setdefault(product_id, []).append(variant_id)
+        return matched
+    
+    @staticmethod
+    def _containment_conditions(column, attributes: Dict[str, List[str]]) -> List[Any]:
+        """
+        Containment tests on a normalized attributes column
+
+        All single-valued attributes form one document, so the GIN index and
+        the planner's column statistics see them together; attributes with
+        alternatives add an OR of documents each.
+        """
+        conditions = []
+        required = {}
+        for key, values in attributes.items():
+            values = sorted(set(values))
+            if len(values) == 1:
+                required[key] = values
+            else:
+                conditions.append(or_(*(column.contains(_normalized_document({key: [value]})) for value in values)))
+        if required:
+            conditions.append(column.contains(_normalized_document(required)))
+        return conditions
+    
+    def get_facets(self, **filters) -> Dict[str, Any]:
+        """
+        Count matching products per category, brand, price range and featured
+        flag in a single GROUPING SETS query
+
+        Results are cached per worker for each distinct filter set until the
+        catalog version changes.
+        """
+        version = get_version(CATALOG)
+        cache_key = (version, self._normalize_filters(filters))
+        cached = _facet_cache.get(cache_key) if version is not None else None
+        if cached is not None:
+            return cached
+        
+        price_range = self._price_range_expression()
+        category_name = func.max(Category.name)
+        facet_columns = (Product.category_id, Product.brand, price_range, Product.is_featured)
+        
+        stmt = (
+            select(
+                *facet_columns,
+                category_name.label("category_name"),
+                func.count(Product.id).label("count"),
+                *(func.grouping(column).label(f"g{i}") for i, column in enumerate(facet_columns))
+            )
+            .outerjoin(Category, Category.id == Product.category_id)
+            .where(*self.filter_conditions(**filters))
+            .group_by(func.grouping_sets(*(tuple_(column) for column in facet_columns), tuple_()))
+        )
+        
+        facets = {"total": 0, "categories": [], "brands": [], "price_ranges": [], "featured": []}
+        for row in self.db.execute(stmt):
+            category_id, brand, bucket, is_featured, name, count, *grouped = row
+            # grouping() is 0 for the column a row was grouped by
+            if all(grouped):
+                facets["total"] = count
+            elif not grouped[0]:
+                facets["categories"].append({"value": category_id, "label": name, "count": count})
+            elif not grouped[1]:
+                facets["brands"].append({"value": brand, "label": brand, "count": count})
+            elif not grouped[2]:
+                facets["price_ranges"].append({"value": bucket, "label": bucket, "count": count})
+            else:
+                facets["featured"].append({"value": is_featured, "label": None, "count": count})
+        
+        for key in ("categories", "brands", "featured"):
+            facets[key].sort(key=lambda facet: facet["count"], reverse=True)
+        bucket_order = [label for _, _, label in PRICE_RANGES]
+        facets["price_ranges"].sort(key=lambda facet: bucket_order.index(facet["value"]))
+        
+        if version is not None:
+            _facet_cache.set(cache_key, facets)
+        return facets
+    
+    @staticmethod
+    def _price_range_expression():
+        """CASE expression mapping a product's lowest price to its PRICE_RANGES label"""
+        # Bounds are rendered inline so the expression text is identical in
+        # SELECT and GROUP BY, as GROUPING SETS requires
+        whens = [
+            (Product.min_variant_price < literal_column(str(upper)), literal_column(f"'{label}'"))
+            for _, upper, label in PRICE_RANGES if upper is not None
+        ]
+        return case(*whens, else_=literal_column(f"'{PRICE_RANGES[-1][2]}'"))
+    
+    @staticmethod
+    def _normalize_filters(filters: Dict[str, Any]) -> Tuple:
+        """Hashable, order-independent form of a filter set for cache keys"""
+        normalized = []
+        for key, value in sorted(filters.items()):
+            if value is None or (key == "search_prefix" and not value):
+                continue
+            if isinstance(value, str):
+                value = " ".join(value.casefold().split())
+            elif isinstance(value, dict):
+                if not value:
+                    continue
+                # Attribute values are lower-cased in SQL, so they are kept as given
+                value = tuple(sorted((name, tuple(sorted(set(items)))) for name, items in value.items()))
+            normalized.append((key, value))
+        return tuple(normalized)
+    
+    @staticmethod
+    def resolve_sort(sort_by: Optional[str], sort_order: str = "asc") -> Tuple[str, str]:
+        """Validate the requested sort, falling back to newest first"""
+        if sort_by not in SORTABLE_COLUMNS:
+            return "created_at", "desc"
+        return sort_by, "desc" if sort_order.lower() == "desc" else "asc"
+    
+    @staticmethod
+    def build_search_query(search: str, prefix: bool = False):
+        """
+        Build the tsquery for a listing search
+
+        Plain searches use web-search syntax (quotes, "or", "-term"); prefix
+        searches AND together every word as a prefix match, for partial input.
+        Returns None when a prefix search has no usable words.
+        """
+        if not prefix:
+            return func.websearch_to_tsquery(SEARCH_CONFIG, search)
+        
+        terms = re.findall(r"\w+", search)
+        if not terms:
+            return None
+        return func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{term}:*" for term in terms))
+    
+    def get_next_cursor(
+        self,
+        products: List[Union[Product, Dict[str, Any]]],
+        limit: int,
+        sort_by: Optional[str] = None,
+        sort_order: str = "asc",
+        search: Optional[str] = None
+    ) -> Optional[str]:
+        """Build the cursor for the page after `products`, if there may be one"""
+        if not products or len(products) < limit:
+            return None
+        
+        # Relevance-ranked pages are only reachable with skip/limit
+        if search and sort_by not in SORTABLE_COLUMNS:
+            return None
+        
+        sort_by, sort_order = self.resolve_sort(sort_by, sort_order)
+        key = SORTABLE_COLUMNS[sort_by].key
+        last = products[-1]
+        if isinstance(last, dict):
+            return encode_cursor(sort_by, sort_order, last[key], last["id"])
+        return encode_cursor(sort_by, sort_order, getattr(last, key), last.id)
+    
+    @staticmethod
+    def _cursor_value(column, value: Any) -> Any:
+        """Convert a cursor value back to the Python type of its sort column"""
+        if value is None:
+            return None
+        python_type = column.type.python_type
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        return python_type(value)
     
     def get_product_by_id(self, product_id: int) -> Product:
         """Get product by ID with variants and images"""
         product = self.db.query(Product).filter(
             Product.id == product_id
         ).options(
-            joinedload(Product.variants),
-            joinedload(Product.images),
-            joinedload(Product.category)
+            *PRODUCT_LOAD_OPTIONS
         ).first()
         
         if not product:
@@ -96,14 +559,79 @@ class ProductService:
         
         return product
     
+    def get_product_detail(self, product_id: int) -> Dict[str, Any]:
+        """Serialized product response by ID, served from the product cache"""
+        return product_cache.get_or_load(
+            product_id, lambda: self._detail(self.get_product_by_id(product_id))
+        )
+    
+    def get_product_detail_by_slug(self, slug: str) -> Dict[str, Any]:
+        """Serialized product response by slug, served from the product cache"""
+        product_id = product_cache.get(f"slug:{slug}")
+        if product_id is not None:
+            return self.get_product_detail(product_id)
+        
+        detail = self._detail(self.get_product_by_slug(slug))
+        product_cache.set(detail["id"], detail)
+        product_cache.set(f"slug:{slug}", detail["id"])
+        return detail
+    
+    def get_product_batch(self, ids: List[int] = (), slugs: List[str] = ()) -> Dict[str, Any]:
+        """
+        Serialized products for many ids and slugs, in request order
+
+        Cached products cost one Redis round trip for the whole batch, and
+        the rest are loaded together (one product query plus one per
+        collection), so the query count does not grow with the batch size.
+        Ids and slugs that match no product are returned under "missing".
+        """
+        ids = list(dict.fromkeys(ids))
+        slugs = list(dict.fromkeys(slugs))
+        if len(ids) + len(slugs) > MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {MAX_BATCH_SIZE} ids and slugs can be requested at once"
+            )
+        
+        cached_slugs = product_cache.get_many([f"slug:{slug}" for slug in slugs]) if slugs else {}
+        slug_ids = {slug: cached_slugs.get(f"slug:{slug}") for slug in slugs}
+        details = product_cache.get_many(ids + [i for i in slug_ids.values() if i is not None])
+        
+        missing_ids = [product_id for product_id in ids if product_id not in details]
+        missing_slugs = [slug for slug, product_id in slug_ids.items() if product_id not in details]
+        if missing_ids or missing_slugs:
+            conditions = []
+            if missing_ids:
+                conditions.append(Product.id.in_(missing_ids))
+            if missing_slugs:
+                conditions.append(Product.slug.in_(missing_slugs))
+            products = self.db.query(Product).filter(or_(*conditions)).options(*PRODUCT_LOAD_OPTIONS).all()
+            
+            loaded = {}
+            for product in products:
+                loaded[product.id] = self._detail(product)
+                if product.slug in slug_ids:
+                    slug_ids[product.slug] = product.id
+                    loaded[f"slug:{product.slug}"] = product.id
+            details.update(product_cache.set_many(loaded))
+        
+        requested = dict.fromkeys(ids + [slug_ids[slug] for slug in slugs])
+        return {
+            "products": [details[product_id] for product_id in requested if product_id in details],
+            "missing": [product_id for product_id in ids if product_id not in details]
+                + [slug for slug in slugs if slug_ids[slug] not in details],
+        }
+    
+    @staticmethod
+    def _detail(product: Product) -> Dict[str, Any]:
+        return ProductResponse.model_validate(product, from_attributes=True).model_dump()
+    
     def get_product_by_slug(self, slug: str) -> Product:
         """Get product by slug with variants and images"""
         product = self.db.query(Product).filter(
             Product.slug == slug
         ).options(
-            joinedload(Product.variants),
-            joinedload(Product.images),
-            joinedload(Product.category)
+            *PRODUCT_LOAD_OPTIONS
         ).first()
         
         if not product:
@@ -158,6 +686,7 @@ class ProductService:
         # Commit all changes
         self.db.commit()
         self.db.refresh(db_product)
+        suggest_index.upsert_product(db_product)
         
         return db_product
     
@@ -185,6 +714,7 @@ class ProductService:
                 )
         
         # Update product fields
+        old_slug = db_product.slug
         update_data = product_data.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_product, key, value)
@@ -192,6 +722,8 @@ class ProductService:
         self.db.add(db_product)
         self.db.commit()
         self.db.refresh(db_product)
+        product_cache.evict(product_id, f"slug:{old_slug}", f"slug:{db_product.slug}")
+        suggest_index.upsert_product(db_product)
         
         return db_product
     
@@ -199,8 +731,11 @@ class ProductService:
         """Delete a product by ID"""
         db_product = self.get_product_by_id(product_id)
         
+        slug = db_product.slug
         self.db.delete(db_product)
         self.db.commit()
+        product_cache.evict(product_id, f"slug:{slug}")
+        suggest_index.remove_product(product_id)
         
         return True
     
@@ -222,9 +757,84 @@ class ProductService:
         self.db.add(db_variant)
         self.db.commit()
         self.db.refresh(db_variant)
+        product_cache.evict(product_id)
         
         return db_variant
     
+    def bulk_update_variants(self, update: VariantBulkUpdate) -> Dict[str, Any]:
+        """
+        Change price, stock and status of many variants, found by id or SKU
+
+        The whole batch is applied in one transaction with a single UPDATE;
+        stock is either set (`stock_qty`) or adjusted (`stock_change`), and
+        every resulting stock change is recorded as an inventory movement.
+        Caches are invalidated once for the batch. Ids and SKUs that match
+        no variant are returned under "missing".
+        """
+        items = update.items
+        if len(items) > MAX_BULK_VARIANT_UPDATES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {MAX_BULK_VARIANT_UPDATES} variants can be updated at once"
+            )
+        
+        ids = [item.id for item in items if item.id is not None]
+        skus = [item.sku for item in items if item.sku is not None]
+        rows = self.db.execute(LOCK_VARIANTS, {"ids": ids, "skus": skus}).all()
+        by_id = {row.id: row for row in rows}
+        by_sku = {row.sku: row for row in rows}
+        
+        changes = {}
+        missing = []
+        negative = []
+        for item in items:
+            row = by_id.get(item.id) if item.id is not None else by_sku.get(item.sku)
+            if row is None:
+                missing.append(item.id if item.id is not None else item.sku)
+                continue
+            if row.id in changes:
+                self.db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Variant {row.sku} is listed more than once"
+                )
+            stock_qty = item.stock_qty
+            if item.stock_change is not None:
+                stock_qty = (row.stock_qty or 0) + item.stock_change
+                if stock_qty < 0:
+                    negative.append(row.sku)
+            changes[row.id] = (item.price, stock_qty, item.is_active, row.stock_qty)
+        if negative:
+            self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Not enough stock for: {', '.join(negative)}"
+            )
+        
+        product_ids, updated, movements = [], 0, 0
+        if changes:
+            prices, stock_qtys, actives, old_stocks = zip(*changes.values())
+            product_ids, updated, movements = self.db.execute(BULK_UPDATE_VARIANTS, {
+                "ids": list(changes),
+                "prices": list(prices),
+                "stock_qtys": list(stock_qtys),
+                "actives": list(actives),
+                "old_stocks": list(old_stocks),
+                "reason": update.reason,
+            }).one()
+        self.db.commit()
+        
+        if updated:
+            product_cache.evict(*product_ids)
+            bump_version(CATALOG)
+        
+        return {
+            "updated": updated,
+            "unchanged": len(changes) - updated,
+            "movements": movements,
+            "missing": missing,
+        }
+    
     def add_product_image(self, product_id: int, image_data: ProductImageCreate) -> ProductImage:
         """Add an image to a product"""
         # Verify product exists
@@ -242,6 +852,7 @@ class ProductService:
         self.db.add(db_image)
         self.db.commit()
         self.db.refresh(db_image)
+        product_cache.evict(product_id)
         
         return db_image
     
@@ -0,0 +1,357 @@
+import heapq
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from typing import Callable, List, NamedTuple, Optional, Dict, Any, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.product import Product, ProductVariant
+from app.models.category import Category
+from app.models.order import OrderItem
+
+logger = logging.getLogger(__name__)
+
+# Rebuild from the database after this long, to pick up writes made by other workers
+SUGGEST_INDEX_TTL_SECONDS = int(os.getenv("SUGGEST_INDEX_TTL_SECONDS", "300"))
+
+# Popularity bonus for featured products, in units sold
+FEATURED_BOOST = 50
+
+# Keys per block of the sorted index; blocks split at twice this size
+BLOCK_SIZE = 512
+
+# Upper bound of the characters that can follow a prefix
+_PREFIX_END = "\U0010ffff"
+
+# (normalized text, entry type, entry id)
+Key = Tuple[str, str, Any]
+
+
+class _ProductRow(NamedTuple):
+    """The product fields the index uses, copied so a write can be replayed later"""
+    id: int
+    name: str
+    slug: str
+    brand: Optional[str]
+    category_id: Optional[int]
+    is_active: bool
+    is_featured: bool
+
+
+def normalize(text: str) -> str:
+    """Lower-case and collapse whitespace so lookups are case-insensitive"""
+    return " ".join(text.casefold().split())
+
+
+class SuggestIndex:
+    """
+    In-process prefix index over product names, brands and category names
+
+    Every word-start suffix of a label is a key, so "silk" finds
+    "Kanjeevaram Silk Saree". Keys live in sorted blocks: a prefix is a
+    contiguous range found by bisecting, and each block keeps a copy of its
+    keys ordered by weight, so the top-k of a range is a lazy heap merge
+    that stops after k distinct entries instead of scanning every match.
+    """
+
+    def __init__(self, cache_size: int = 1024):
+        self._blocks: List[List[Key]] = []
+        self._firsts: List[Key] = []
+        self._ranked: List[Optional[List[Key]]] = []
+        self._entries: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        self._results: "OrderedDict[Tuple[str, int], List[Dict[str, Any]]]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.RLock()
+        # Held by the one rebuild in progress
+        self._rebuild_lock = threading.Lock()
+        # Bumped by invalidate(), so a rebuild that started before does not count as fresh
+        self._generation = 0
+        # Writes made while a rebuild reads the database, replayed onto its result
+        self._pending: Optional[List[Tuple[Callable[..., None], tuple]]] = None
+        self.loaded_at: Optional[float] = None
+
+        # product id -> units sold, and brand key -> {product id: weight}
+        self._sales: Dict[int, int] = {}
+        self._brands: Dict[str, Dict[int, int]] = {}
+        self._brand_labels: Dict[str, str] = {}
+
+    @property
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > SUGGEST_INDEX_TTL_SECONDS
+
+    def ensure_loaded(self, db: Session) -> None:
+        """
+        Build the index from the database if it is missing or expired
+
+        Only the first build runs in the request (concurrent requests wait
+        for it). An expired index keeps serving while one background thread
+        rebuilds it.
+        """
+        if not self.is_stale:
+            return
+        if self._blocks:
+            if self._rebuild_lock.acquire(blocking=False):
+                threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+            return
+        with self._rebuild_lock:
+            if self.is_stale:
+                self.rebuild(db)
+
+    def invalidate(self) -> None:
+        """Mark the index expired so the next search rebuilds it, e.g. after a bulk import"""
+        with self._lock:
+            self._generation += 1
+            self.loaded_at = None
+            self._results.clear()
+
+    def _rebuild_in_background(self) -> None:
+        db = SessionLocal()
+        try:
+            self.rebuild(db)
+        except Exception:
+            logger.exception("Rebuilding the suggest index failed")
+        finally:
+            db.close()
+            self._rebuild_lock.release()
+
+    def rebuild(self, db: Session) -> None:
+        """Load every active product, brand and category in three queries"""
+        generation = self._generation
+        with self._lock:
+            self._pending = []
+        try:
+            self._load(db, generation)
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def _load(self, db: Session, generation: int) -> None:
+        sales = dict(
+            db.query(ProductVariant.product_id, func.coalesce(func.sum(OrderItem.quantity), 0))
+            .join(OrderItem, OrderItem.variant_id == ProductVariant.id)
+            .group_by(ProductVariant.product_id)
+            .all()
+        )
+        products = db.query(
+            Product.id, Product.name, Product.slug, Product.brand,
+            Product.category_id, Product.is_active, Product.is_featured
+        ).filter(Product.is_active == True).all()
+        categories = db.query(Category.id, Category.name, Category.slug).all()
+
+        with self._lock:
+            self._entries = {}
+            self._brands = {}
+            self._brand_labels = {}
+            self._sales = {product_id: int(units) for product_id, units in sales.items()}
+
+            keys: List[Key] = []
+            category_weights: Dict[int, int] = {}
+            for product in products:
+                weight = self._register_product(product)
+                keys.extend(self._entry("product", product.id, product.name, product.slug, weight))
+                if product.category_id:
+                    category_weights[product.category_id] = category_weights.get(product.category_id, 0) + weight
+            for brand_key, members in self._brands.items():
+                keys.extend(self._entry("brand", brand_key, self._brand_labels[brand_key], None,
+                                        sum(members.values())))
+            for category in categories:
+                keys.extend(self._entry("category", category.id, category.name, category.slug,
+                                        category_weights.get(category.id, 0)))
+
+            keys.sort()
+            self._blocks = [keys[i:i + BLOCK_SIZE] for i in range(0, len(keys), BLOCK_SIZE)]
+            self._firsts = [block[0] for block in self._blocks]
+            self._ranked = [sorted(block, key=self._weight, reverse=True) for block in self._blocks]
+            # The snapshot may predate writes that committed while it was read
+            for change, args in self._pending:
+                change(*args)
+            self._results.clear()
+            self.loaded_at = time.monotonic() if self._generation == generation else None
+
+    def search(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Return the `limit` heaviest entries with a word starting with `prefix`"""
+        prefix = normalize(prefix)
+        if not prefix or not self._blocks:
+            return []
+
+        with self._lock:
+            cache_key = (prefix, limit)
+            cached = self._results.get(cache_key)
+            if cached is not None:
+                self._results.move_to_end(cache_key)
+                return cached
+
+            low, high = (prefix,), (prefix + _PREFIX_END,)
+            first = max(bisect_right(self._firsts, low) - 1, 0)
+            last = max(bisect_left(self._firsts, high) - 1, 0)
+
+            # Edge blocks may hold keys outside the range; inner blocks are fully inside
+            runs = []
+            for i in range(first, last + 1):
+                if i in (first, last):
+                    block = self._blocks[i]
+                    inside = block[bisect_left(block, low):bisect_left(block, high)]
+                    runs.append(sorted(inside, key=self._weight, reverse=True))
+                else:
+                    runs.append(self._ranked_block(i))
+
+            results: List[Dict[str, Any]] = []
+            seen = set()
+            for _, kind, ref in heapq.merge(*runs, key=self._weight, reverse=True):
+                if (kind, ref) in seen:
+                    continue
+                seen.add((kind, ref))
+                results.append(self._public(self._entries[(kind, ref)]))
+                if len(results) == limit:
+                    break
+
+            self._results[cache_key] = results
+            if len(self._results) > self._cache_size:
+                self._results.popitem(last=False)
+            return results
+
+    def upsert_product(self, product: Product) -> None:
+        """Add or refresh a product (and its brand) after a write"""
+        self._apply(self._upsert_product, _ProductRow(
+            product.id, product.name, product.slug, product.brand,
+            product.category_id, product.is_active, product.is_featured,
+        ))
+
+    def remove_product(self, product_id: int) -> None:
+        self._apply(self._drop_product, product_id)
+
+    def upsert_category(self, category: Category) -> None:
+        self._apply(self._upsert_category, category.id, category.name, category.slug)
+
+    def remove_category(self, category_id: int) -> None:
+        self._apply(self._drop, "category", category_id)
+
+    def _apply(self, change: Callable[..., None], *args) -> None:
+        """
+        Apply a write to the index being served, if any, and queue it for
+        the rebuild in progress, if any, which replays it once loaded
+        """
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((change, args))
+            if self._blocks:
+                change(*args)
+                self._results.clear()
+
+    def _upsert_product(self, product: _ProductRow) -> None:
+        self._drop_product(product.id)
+        if product.is_active:
+            weight = self._register_product(product)
+            self._put("product", product.id, product.name, product.slug, weight)
+            if product.brand:
+                self._refresh_brand(normalize(product.brand))
+
+    def _upsert_category(self, category_id: int, name: str, slug: str) -> None:
+        previous = self._entries.get(("category", category_id))
+        self._drop("category", category_id)
+        self._put("category", category_id, name, slug, previous["weight"] if previous else 0)
+
+    def _register_product(self, product) -> int:
+        """Record a product's weight against its brand; returns the weight"""
+        weight = self._sales.get(product.id, 0) + (FEATURED_BOOST if product.is_featured else 0) + 1
+        if product.brand:
+            brand_key = normalize(product.brand)
+            self._brands.setdefault(brand_key, {})[product.id] = weight
+            self._brand_labels.setdefault(brand_key, product.brand)
+        return weight
+
+    def _refresh_brand(self, brand_key: str) -> None:
+        """Re-index a brand after its member products changed"""
+        self._drop("brand", brand_key)
+        members = self._brands.get(brand_key)
+        if members:
+            self._put("brand", brand_key, self._brand_labels[brand_key], None, sum(members.values()))
+        else:
+            self._brands.pop(brand_key, None)
+            self._brand_labels.pop(brand_key, None)
+
+    def _drop_product(self, product_id: int) -> None:
+        self._drop("product", product_id)
+        for brand_key, members in list(self._brands.items()):
+            if members.pop(product_id, None) is not None:
+                self._refresh_brand(brand_key)
+
+    def _entry(self, kind: str, ref: Any, label: str, slug: Optional[str], weight: int) -> List[Key]:
+        """Store an entry's payload and return the keys it should be indexed under"""
+        words = normalize(label).split()
+        keys = [(" ".join(words[i:]), kind, ref) for i in range(len(words))]
+        self._entries[(kind, ref)] = {
+            "text": label, "type": kind, "id": ref, "slug": slug,
+            "weight": weight, "keys": keys,
+        }
+        return keys
+
+    def _put(self, kind: str, ref: Any, label: str, slug: Optional[str], weight: int) -> None:
+        for key in self._entry(kind, ref, label, slug, weight):
+            self._insert_key(key)
+
+    def _drop(self, kind: str, ref: Any) -> None:
+        entry = self._entries.pop((kind, ref), None)
+        if entry:
+            for key in entry["keys"]:
+                self._remove_key(key)
+
+    def _insert_key(self, key: Key) -> None:
+        if not self._blocks:
+            self._blocks, self._firsts, self._ranked = [[key]], [key], [None]
+            return
+
+        i = max(bisect_right(self._firsts, key) - 1, 0)
+        block = self._blocks[i]
+        insort(block, key)
+        self._firsts[i] = block[0]
+        self._ranked[i] = None
+
+        if len(block) > 2 * BLOCK_SIZE:
+            self._blocks[i:i + 1] = [block[:BLOCK_SIZE], block[BLOCK_SIZE:]]
+            self._firsts[i:i + 1] = [block[0], block[BLOCK_SIZE]]
+            self._ranked[i:i + 1] = [None, None]
+
+    def _remove_key(self, key: Key) -> None:
+        i = max(bisect_right(self._firsts, key) - 1, 0)
+        if i >= len(self._blocks):
+            return
+        block = self._blocks[i]
+        position = bisect_left(block, key)
+        if position == len(block) or block[position] != key:
+            return
+
+        del block[position]
+        if block:
+            self._firsts[i] = block[0]
+            self._ranked[i] = None
+        else:
+            del self._blocks[i], self._firsts[i], self._ranked[i]
+
+    def _ranked_block(self, i: int) -> List[Key]:
+        """Keys of block i ordered by weight, rebuilt after the block changes"""
+        if self._ranked[i] is None:
+            self._ranked[i] = sorted(self._blocks[i], key=self._weight, reverse=True)
+        return self._ranked[i]
+
+    def _weight(self, key: Key) -> int:
+        return self._entries[(key[1], key[2])]["weight"]
+
+    @staticmethod
+    def _public(entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "text": entry["text"],
+            "type": entry["type"],
+            "id": entry["id"] if entry["type"] != "brand" else None,
+            "slug": entry["slug"],
+        }
+
+
+# One index per worker process
+suggest_index = SuggestIndex()
@@ -0,0 +1,187 @@
+import hashlib
+import json
+from operator import itemgetter
+from typing import Any, Callable, Dict, IO, Iterator, Optional
+
+from sqlalchemy import text
+
+from app.core.catalog_version import bump_version, CATALOG
+from app.services.import_service import CatalogImportService, ImportRowError, IMPORT_BATCH_SIZE
+from app.services.product_service import product_cache
+from app.services.suggest_service import suggest_index
+
+# Parsed fields each content hash covers
+_PRODUCT_HASHED = itemgetter(
+    "slug", "name", "description", "category_id", "category_slug", "brand", "base_price",
+    "discount_percent", "is_active", "is_featured", "product_metadata",
+)
+_VARIANT_HASHED = itemgetter("sku", "variant_name", "price", "stock_qty", "attributes", "is_active")
+_IMAGE_HASHED = itemgetter("image_url", "alt_text", "is_primary", "order")
+
+# Canonical JSON (sorted keys) so reordered metadata does not change a hash
+_HASH_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"), default=str)
+
+# Products and variants a previous sync wrote that the feed no longer has.
+# Their hash is cleared, so they are written again if they come back.
+DEACTIVATE_PRODUCTS = """
+UPDATE products
+SET is_active = false, content_hash = NULL, updated_at = now()
+WHERE slug = ANY(:slugs) AND content_hash IS NOT NULL
+RETURNING id, slug
+"""
+
+DEACTIVATE_VARIANTS = """
+UPDATE product_variants
+SET is_active = false, content_hash = NULL
+WHERE sku = ANY(:skus) AND content_hash IS NOT NULL
+RETURNING product_id
+"""
+
+# A synced product is exactly what the feed says: empty fields clear the
+# stored value or reset it to its default. Only name and base_price, which
+# cannot be NULL, keep the stored value when left empty.
+UPDATE_PRODUCTS = """
+UPDATE products p
+SET slug = s.slug,
+    name = coalesce(s.name, p.name),
+    description = s.description,
+    category_id = s.category_id,
+    brand = s.brand,
+    base_price = coalesce(s.base_price, p.base_price),
+    discount_percent = coalesce(s.discount_percent, 0),
+    is_active = s.is_active,
+    is_featured = coalesce(s.is_featured, false),
+    product_metadata = s.product_metadata,
+    content_hash = s.content_hash,
+    updated_at = now()
+FROM import_products s
+WHERE p.id = s.product_id
+  AND (s.slug, coalesce(s.name, p.name), s.description, s.category_id, s.brand,
+       coalesce(s.base_price, p.base_price), coalesce(s.discount_percent, 0), s.is_active,
+       coalesce(s.is_featured, false), s.product_metadata, s.content_hash)
+      IS DISTINCT FROM
+      (p.slug, p.name, p.description, p.category_id, p.brand, p.base_price, p.discount_percent,
+       p.is_active, p.is_featured, p.product_metadata, p.content_hash)
+"""
+
+
+def content_hash(values: Any) -> str:
+    """Stable hex digest of parsed record values"""
+    return hashlib.md5(_HASH_ENCODER.encode(values).encode(), usedforsecurity=False).hexdigest()
+
+
+class CatalogSyncService(CatalogImportService):
+    """
+    Applies a full catalog feed, such as an hourly ERP export, as a delta
+
+    Products are keyed by slug and variants by SKU. Every product and
+    variant stores a hash of the record that last wrote it; incoming
+    records are hashed while parsing and only new or changed ones are
+    merged (with the importer's staging pipeline), so pushing an unchanged
+    feed reads the stored hashes once and writes nothing. Synced products
+    and variants missing from the feed are deactivated, unless the feed had
+    errors. Missing fields mean defaults here rather than "keep the stored
+    value", as the feed describes the whole catalog: product fields are
+    assigned as staged, and variants get explicit stock and attributes.
+    """
+
+    def sync_file(
+        self,
+        stream: IO[str],
+        file_format: str = "csv",
+        batch_size: int = IMPORT_BATCH_SIZE,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        deactivate_missing: bool = True,
+    ) -> Dict[str, Any]:
+        """Sync the catalog to a text stream of `file_format` ("csv" or "jsonl"); returns the report"""
+        self._stored_products = dict(self.db.execute(
+            text("SELECT slug, content_hash FROM products WHERE content_hash IS NOT NULL")
+        ).all())
+        self._stored_variants = dict(self.db.execute(
+            text("SELECT sku, content_hash FROM product_variants WHERE content_hash IS NOT NULL")
+        ).all())
+        self.db.commit()
+
+        report = self.import_file(stream, file_format=file_format, batch_size=batch_size, progress=progress)
+        if deactivate_missing:
+            # A partial feed must not deactivate what it failed to deliver
+            if report["error_count"]:
+                report["deactivation_skipped"] = "the feed had errors"
+            elif not report["rows"]:
+                report["deactivation_skipped"] = "the feed was empty"
+            else:
+                self._deactivate_missing()
+        return report
+
+    def _new_report(self) -> Dict[str, Any]:
+        report = super()._new_report()
+        report.update({
+            "products_unchanged": 0,
+            "variants_unchanged": 0,
+            "products_deactivated": 0,
+            "variants_deactivated": 0,
+        })
+        return report
+
+    def _product_fields(self, data: Dict[str, Any], line: int) -> Dict[str, Any]:
+        record = super()._product_fields(data, line)
+        if not record["slug"]:
+            raise ImportRowError("slug is required when syncing")
+        if record["is_active"] is None:
+            record["is_active"] = True
+        return record
+
+    def _variant_fields(self, data: Dict[str, Any], line: int, is_active_field: str = "is_active") -> Dict[str, Any]:
+        variant = super()._variant_fields(data, line, is_active_field)
+        if variant["is_active"] is None:
+            variant["is_active"] = True
+        if variant["stock_qty"] is None:
+            variant["stock_qty"] = 0
+        if variant["attributes"] is None:
+            variant["attributes"] = {}
+        return variant
+
+    def _update_products(self) -> int:
+        return self.db.execute(text(UPDATE_PRODUCTS)).rowcount
+
+    def _records(self, stream: IO[str], file_format: str) -> Iterator[Dict[str, Any]]:
+        """Only the records with something new: changed products keep just their changed variants"""
+        report = self._report
+        for record in super()._records(stream, file_format):
+            record["content_hash"] = content_hash(
+                [_PRODUCT_HASHED(record), [_IMAGE_HASHED(image) for image in record["images"]]]
+            )
+            changed = []
+            for variant in record["variants"]:
+                variant["content_hash"] = content_hash(_VARIANT_HASHED(variant))
+                if self._stored_variants.get(variant["sku"]) != variant["content_hash"]:
+                    changed.append(variant)
+            report["variants_unchanged"] += len(record["variants"]) - len(changed)
+            record["variants"] = changed
+
+            if self._stored_products.get(record["slug"]) == record["content_hash"]:
+                report["products_unchanged"] += 1
+                if not changed:
+                    continue
+            yield record
+
+    def _deactivate_missing(self) -> None:
+        slugs = [slug for slug in self._stored_products if slug not in self._seen_slugs]
+        skus = [sku for sku in self._stored_variants if sku not in self._seen_skus]
+        if not slugs and not skus:
+            return
+
+        products = self.db.execute(text(DEACTIVATE_PRODUCTS), {"slugs": slugs}).all() if slugs else []
+        variant_products = self.db.execute(text(DEACTIVATE_VARIANTS), {"skus": skus}).scalars().all() if skus else []
+        self.db.commit()
+        self._report["products_deactivated"] = len(products)
+        self._report["variants_deactivated"] = len(variant_products)
+
+        evict = set(variant_products)
+        for product_id, slug in products:
+            evict.update((product_id, f"slug:{slug}"))
+        if evict:
+            product_cache.evict(*evict)
+            bump_version(CATALOG)
+        if products:
+            suggest_index.invalidate()
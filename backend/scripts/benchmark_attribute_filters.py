@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Time product_metadata attribute filters against the containment GIN index.
+
+Seeds synthetic sarees with state, weave, fabric and occasion attributes
+inside a transaction that is rolled back at the end, then runs the listing
+query the API builds for one, two and three attributes:
+
+    python scripts/benchmark_attribute_filters.py --rows 1000000
+"""
+import argparse
+import json
+import statistics
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select, text
+from app.database import engine
+from app.models.product import Product
+from app.services.product_service import ProductService
+
+SEED_SQL = """
+INSERT INTO products (name, slug, brand, base_price, discount_percent, is_active, is_featured, product_metadata)
+SELECT
+    'Bench Saree ' || g,
+    'bench-attr-' || g,
+    'Tantuka',
+    500 + (g % 20000),
+    0,
+    true,
+    false,
+    jsonb_build_object(
+        'state', (ARRAY['Kerala', 'Odisha', 'Uttar Pradesh', 'Tamil Nadu', 'Maharashtra',
+                        'West Bengal', 'Gujarat', 'Andhra Pradesh', 'Assam', 'Telangana'])[1 + g % 10],
+        'weave', (ARRAY['Kasavu', 'Ikat', 'Chikankari', 'Kanjeevaram', 'Paithani', 'Jamdani', 'Patola'])[1 + g % 7],
+        'fabric', (ARRAY['Silk', 'Cotton', 'Tissue', 'Blend', 'Linen'])[1 + (g / 7) % 5],
+        'occasion', CASE WHEN g % 3 = 0 THEN jsonb_build_array('Wedding', 'Festive')
+                         ELSE jsonb_build_array('Casual') END
+    )
+FROM generate_series(1, :rows) AS g
+"""
+
+FILTERS = {
+    "fabric": {"fabric": ["silk"]},
+    "fabric+state": {"fabric": ["silk"], "state": ["kerala"]},
+    "fabric+state+occasion": {"fabric": ["silk"], "state": ["kerala"], "occasion": ["wedding"]},
+    "rare combination": {"fabric": ["linen"], "state": ["assam"], "weave": ["patola"]},
+}
+
+
+def explain_ms(conn, stmt):
+    """Return the server-side execution time of a statement in milliseconds"""
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = {
+        name: json.dumps(value) if isinstance(value, (dict, list)) else value
+        for name, value in compiled.params.items()
+    }
+    plan = conn.exec_driver_sql("EXPLAIN (ANALYZE, FORMAT JSON) " + compiled.string, params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Execution Time"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    service = ProductService(db=None)
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            print(f"Seeding {args.rows} products...")
+            conn.execute(text(SEED_SQL), {"rows": args.rows})
+            conn.execute(text("ANALYZE products"))
+
+            for name, attributes in FILTERS.items():
+                stmt = (
+                    select(Product.id)
+                    .where(*service.filter_conditions(attributes=attributes))
+                    .order_by(Product.created_at.desc(), Product.id.desc())
+                    .limit(20)
+                )
+                matches = conn.execute(
+                    select(func.count()).where(*service.filter_conditions(attributes=attributes))
+                ).scalar()
+                timings = [explain_ms(conn, stmt) for _ in range(args.repeat)]
+                print(f"  {name:24} {matches:9} matches   median {statistics.median(timings):9.2f} ms   "
+                      f"min {min(timings):9.2f} ms")
+        finally:
+            trans.rollback()
+
+
+if __name__ == "__main__":
+    main()
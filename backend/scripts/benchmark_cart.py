@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+Check concurrent add-to-cart and measure its throughput.
+
+Seeds a throwaway customer and product, then starts --threads threads that
+each add the same variant --adds times to the customer's (not yet existing)
+cart at once. Exactly one cart and one item must result, holding every
+added unit. Then adds across --variants variants are timed from one
+thread, reporting adds per second and statements per add. The seeded rows
+are deleted afterwards; exits non-zero if the concurrency check fails.
+
+    python scripts/benchmark_cart.py --threads 16 --adds 50
+"""
+import argparse
+import sys
+import os
+import threading
+import time
+import uuid
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app.core.query_budget import count_queries
+from app.database import engine, SessionLocal
+from app.schemas.cart import CartItemCreate
+from app.services.cart_service import CartService
+
+SEED_SQL = """
+WITH category AS (
+    INSERT INTO categories (name, slug) VALUES (:tag, :tag) RETURNING id
+), product AS (
+    INSERT INTO products (name, slug, category_id, base_price, is_active)
+    SELECT 'Benchmark Saree', :tag, category.id, 1000, true FROM category
+    RETURNING id
+)
+INSERT INTO product_variants (product_id, sku, variant_name, price, stock_qty, is_active)
+SELECT product.id, :tag || '-' || v, 'Variant ' || v, 1000 + v, 100, true
+FROM product, generate_series(1, :variants) AS v
+"""
+
+
+def add_concurrently(user_id, variant_id, threads, adds):
+    """Add the variant from all threads at once; returns the errors raised"""
+    barrier = threading.Barrier(threads)
+    errors = []
+
+    def worker():
+        db = SessionLocal()
+        try:
+            service = CartService(db)
+            barrier.wait()
+            for _ in range(adds):
+                service.add_to_cart(user_id, CartItemCreate(variant_id=variant_id, quantity=1))
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            db.close()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--adds", type=int, default=50, help="adds per thread in the concurrency check")
+    parser.add_argument("--variants", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=2000, help="adds in the throughput run")
+    args = parser.parse_args()
+
+    tag = f"bench-cart-{uuid.uuid4().hex[:8]}"
+    with engine.begin() as conn:
+        user_id = conn.execute(text(
+            "INSERT INTO users (email, password_hash, role, is_active) "
+            "VALUES (:email, 'x', 'customer', true) RETURNING id"
+        ), {"email": f"{tag}@example.com"}).scalar()
+        conn.execute(text(SEED_SQL), {"tag": tag, "variants": args.variants})
+        variant_ids = conn.execute(
+            text("SELECT id FROM product_variants WHERE sku LIKE :prefix ORDER BY id"),
+            {"prefix": f"{tag}-%"}
+        ).scalars().all()
+
+    try:
+        errors = add_concurrently(user_id, variant_ids[0], args.threads, args.adds)
+        with engine.connect() as conn:
+            carts = conn.execute(text("SELECT count(*) FROM carts WHERE user_id = :id"), {"id": user_id}).scalar()
+            items = conn.execute(text(
+                "SELECT count(*), coalesce(sum(quantity), 0) FROM cart_items "
+                "JOIN carts ON carts.id = cart_items.cart_id WHERE carts.user_id = :id"
+            ), {"id": user_id}).first()
+        expected = args.threads * args.adds
+        passed = not errors and carts == 1 and items[0] == 1 and items[1] == expected
+        print(f"concurrency    {args.threads} threads x {args.adds} adds: {carts} cart, {items[0]} item, "
+              f"quantity {items[1]}/{expected}, {len(errors)} errors -> {'ok' if passed else 'FAILED'}")
+        for exc in errors[:3]:
+            print(f"  {exc!r}")
+
+        db = SessionLocal()
+        try:
+            service = CartService(db)
+            with count_queries(engine) as counter:
+                started = time.perf_counter()
+                for i in range(args.repeat):
+                    variant_id = variant_ids[i % len(variant_ids)]
+                    service.add_to_cart(user_id, CartItemCreate(variant_id=variant_id, quantity=1))
+                elapsed = time.perf_counter() - started
+        finally:
+            db.close()
+        print(f"throughput     {args.repeat / elapsed:8.0f} adds/s   {elapsed / args.repeat * 1000:6.2f} ms/add   "
+              f"{counter.count / args.repeat:.1f} statements/add")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM carts WHERE user_id = :id"), {"id": user_id})
+            conn.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+            conn.execute(text("DELETE FROM products WHERE slug = :tag"), {"tag": tag})
+            conn.execute(text("DELETE FROM categories WHERE slug = :tag"), {"tag": tag})
+
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Compare the full product listing with the card projection.
+
+Seeds a throwaway category of products with variants and images, then
+requests 100-item pages from /products and /products/cards through the app,
+reporting latency and peak Python memory (tracemalloc) per page. The
+seeded rows are deleted afterwards.
+
+    python scripts/benchmark_listing.py --products 2000
+"""
+import argparse
+import statistics
+import sys
+import os
+import time
+import tracemalloc
+import uuid
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.main import app
+from app.database import engine
+
+SEED_SQL = """
+WITH category AS (
+    INSERT INTO categories (name, slug) VALUES (:tag, :tag) RETURNING id
+), products AS (
+    INSERT INTO products (name, slug, description, category_id, brand, base_price, discount_percent, is_active, is_featured)
+    SELECT 'Benchmark Saree ' || g, :tag || '-' || g, repeat('Handwoven silk with zari border. ', 8),
+           category.id, 'Tantuka', 1000 + g, 10, true, false
+    FROM category, generate_series(1, :products) AS g
+    RETURNING id
+), variants AS (
+    INSERT INTO product_variants (product_id, sku, variant_name, price, stock_qty, attributes, is_active)
+    SELECT products.id, :tag || '-' || products.id || '-' || v, 'Variant ' || v, 1000 + v, v,
+           json_build_object('color', 'red', 'size', v), true
+    FROM products, generate_series(1, :variants) AS v
+)
+INSERT INTO product_images (product_id, image_url, alt_text, is_primary, "order")
+SELECT products.id, 'https://cdn.example.com/' || products.id || '/' || i || '.jpg', 'Image ' || i, i = 1, i
+FROM products, generate_series(1, :images) AS i
+"""
+
+
+def measure(client, url, repeat):
+    """Median latency, and peak traced memory, of GET url"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+
+    # Traced separately, as tracemalloc itself slows the request down
+    tracemalloc.start()
+    client.get(url)
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return statistics.median(timings), peak, len(response.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--variants", type=int, default=4)
+    parser.add_argument("--images", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    tag = f"bench-listing-{uuid.uuid4().hex[:8]}"
+    with engine.begin() as conn:
+        conn.execute(text(SEED_SQL), {"tag": tag, "products": args.products,
+                                      "variants": args.variants, "images": args.images})
+        category_id = conn.execute(text("SELECT id FROM categories WHERE slug = :tag"), {"tag": tag}).scalar()
+
+    client = TestClient(app)
+    try:
+        query = f"?category_id={category_id}&limit=100&sort_by=created_at&sort_order=desc"
+        for name, path in (("full listing", "/api/v1/products/"), ("cards", "/api/v1/products/cards")):
+            client.get(path + query)  # warm up
+            latency, peak, size = measure(client, path + query, args.repeat)
+            print(f"{name:14} median {latency:8.2f} ms   peak {peak:9.1f} KiB   body {size / 1024:7.1f} KiB")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM products WHERE category_id = :id"), {"id": category_id})
+            conn.execute(text("DELETE FROM categories WHERE id = :id"), {"id": category_id})
+
+
+if __name__ == "__main__":
+    main()
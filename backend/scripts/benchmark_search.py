@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Compare the indexed full-text product search with the old ILIKE scan.
+
+Seeds synthetic products inside a transaction that is rolled back at the
+end, so it can be pointed at a development database:
+
+    python scripts/benchmark_search.py --rows 500000
+"""
+import argparse
+import json
+import statistics
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.database import engine
+
+SEED_SQL = """
+INSERT INTO products (name, slug, description, brand, base_price, discount_percent, is_active, is_featured)
+SELECT
+    (ARRAY['Banarasi', 'Kanjeevaram', 'Chikankari', 'Paithani', 'Sambalpuri', 'Kasavu'])[1 + g % 6]
+        || ' ' || (ARRAY['Silk', 'Cotton', 'Georgette', 'Linen', 'Chiffon'])[1 + g % 5]
+        || ' Saree ' || g
+        || CASE WHEN g % 1000 = 0 THEN ' Pochampally' ELSE '' END,
+    'bench-search-' || g,
+    'Handwoven ' || (ARRAY['zari border', 'temple motif', 'floral jaal', 'checks', 'ikat weave'])[1 + g % 5]
+        || ' drape for ' || (ARRAY['weddings', 'festivals', 'office wear', 'parties'])[1 + g % 4],
+    (ARRAY['Tantuka', 'Weavers Guild', 'Loom House', 'Heritage Looms'])[1 + g % 4],
+    500 + (g % 20000),
+    0,
+    true,
+    g % 50 = 0
+FROM generate_series(1, :rows) AS g
+"""
+
+# Every word must match somewhere, as with the full-text queries
+ILIKE_WORD = "(name ILIKE :w{i} OR description ILIKE :w{i} OR brand ILIKE :w{i})"
+
+QUERIES = {
+    "ilike": """
+        SELECT id FROM products
+        WHERE {ilike_words}
+        ORDER BY created_at DESC, id DESC
+        LIMIT 20
+    """,
+    "fulltext": """
+        SELECT id FROM products
+        WHERE search_vector @@ websearch_to_tsquery('english', :search)
+        ORDER BY ts_rank_cd(search_vector, websearch_to_tsquery('english', :search)) DESC, id DESC
+        LIMIT 20
+    """,
+    "fulltext_newest": """
+        SELECT id FROM products
+        WHERE search_vector @@ websearch_to_tsquery('english', :search)
+        ORDER BY created_at DESC, id DESC
+        LIMIT 20
+    """,
+    "fulltext_prefix": """
+        SELECT id FROM products
+        WHERE search_vector @@ to_tsquery('english', :prefix)
+        ORDER BY ts_rank_cd(search_vector, to_tsquery('english', :prefix)) DESC, id DESC
+        LIMIT 20
+    """,
+}
+
+
+def explain_ms(conn, sql, params):
+    """Return the server-side execution time of a query in milliseconds"""
+    plan = conn.execute(text("EXPLAIN (ANALYZE, FORMAT JSON) " + sql), params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Execution Time"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--term", action="append", dest="terms",
+                        help="search term to time (repeatable)")
+    args = parser.parse_args()
+    terms = args.terms or ["pochampally", "kasavu linen", "silk saree"]
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            print(f"Seeding {args.rows} products...")
+            conn.execute(text(SEED_SQL), {"rows": args.rows})
+            conn.execute(text("ANALYZE products"))
+
+            for term in terms:
+                words = term.split()
+                params = {f"w{i}": f"%{word}%" for i, word in enumerate(words)}
+                params["search"] = term
+                params["prefix"] = " & ".join(f"{word[:4]}:*" for word in words)
+                ilike_words = " AND ".join(ILIKE_WORD.format(i=i) for i in range(len(words)))
+
+                print(f"\n{term!r}")
+                for name, sql in QUERIES.items():
+                    sql = sql.replace("{ilike_words}", ilike_words)
+                    timings = [explain_ms(conn, sql, params) for _ in range(args.repeat)]
+                    print(f"  {name:16} median {statistics.median(timings):9.2f} ms   "
+                          f"min {min(timings):9.2f} ms")
+        finally:
+            trans.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Export every product with its variants and images as CSV or NDJSON.
+
+Rows are streamed from a server-side cursor, so memory stays flat however
+large the catalog is. Paths ending in .gz are gzip-compressed on the fly;
+"-" writes to stdout. The output can be imported again with
+scripts/import_catalog.py:
+
+    python scripts/export_catalog.py catalog.csv.gz
+"""
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.export_service import CatalogExportService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help='output file, or "-" for stdout')
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="default: from the file extension")
+    parser.add_argument("--gzip", action="store_true", default=None, help="default: when the path ends in .gz")
+    args = parser.parse_args()
+
+    name = args.path[:-3] if args.path.endswith(".gz") else args.path
+    file_format = args.format or ("ndjson" if name.endswith((".ndjson", ".jsonl")) else "csv")
+    compress = args.gzip if args.gzip is not None else args.path.endswith(".gz")
+
+    db = SessionLocal()
+    written = 0
+    try:
+        out = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+        try:
+            for chunk in CatalogExportService(db).export(file_format, compress=compress):
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+    finally:
+        db.close()
+    print(f"Wrote {written} bytes", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Render missing WebP/JPEG derivatives of uploaded product images.
+
+Uploads are rendered in the web worker's process pool; an image whose
+rendering was lost (e.g. to a restart) keeps empty derivatives until this
+script renders it from the stored original. --all renders every uploaded
+image again, e.g. after IMAGE_WIDTHS changed:
+
+    python scripts/generate_image_derivatives.py --workers 4
+"""
+import argparse
+import sys
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.models.product import ProductImage
+from app.core.storage import get_storage
+from app.services.image_service import render_derivatives, save_derivatives, IMAGE_WORKERS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--all", action="store_true", help="render images that have derivatives as well")
+    parser.add_argument("--workers", type=int, default=IMAGE_WORKERS)
+    args = parser.parse_args()
+
+    storage = get_storage()
+    base_url = storage.url("")
+    db = SessionLocal()
+    try:
+        query = db.query(ProductImage.content_hash, ProductImage.image_url).filter(ProductImage.content_hash.isnot(None))
+        if not args.all:
+            query = query.filter(ProductImage.derivatives.is_(None))
+        # Images sharing content share their files; one original per hash is enough
+        originals = dict(query.all())
+        print(f"{len(originals)} images to render")
+
+        pending = list(originals.items())
+        # A few originals per worker in memory at a time
+        chunk_size = args.workers * 4
+        failed = 0
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for start in range(0, len(pending), chunk_size):
+                futures = {
+                    pool.submit(render_derivatives, content_hash, storage.read(image_url[len(base_url):])): content_hash
+                    for content_hash, image_url in pending[start:start + chunk_size]
+                }
+                for future in as_completed(futures):
+                    content_hash = futures[future]
+                    try:
+                        save_derivatives(db, content_hash, future.result())
+                    except Exception as exc:
+                        failed += 1
+                        print(f"  {content_hash}: {exc}")
+                print(f"  {min(start + chunk_size, len(pending))} rendered", flush=True)
+    finally:
+        db.close()
+
+    print(f"Done, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Import products, variants and images from a CSV or JSONL file.
+
+CSV files have one row per variant: the product columns (slug, name,
+description, category, brand, base_price, discount_percent, is_active,
+is_featured, product_metadata and attr.* columns) followed by the variant
+columns (sku, variant_name, price, stock_qty, attributes, variant_is_active
+and variant.* columns) and an optional "images" column of "|"-separated
+URLs. JSONL files have one product per line, shaped like the product create
+request. Gzipped files (.gz) are read as they are.
+
+Variants are upserted by SKU, so a file can be imported again to apply
+price and stock changes:
+
+    python scripts/import_catalog.py collection.csv --batch-size 5000
+
+With --sync the file is treated as the full catalog (every product needs a
+slug): unchanged records are skipped by content hash and synced products
+and variants missing from the file are deactivated.
+"""
+import argparse
+import gzip
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.import_service import CatalogImportService, IMPORT_BATCH_SIZE
+from app.services.sync_service import CatalogSyncService
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    return "jsonl" if name.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def print_progress(report):
+    variants = report["variants_created"] + report["variants_updated"]
+    rate = report["rows"] / report["seconds"] if report["seconds"] else 0
+    print(f"  {report['rows']:9} rows  {variants:9} variants written  "
+          f"{report['error_count']:6} errors  {rate:9.0f} rows/s", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--sync", action="store_true", help="apply the file as a full catalog feed")
+    parser.add_argument("--keep-missing", action="store_true", help="with --sync, do not deactivate missing items")
+    parser.add_argument("--show-errors", type=int, default=20, help="errors to print at the end")
+    args = parser.parse_args()
+
+    opener = gzip.open if args.path.endswith(".gz") else open
+    db = SessionLocal()
+    try:
+        with opener(args.path, "rt", encoding="utf-8-sig", newline="") as stream:
+            options = dict(
+                file_format=args.format or detect_format(args.path),
+                batch_size=args.batch_size,
+                progress=print_progress,
+            )
+            if args.sync:
+                report = CatalogSyncService(db).sync_file(stream, deactivate_missing=not args.keep_missing, **options)
+            else:
+                report = CatalogImportService(db).import_file(stream, **options)
+    finally:
+        db.close()
+
+    print(f"Products: {report['products_created']} created, {report['products_updated']} updated")
+    print(f"Variants: {report['variants_created']} created, {report['variants_updated']} updated")
+    if args.sync:
+        print(f"Unchanged: {report['products_unchanged']} products, {report['variants_unchanged']} variants")
+        print(f"Deactivated: {report['products_deactivated']} products, {report['variants_deactivated']} variants"
+              + (f" (skipped: {report['deactivation_skipped']})" if "deactivation_skipped" in report else ""))
+    print(f"Images:   {report['images_added']} added")
+    print(f"Errors:   {report['error_count']} in {report['seconds']:.1f}s")
+    for error in report["errors"][:args.show_errors]:
+        sku = f" [{error['sku']}]" if "sku" in error else ""
+        print(f"  line {error['line']}{sku}: {error['error']}")
+    return 1 if report["error_count"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
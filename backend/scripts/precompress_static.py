@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Write .br and .gz siblings next to static assets, for serving precompressed.
+
+The app's static mounts send a sibling instead of the file when the client
+accepts its encoding, so compression costs nothing per request. Run it as
+part of the build, for app/static by default or any other directories:
+
+    python scripts/precompress_static.py app/static ../frontend/out
+
+Siblings are only kept when they save at least --min-saving of the file,
+and are rewritten only when the file is newer than them.
+"""
+import argparse
+import sys
+import os
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.compression import compress, ENCODINGS, PRECOMPRESSED_EXTENSIONS, COMPRESSION_MIN_SIZE
+
+
+def precompress(path: Path, min_saving: float) -> int:
+    """Write the siblings of one file that are worth it; returns bytes saved by the best one"""
+    data = None
+    saved = 0
+    for coding, suffix in ENCODINGS:
+        sibling = path.with_name(path.name + suffix)
+        if sibling.exists() and sibling.stat().st_mtime >= path.stat().st_mtime:
+            saved = max(saved, path.stat().st_size - sibling.stat().st_size)
+            continue
+        if data is None:
+            data = path.read_bytes()
+        encoded = compress(data, coding, maximum=True)
+        if len(encoded) <= len(data) * (1 - min_saving):
+            sibling.write_bytes(encoded)
+            saved = max(saved, len(data) - len(encoded))
+        elif sibling.exists():
+            sibling.unlink()
+    return saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directories", nargs="*", default=[str(Path(__file__).resolve().parents[1] / "app" / "static")])
+    parser.add_argument("--min-saving", type=float, default=0.1, help="fraction of the size a sibling must save")
+    args = parser.parse_args()
+
+    files = total = saved = 0
+    for directory in args.directories:
+        for path in sorted(Path(directory).rglob("*")):
+            if not path.is_file() or not path.name.endswith(PRECOMPRESSED_EXTENSIONS):
+                continue
+            if path.stat().st_size < COMPRESSION_MIN_SIZE:
+                continue
+            files += 1
+            total += path.stat().st_size
+            saved += precompress(path, args.min_saving)
+
+    print(f"{files} files, {total} bytes, {saved} bytes saved by the smallest encodings")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
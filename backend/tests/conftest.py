@@ -0,0 +1,30 @@
+import os
+import sys
+import uuid
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import text
+
+from app.database import SessionLocal, engine
+
+
+@pytest.fixture
+def db():
+    """A session on the database in DATABASE_URL"""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def tag():
+    """A unique slug for the rows a test seeds; products and categories with it are deleted afterwards"""
+    tag = f"test-{uuid.uuid4().hex[:8]}"
+    yield tag
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM products WHERE slug LIKE :prefix"), {"prefix": f"{tag}%"})
+        conn.execute(text("DELETE FROM categories WHERE slug LIKE :prefix"), {"prefix": f"{tag}%"})
@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from app.database import engine, SessionLocal
+from app.schemas.cart import CartItemCreate
+from app.services.cart_service import CartService
+
+THREADS = 8
+ADDS_PER_THREAD = 20
+
+
+@pytest.fixture
+def variant(tag):
+    """A customer without a cart and an active variant; returns (user id, variant id)"""
+    with engine.begin() as conn:
+        user_id = conn.execute(text(
+            "INSERT INTO users (email, password_hash, role, is_active) "
+            "VALUES (:email, 'x', 'customer', true) RETURNING id"
+        ), {"email": f"{tag}@example.com"}).scalar()
+        variant_id = conn.execute(text("""
+            WITH product AS (
+                INSERT INTO products (name, slug, base_price, is_active)
+                VALUES ('Concurrency Saree', :tag, 1000, true)
+                RETURNING id
+            )
+            INSERT INTO product_variants (product_id, sku, variant_name, price, stock_qty, is_active)
+            SELECT id, :tag, 'Free size', 1000, 1000, true FROM product
+            RETURNING id
+        """), {"tag": tag}).scalar()
+    yield user_id, variant_id
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM carts WHERE user_id = :id"), {"id": user_id})
+        conn.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+
+
+def test_concurrent_adds_make_one_cart_and_one_item(variant):
+    user_id, variant_id = variant
+    barrier = threading.Barrier(THREADS)
+    errors = []
+
+    def add():
+        db = SessionLocal()
+        try:
+            service = CartService(db)
+            barrier.wait()
+            for _ in range(ADDS_PER_THREAD):
+                service.add_to_cart(user_id, CartItemCreate(variant_id=variant_id, quantity=1))
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=add) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with engine.connect() as conn:
+        carts = conn.execute(text("SELECT count(*) FROM carts WHERE user_id = :id"), {"id": user_id}).scalar()
+        items = conn.execute(text(
+            "SELECT count(*), sum(quantity) FROM cart_items "
+            "JOIN carts ON carts.id = cart_items.cart_id WHERE carts.user_id = :id"
+        ), {"id": user_id}).one()
+    assert carts == 1
+    assert tuple(items) == (1, THREADS * ADDS_PER_THREAD)
@@ -0,0 +1,65 @@
+import io
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.import_service import CatalogImportService
+
+CSV_HEADER = "slug,name,base_price,sku,variant_name,price,stock_qty\n"
+
+
+def parse_csv(text):
+    """Records and report of parsing a CSV, without touching the database"""
+    service = CatalogImportService(db=None)
+    records = list(service.parse_file(io.StringIO(text), "csv"))
+    return records, service.report
+
+
+def test_rows_leaving_product_columns_empty_are_variants_of_the_product():
+    records, report = parse_csv(
+        CSV_HEADER
+        + "red-saree,Red Saree,1000,RS-S,S,1000,5\n"
+        + ",,,RS-M,M,1010,5\n"
+        + ",,,RS-L,L,1020,5\n"
+    )
+    assert report["error_count"] == 0
+    assert len(records) == 1
+    assert records[0]["slug"] == "red-saree"
+    assert [variant["sku"] for variant in records[0]["variants"]] == ["RS-S", "RS-M", "RS-L"]
+
+
+def test_rows_repeating_the_name_without_slug_are_variants_of_the_product():
+    records, report = parse_csv(
+        CSV_HEADER
+        + "red-saree,Red Saree,1000,RS-S,S,1000,5\n"
+        + ",Red Saree,1000,RS-M,M,1010,5\n"
+        + "blue-saree,Blue Saree,900,BS-S,S,900,5\n"
+        + ",Blue Saree,,BS-M,M,910,5\n"
+        + ",,,BS-L,L,920,5\n"
+    )
+    assert report["error_count"] == 0
+    assert [record["slug"] for record in records] == ["red-saree", "blue-saree"]
+    assert [len(record["variants"]) for record in records] == [2, 3]
+
+
+def test_a_different_name_starts_a_new_product():
+    records, report = parse_csv(
+        CSV_HEADER
+        + ",Red Saree,1000,RS-S,S,1000,5\n"
+        + ",Red Saree,1000,RS-M,M,1010,5\n"
+        + ",Green Saree,800,GS-S,S,800,5\n"
+    )
+    assert report["error_count"] == 0
+    assert [record["name"] for record in records] == ["Red Saree", "Green Saree"]
+    assert [len(record["variants"]) for record in records] == [2, 1]
+
+
+def test_prices_that_round_out_of_range_are_row_errors():
+    records, report = parse_csv(
+        CSV_HEADER
+        + "red-saree,Red Saree,99999999.995,RS-S,S,1000,5\n"
+        + "blue-saree,Blue Saree,900,BS-S,S,99999999.99,5\n"
+    )
+    assert report["error_count"] == 1
+    assert report["errors"][0]["line"] == 2
+    assert [record["slug"] for record in records] == ["blue-saree"]
@@ -0,0 +1,109 @@
+"""
+The catalog read endpoints stay within their query budget
+
+Every endpoint is called through the app against a seeded category of
+products, each with several variants and images, and must issue no more
+statements than its budget, whatever the page size, and read no more rows
+than the products, variants and images it returns (more would mean a
+cartesian join or an N+1 pattern crept back in). Cached products and
+facets are dropped before every call, so each one is measured against the
+database.
+"""
+from itertools import chain
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import engine
+from app.models.category import Category
+from app.models.product import Product, ProductVariant, ProductImage
+from app.core.query_budget import query_budget
+from app.services.product_service import product_cache, _facet_cache
+
+PRODUCTS = 60
+VARIANTS_PER_PRODUCT = 4
+IMAGES_PER_PRODUCT = 3
+PRODUCT_ROWS = 1 + VARIANTS_PER_PRODUCT + IMAGES_PER_PRODUCT
+
+# Maximum statements per endpoint, independent of page size
+BUDGETS = {
+    "list": 3,
+    "cards": 1,
+    "detail": 3,
+    "detail_by_slug": 3,
+    "batch": 3,
+    "facets": 1,
+}
+
+
+@pytest.fixture
+def catalog(db, tag):
+    """A category of PRODUCTS products; returns its id and the (id, slug) of its products"""
+    category = Category(name=f"Budget check {tag}", slug=tag)
+    db.add(category)
+    db.flush()
+    for i in range(PRODUCTS):
+        product = Product(
+            name=f"Budget check product {i}",
+            slug=f"{tag}-{i}",
+            category_id=category.id,
+            base_price=1000 + i,
+            discount_percent=0,
+        )
+        product.variants = [
+            ProductVariant(sku=f"{tag}-{i}-{v}", price=1000 + i, stock_qty=5)
+            for v in range(VARIANTS_PER_PRODUCT)
+        ]
+        product.images = [
+            ProductImage(image_url=f"https://example.com/{tag}/{i}/{n}.jpg", order=n)
+            for n in range(IMAGES_PER_PRODUCT)
+        ]
+        db.add(product)
+    db.commit()
+    products = sorted((product.id, product.slug) for product in category.products)
+    return category.id, products
+
+
+@pytest.fixture
+def within_budget(catalog):
+    """Call an endpoint with cold caches and assert it stays within its budget"""
+    _, products = catalog
+    client = TestClient(app)
+
+    def check(name, url, max_rows):
+        product_cache.evict(*chain.from_iterable((product_id, f"slug:{slug}") for product_id, slug in products))
+        _facet_cache.clear()
+        with query_budget(engine, BUDGETS[name], max_rows):
+            response = client.get(url)
+        assert response.status_code == 200, response.text
+        return response
+
+    return check
+
+
+def test_detail(catalog, within_budget):
+    _, products = catalog
+    product_id, slug = products[0]
+    within_budget("detail", f"/api/v1/products/{product_id}", PRODUCT_ROWS)
+    within_budget("detail_by_slug", f"/api/v1/products/slug/{slug}", PRODUCT_ROWS)
+
+
+def test_facets(catalog, within_budget):
+    category_id, _ = catalog
+    # Facet rows depend on the distinct values, not on a page size
+    within_budget("facets", f"/api/v1/products/facets?category_id={category_id}", None)
+
+
+@pytest.mark.parametrize("limit", [1, 10, PRODUCTS])
+def test_pages(catalog, within_budget, limit):
+    category_id, products = catalog
+    within_budget("list", f"/api/v1/products/?category_id={category_id}&limit={limit}", limit * PRODUCT_ROWS)
+    within_budget("cards", f"/api/v1/products/cards?category_id={category_id}&limit={limit}", limit)
+
+    # Half the page by id and the rest by slug
+    half = (limit + 1) // 2
+    ids = ",".join(str(product_id) for product_id, _ in products[:half])
+    slugs = ",".join(slug for _, slug in products[half:limit])
+    response = within_budget("batch", f"/api/v1/products/batch?ids={ids}&slugs={slugs}", limit * PRODUCT_ROWS)
+    assert len(response.json()["products"]) == limit
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+from app.models.category import Category
+from app.services.suggest_service import SuggestIndex
+
+
+class WriteDuringLoad:
+    """A session that runs `write` after the rebuild has read the products"""
+
+    def __init__(self, db, write):
+        self.db = db
+        self.write = write
+
+    def query(self, *columns):
+        if columns[0] is Category.id:
+            self.write()
+        return self.db.query(*columns)
+
+
+def product(id, name):
+    return SimpleNamespace(id=id, name=name, slug=f"p-{id}", brand=None, category_id=None,
+                           is_active=True, is_featured=False)
+
+
+def test_writes_during_the_first_build_are_replayed(db, tag):
+    index = SuggestIndex()
+    index.rebuild(WriteDuringLoad(db, lambda: index.upsert_product(product(-1, f"{tag} saree"))))
+    assert [entry["id"] for entry in index.search(tag)] == [-1]
+
+
+def test_writes_during_a_rebuild_survive_the_swap(db, tag):
+    index = SuggestIndex()
+    index.rebuild(db)
+    index.upsert_product(product(-1, f"{tag} saree"))
+    index.invalidate()
+
+    def write():
+        index.upsert_product(product(-2, f"{tag} dupatta"))
+        index.remove_product(-1)
+
+    index.rebuild(WriteDuringLoad(db, write))
+    assert [entry["id"] for entry in index.search(tag)] == [-2]
+    assert not index.is_stale
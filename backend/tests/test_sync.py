@@ -0,0 +1,36 @@
+import io
+import json
+
+from app.models.product import Product
+from app.services.sync_service import CatalogSyncService
+
+
+def sync(db, *records):
+    """Sync JSONL records without deactivating the rest of the catalog"""
+    feed = "".join(json.dumps(record) + "\n" for record in records)
+    return CatalogSyncService(db).sync_file(io.StringIO(feed), "jsonl", deactivate_missing=False)
+
+
+def test_fields_dropped_from_the_feed_are_cleared(db, tag):
+    product = {"slug": tag, "name": "Sync Saree", "base_price": 1000, "variants": [{"sku": f"{tag}-1", "price": 1000}]}
+    report = sync(db, {
+        **product,
+        "description": "Handwoven",
+        "brand": "Tantuka",
+        "discount_percent": 20,
+        "product_metadata": {"fabric": "silk"},
+        "variants": [{"sku": f"{tag}-1", "price": 1000, "stock_qty": 3, "attributes": {"size": "M"}}],
+    })
+    assert report["error_count"] == 0 and report["products_created"] == 1
+
+    report = sync(db, product)
+    assert report["error_count"] == 0 and report["products_updated"] == 1
+    stored = db.query(Product).filter(Product.slug == tag).one()
+    assert (stored.description, stored.brand, stored.product_metadata) == (None, None, None)
+    assert stored.discount_percent == 0
+    assert stored.final_price == stored.min_variant_price == 1000
+    assert (stored.variants[0].stock_qty, stored.variants[0].attributes) == (0, {})
+
+    db.rollback()
+    report = sync(db, product)
+    assert report["products_unchanged"] == 1 and report["products_updated"] == 0
@@ -0,0 +1,30 @@
+"""Product keyset pagination indexes
+
+Revision ID: 7c2e9a41d8f3
+Revises: 4eda65bf5cfd
+Create Date: 2026-10-18 09:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e9a41d8f3'
+down_revision: Union[str, None] = '4eda65bf5cfd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_products_created_at_id', 'products', ['created_at', 'id'], unique=False)
+    op.create_index('ix_products_base_price_id', 'products', ['base_price', 'id'], unique=False)
+    op.create_index('ix_products_name_id', 'products', ['name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_name_id', table_name='products')
+    op.drop_index('ix_products_base_price_id', table_name='products')
+    op.drop_index('ix_products_created_at_id', table_name='products')
@@ -0,0 +1,30 @@
+"""Index product foreign keys
+
+Revision ID: 3d5a0e9b7c14
+Revises: b81f4d0c6e27
+Create Date: 2026-10-18 09:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d5a0e9b7c14'
+down_revision: Union[str, None] = 'b81f4d0c6e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_products_category_id'), 'products', ['category_id'], unique=False)
+    op.create_index(op.f('ix_product_variants_product_id'), 'product_variants', ['product_id'], unique=False)
+    op.create_index(op.f('ix_product_images_product_id'), 'product_images', ['product_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_product_images_product_id'), table_name='product_images')
+    op.drop_index(op.f('ix_product_variants_product_id'), table_name='product_variants')
+    op.drop_index(op.f('ix_products_category_id'), table_name='products')
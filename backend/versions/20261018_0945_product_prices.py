@@ -0,0 +1,125 @@
+"""Stored product final price and variant price range
+
+Revision ID: 5f0b7d2c9a31
+Revises: 3d5a0e9b7c14
+Create Date: 2026-10-18 09:45:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f0b7d2c9a31'
+down_revision: Union[str, None] = '3d5a0e9b7c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Computes final_price and the variant range whenever a product's own
+# prices change. The range is what the cart charges: each active variant
+# price less the product's discount, rounded as final_price is. Products
+# without active variants get final_price as range.
+PRODUCT_PRICES_FUNCTION = """
+CREATE FUNCTION products_set_prices() RETURNS trigger AS $$
+DECLARE
+    lowest numeric;
+    highest numeric;
+    factor numeric := 1 - coalesce(NEW.discount_percent, 0) / 100;
+BEGIN
+    NEW.final_price := round(NEW.base_price * factor, 2);
+
+    SELECT min(round(price * factor, 2)), max(round(price * factor, 2)) INTO lowest, highest
+    FROM product_variants
+    WHERE product_id = NEW.id AND is_active;
+
+    NEW.min_variant_price := coalesce(lowest, NEW.final_price);
+    NEW.max_variant_price := coalesce(highest, NEW.final_price);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Re-aggregates the variant range once per statement for every product whose
+# variants were touched, so bulk variant writes cost one UPDATE of products.
+# Rows are only rewritten when the range actually changed.
+VARIANT_PRICES_FUNCTION = """
+CREATE FUNCTION product_variants_sync_prices() RETURNS trigger AS $$
+DECLARE
+    product_ids integer[] := '{}';
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        product_ids := product_ids || ARRAY(SELECT product_id FROM new_rows);
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        product_ids := product_ids || ARRAY(SELECT product_id FROM old_rows);
+    END IF;
+
+    UPDATE products p
+    SET min_variant_price = coalesce(r.lowest, p.final_price),
+        max_variant_price = coalesce(r.highest, p.final_price)
+    FROM (
+        SELECT ids.product_id,
+               min(round(v.price * (1 - coalesce(d.discount_percent, 0) / 100), 2)) AS lowest,
+               max(round(v.price * (1 - coalesce(d.discount_percent, 0) / 100), 2)) AS highest
+        FROM (SELECT DISTINCT unnest(product_ids) AS product_id) ids
+        JOIN products d ON d.id = ids.product_id
+        LEFT JOIN product_variants v ON v.product_id = ids.product_id AND v.is_active
+        GROUP BY ids.product_id
+    ) r
+    WHERE p.id = r.product_id
+      AND (p.min_variant_price, p.max_variant_price)
+          IS DISTINCT FROM (coalesce(r.lowest, p.final_price), coalesce(r.highest, p.final_price));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('final_price', sa.Numeric(precision=10, scale=2), nullable=True))
+    op.add_column('products', sa.Column('min_variant_price', sa.Numeric(precision=10, scale=2), nullable=True))
+    op.add_column('products', sa.Column('max_variant_price', sa.Numeric(precision=10, scale=2), nullable=True))
+
+    op.execute(PRODUCT_PRICES_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER products_set_prices "
+        "BEFORE INSERT OR UPDATE OF base_price, discount_percent ON products "
+        "FOR EACH ROW EXECUTE FUNCTION products_set_prices()"
+    )
+
+    op.execute(VARIANT_PRICES_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER product_variants_sync_prices_insert AFTER INSERT ON product_variants "
+        "REFERENCING NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION product_variants_sync_prices()"
+    )
+    op.execute(
+        "CREATE TRIGGER product_variants_sync_prices_update AFTER UPDATE ON product_variants "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION product_variants_sync_prices()"
+    )
+    op.execute(
+        "CREATE TRIGGER product_variants_sync_prices_delete AFTER DELETE ON product_variants "
+        "REFERENCING OLD TABLE AS old_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION product_variants_sync_prices()"
+    )
+
+    # Fire the product trigger once to fill existing rows
+    op.execute("UPDATE products SET base_price = base_price")
+    op.create_index('ix_products_min_variant_price_id', 'products', ['min_variant_price', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_min_variant_price_id', table_name='products')
+    op.execute("DROP TRIGGER product_variants_sync_prices_delete ON product_variants")
+    op.execute("DROP TRIGGER product_variants_sync_prices_update ON product_variants")
+    op.execute("DROP TRIGGER product_variants_sync_prices_insert ON product_variants")
+    op.execute("DROP FUNCTION product_variants_sync_prices()")
+    op.execute("DROP TRIGGER products_set_prices ON products")
+    op.execute("DROP FUNCTION products_set_prices()")
+    op.drop_column('products', 'max_variant_price')
+    op.drop_column('products', 'min_variant_price')
+    op.drop_column('products', 'final_price')
@@ -0,0 +1,69 @@
+"""Product metadata as JSONB with an attribute filter index
+
+Revision ID: 8e4c1a6f2b97
+Revises: 5f0b7d2c9a31
+Create Date: 2026-10-18 10:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4c1a6f2b97'
+down_revision: Union[str, None] = '5f0b7d2c9a31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Lower-cases keys and values and wraps scalar values in arrays, so one
+# containment document such as {"fabric": ["silk"], "state": ["kerala"]}
+# matches whether the product stores a value or a list of values
+NORMALIZE_FUNCTION = """
+CREATE FUNCTION products_normalize_metadata(metadata jsonb) RETURNS jsonb AS $$
+    SELECT jsonb_object_agg(
+        lower(key),
+        lower((CASE WHEN jsonb_typeof(value) = 'array' THEN value ELSE jsonb_build_array(value) END)::text)::jsonb
+    )
+    FROM jsonb_each(CASE WHEN jsonb_typeof(metadata) = 'object' THEN metadata END)
+$$ LANGUAGE sql IMMUTABLE;
+"""
+
+
+def upgrade() -> None:
+    op.alter_column(
+        'products', 'product_metadata',
+        type_=postgresql.JSONB(),
+        existing_type=sa.JSON(),
+        postgresql_using='product_metadata::jsonb',
+    )
+    op.execute(NORMALIZE_FUNCTION)
+    op.add_column('products', sa.Column(
+        'metadata_normalized',
+        postgresql.JSONB(),
+        sa.Computed("products_normalize_metadata(product_metadata)", persisted=True),
+        nullable=True,
+    ))
+    # Taxonomy documents repeat a lot; a long most-common-values list lets the
+    # planner estimate attribute combinations instead of guessing, so rare
+    # combinations use the GIN index rather than walking a sort index
+    op.execute("ALTER TABLE products ALTER COLUMN metadata_normalized SET STATISTICS 1000")
+    op.create_index(
+        'ix_products_metadata_normalized', 'products', ['metadata_normalized'], unique=False,
+        postgresql_using='gin', postgresql_ops={'metadata_normalized': 'jsonb_path_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_metadata_normalized', table_name='products')
+    op.drop_column('products', 'metadata_normalized')
+    op.execute("DROP FUNCTION products_normalize_metadata(jsonb)")
+    op.alter_column(
+        'products', 'product_metadata',
+        type_=sa.JSON(),
+        existing_type=postgresql.JSONB(),
+        postgresql_using='product_metadata::json',
+    )
@@ -0,0 +1,56 @@
+"""Variant attributes as JSONB with attribute and stock filter indexes
+
+Revision ID: 2b9d6e4a7c05
+Revises: 8e4c1a6f2b97
+Create Date: 2026-10-18 10:15:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b9d6e4a7c05'
+down_revision: Union[str, None] = '8e4c1a6f2b97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        'product_variants', 'attributes',
+        type_=postgresql.JSONB(),
+        existing_type=sa.JSON(),
+        postgresql_using='attributes::jsonb',
+    )
+    # products_normalize_metadata comes from the product_metadata_jsonb revision
+    op.add_column('product_variants', sa.Column(
+        'attributes_normalized',
+        postgresql.JSONB(),
+        sa.Computed("products_normalize_metadata(attributes)", persisted=True),
+        nullable=True,
+    ))
+    op.execute("ALTER TABLE product_variants ALTER COLUMN attributes_normalized SET STATISTICS 1000")
+    op.create_index(
+        'ix_product_variants_attributes_normalized', 'product_variants', ['attributes_normalized'], unique=False,
+        postgresql_using='gin', postgresql_ops={'attributes_normalized': 'jsonb_path_ops'},
+    )
+    op.create_index(
+        'ix_product_variants_in_stock', 'product_variants', ['product_id'], unique=False,
+        postgresql_where=sa.text('is_active AND stock_qty > 0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_variants_in_stock', table_name='product_variants')
+    op.drop_index('ix_product_variants_attributes_normalized', table_name='product_variants')
+    op.drop_column('product_variants', 'attributes_normalized')
+    op.alter_column(
+        'product_variants', 'attributes',
+        type_=sa.JSON(),
+        existing_type=postgresql.JSONB(),
+        postgresql_using='attributes::json',
+    )
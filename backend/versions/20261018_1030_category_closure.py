@@ -0,0 +1,102 @@
+"""Category closure table maintained by triggers
+
+Revision ID: 6a3f8c0d1e52
+Revises: 2b9d6e4a7c05
+Create Date: 2026-10-18 10:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a3f8c0d1e52'
+down_revision: Union[str, None] = '2b9d6e4a7c05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# A new category inherits its parent's ancestors, plus itself at depth 0
+INSERT_FUNCTION = """
+CREATE FUNCTION categories_closure_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+    SELECT ancestor_id, NEW.id, depth + 1 FROM category_closure WHERE descendant_id = NEW.parent_id
+    UNION ALL
+    SELECT NEW.id, NEW.id, 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Moving a category moves its whole subtree: links from the old ancestors
+# to every node of the subtree are replaced by links from the new ones
+MOVE_FUNCTION = """
+CREATE FUNCTION categories_closure_move() RETURNS trigger AS $$
+BEGIN
+    IF NEW.parent_id IS NOT NULL AND EXISTS (
+        SELECT 1 FROM category_closure WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_id
+    ) THEN
+        RAISE EXCEPTION 'category % cannot be moved under its own subtree', NEW.id
+            USING ERRCODE = 'check_violation';
+    END IF;
+
+    DELETE FROM category_closure
+    WHERE descendant_id IN (SELECT descendant_id FROM category_closure WHERE ancestor_id = NEW.id)
+      AND ancestor_id IN (SELECT ancestor_id FROM category_closure WHERE descendant_id = NEW.id AND ancestor_id <> NEW.id);
+
+    INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+    SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+    FROM category_closure above
+    CROSS JOIN category_closure below
+    WHERE above.descendant_id = NEW.parent_id AND below.ancestor_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.create_table('category_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index(op.f('ix_category_closure_descendant_id'), 'category_closure', ['descendant_id'], unique=False)
+
+    op.execute("""
+        INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM categories
+            UNION ALL
+            SELECT tree.ancestor_id, child.id, tree.depth + 1
+            FROM tree JOIN categories child ON child.parent_id = tree.descendant_id
+        )
+        SELECT ancestor_id, descendant_id, depth FROM tree
+    """)
+
+    op.execute(INSERT_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER categories_closure_insert AFTER INSERT ON categories "
+        "FOR EACH ROW EXECUTE FUNCTION categories_closure_insert()"
+    )
+    op.execute(MOVE_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER categories_closure_move AFTER UPDATE OF parent_id ON categories "
+        "FOR EACH ROW WHEN (OLD.parent_id IS DISTINCT FROM NEW.parent_id) "
+        "EXECUTE FUNCTION categories_closure_move()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER categories_closure_move ON categories")
+    op.execute("DROP FUNCTION categories_closure_move()")
+    op.execute("DROP TRIGGER categories_closure_insert ON categories")
+    op.execute("DROP FUNCTION categories_closure_insert()")
+    op.drop_index(op.f('ix_category_closure_descendant_id'), table_name='category_closure')
+    op.drop_table('category_closure')
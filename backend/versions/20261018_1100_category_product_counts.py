@@ -0,0 +1,169 @@
+"""Per-category product counts maintained by triggers
+
+Revision ID: 9c2e5b7a4d18
+Revises: 6a3f8c0d1e52
+Create Date: 2026-10-18 11:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c2e5b7a4d18'
+down_revision: Union[str, None] = '6a3f8c0d1e52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CATEGORY_INSERT_FUNCTION = """
+CREATE FUNCTION categories_product_counts_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO category_product_counts (category_id) VALUES (NEW.id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Nets the rows a statement added and removed per category, then applies
+# the deltas to each category and, through the closure table, to all of
+# its ancestors in one UPDATE. Updates that change neither category_id
+# nor is_active net out to nothing and write no rows.
+PRODUCT_COUNTS_FUNCTION = """
+CREATE FUNCTION products_sync_category_counts() RETURNS trigger AS $$
+DECLARE
+    category_ids integer[] := '{}';
+    totals integer[] := '{}';
+    actives integer[] := '{}';
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        SELECT category_ids || array_agg(category_id), totals || array_agg(1),
+               actives || array_agg(CASE WHEN is_active THEN 1 ELSE 0 END)
+        INTO category_ids, totals, actives
+        FROM new_rows WHERE category_id IS NOT NULL;
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        SELECT category_ids || array_agg(category_id), totals || array_agg(-1),
+               actives || array_agg(CASE WHEN is_active THEN -1 ELSE 0 END)
+        INTO category_ids, totals, actives
+        FROM old_rows WHERE category_id IS NOT NULL;
+    END IF;
+
+    UPDATE category_product_counts c
+    SET product_count = c.product_count + s.direct_total,
+        active_count = c.active_count + s.direct_active,
+        subtree_product_count = c.subtree_product_count + s.total,
+        subtree_active_count = c.subtree_active_count + s.active
+    FROM (
+        SELECT cc.ancestor_id,
+               sum(d.total) AS total,
+               sum(d.active) AS active,
+               coalesce(sum(d.total) FILTER (WHERE cc.depth = 0), 0) AS direct_total,
+               coalesce(sum(d.active) FILTER (WHERE cc.depth = 0), 0) AS direct_active
+        FROM (
+            SELECT delta.category_id, sum(delta.total) AS total, sum(delta.active) AS active
+            FROM unnest(category_ids, totals, actives) AS delta (category_id, total, active)
+            GROUP BY delta.category_id
+            HAVING sum(delta.total) <> 0 OR sum(delta.active) <> 0
+        ) d
+        JOIN category_closure cc ON cc.descendant_id = d.category_id
+        GROUP BY cc.ancestor_id
+    ) s
+    WHERE c.category_id = s.ancestor_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Moving or deleting categories changes which products sit below which
+# ancestors. Both are rare, so the descendant totals are re-summed from
+# the direct counts (one row per category, never the products table).
+ROLLUP_SQL = """
+    UPDATE category_product_counts c
+    SET subtree_product_count = s.total,
+        subtree_active_count = s.active
+    FROM (
+        SELECT cc.ancestor_id, sum(d.product_count) AS total, sum(d.active_count) AS active
+        FROM category_closure cc
+        JOIN category_product_counts d ON d.category_id = cc.descendant_id
+        GROUP BY cc.ancestor_id
+    ) s
+    WHERE c.category_id = s.ancestor_id
+      AND (c.subtree_product_count, c.subtree_active_count) IS DISTINCT FROM (s.total, s.active)
+"""
+
+ROLLUP_FUNCTION = f"""
+CREATE FUNCTION category_product_counts_rollup() RETURNS trigger AS $$
+BEGIN
+{ROLLUP_SQL.rstrip()};
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.create_table('category_product_counts',
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('product_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('active_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('subtree_product_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('subtree_active_count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('category_id')
+    )
+
+    op.execute(ROLLUP_FUNCTION)
+    op.execute("""
+        INSERT INTO category_product_counts (category_id, product_count, active_count)
+        SELECT c.id, count(p.id), count(p.id) FILTER (WHERE p.is_active)
+        FROM categories c LEFT JOIN products p ON p.category_id = c.id
+        GROUP BY c.id
+    """)
+    op.execute(ROLLUP_SQL)
+
+    op.execute(CATEGORY_INSERT_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER categories_product_counts_insert AFTER INSERT ON categories "
+        "FOR EACH ROW EXECUTE FUNCTION categories_product_counts_insert()"
+    )
+    op.execute(
+        "CREATE TRIGGER categories_product_counts_move AFTER UPDATE OF parent_id ON categories "
+        "FOR EACH STATEMENT EXECUTE FUNCTION category_product_counts_rollup()"
+    )
+    op.execute(
+        "CREATE TRIGGER categories_product_counts_delete AFTER DELETE ON categories "
+        "FOR EACH STATEMENT EXECUTE FUNCTION category_product_counts_rollup()"
+    )
+
+    op.execute(PRODUCT_COUNTS_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER products_sync_category_counts_insert AFTER INSERT ON products "
+        "REFERENCING NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION products_sync_category_counts()"
+    )
+    op.execute(
+        "CREATE TRIGGER products_sync_category_counts_update AFTER UPDATE ON products "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION products_sync_category_counts()"
+    )
+    op.execute(
+        "CREATE TRIGGER products_sync_category_counts_delete AFTER DELETE ON products "
+        "REFERENCING OLD TABLE AS old_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION products_sync_category_counts()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER products_sync_category_counts_delete ON products")
+    op.execute("DROP TRIGGER products_sync_category_counts_update ON products")
+    op.execute("DROP TRIGGER products_sync_category_counts_insert ON products")
+    op.execute("DROP FUNCTION products_sync_category_counts()")
+    op.execute("DROP TRIGGER categories_product_counts_delete ON categories")
+    op.execute("DROP TRIGGER categories_product_counts_move ON categories")
+    op.execute("DROP TRIGGER categories_product_counts_insert ON categories")
+    op.execute("DROP FUNCTION categories_product_counts_insert()")
+    op.execute("DROP FUNCTION category_product_counts_rollup()")
+    op.drop_table('category_product_counts')
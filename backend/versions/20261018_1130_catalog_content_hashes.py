@@ -0,0 +1,29 @@
+"""Content hashes for catalog sync
+
+Revision ID: 4e8b1c9f2a6d
+Revises: 9c2e5b7a4d18
+Create Date: 2026-10-18 11:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8b1c9f2a6d'
+down_revision: Union[str, None] = '9c2e5b7a4d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable without a default, so adding them does not rewrite the tables
+    op.add_column('products', sa.Column('content_hash', sa.String(length=32), nullable=True))
+    op.add_column('product_variants', sa.Column('content_hash', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('product_variants', 'content_hash')
+    op.drop_column('products', 'content_hash')
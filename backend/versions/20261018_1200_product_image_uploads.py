@@ -0,0 +1,35 @@
+"""Uploaded product images with generated derivatives
+
+Revision ID: d17a3e5b9c40
+Revises: 4e8b1c9f2a6d
+Create Date: 2026-10-18 12:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd17a3e5b9c40'
+down_revision: Union[str, None] = '4e8b1c9f2a6d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('product_images', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('product_images', sa.Column('width', sa.Integer(), nullable=True))
+    op.add_column('product_images', sa.Column('height', sa.Integer(), nullable=True))
+    op.add_column('product_images', sa.Column('derivatives', postgresql.JSONB(), nullable=True))
+    op.create_index(op.f('ix_product_images_content_hash'), 'product_images', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_product_images_content_hash'), table_name='product_images')
+    op.drop_column('product_images', 'derivatives')
+    op.drop_column('product_images', 'height')
+    op.drop_column('product_images', 'width')
+    op.drop_column('product_images', 'content_hash')
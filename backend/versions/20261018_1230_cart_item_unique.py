@@ -0,0 +1,69 @@
+"""One cart per user and one cart item per variant
+
+Revision ID: 7b5d2e9f13a8
+Revises: d17a3e5b9c40
+Create Date: 2026-10-18 12:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b5d2e9f13a8'
+down_revision: Union[str, None] = 'd17a3e5b9c40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Concurrent first adds could create several carts for a user: their items
+# move to the oldest cart and the others are dropped
+MOVE_DUPLICATE_CART_ITEMS = """
+UPDATE cart_items
+SET cart_id = keep.id
+FROM carts, (SELECT user_id, min(id) AS id FROM carts GROUP BY user_id) AS keep
+WHERE cart_items.cart_id = carts.id AND carts.user_id = keep.user_id AND carts.id <> keep.id
+"""
+
+DELETE_DUPLICATE_CARTS = """
+DELETE FROM carts
+USING (SELECT user_id, min(id) AS id FROM carts GROUP BY user_id) AS keep
+WHERE carts.user_id = keep.user_id AND carts.id <> keep.id
+"""
+
+# Concurrent adds of a variant could create several items for it: the oldest
+# keeps their summed quantity
+MERGE_CART_ITEMS = """
+WITH duplicates AS (
+    SELECT cart_id, variant_id, min(id) AS keep_id, sum(coalesce(quantity, 1)) AS quantity
+    FROM cart_items
+    WHERE variant_id IS NOT NULL
+    GROUP BY cart_id, variant_id
+    HAVING count(*) > 1
+), kept AS (
+    UPDATE cart_items
+    SET quantity = duplicates.quantity
+    FROM duplicates
+    WHERE cart_items.id = duplicates.keep_id
+)
+DELETE FROM cart_items
+USING duplicates
+WHERE cart_items.cart_id = duplicates.cart_id
+  AND cart_items.variant_id = duplicates.variant_id
+  AND cart_items.id <> duplicates.keep_id
+"""
+
+
+def upgrade() -> None:
+    op.execute(MOVE_DUPLICATE_CART_ITEMS)
+    op.execute(DELETE_DUPLICATE_CARTS)
+    op.execute(MERGE_CART_ITEMS)
+    op.create_unique_constraint('uq_carts_user_id', 'carts', ['user_id'])
+    op.create_unique_constraint('uq_cart_items_cart_id_variant_id', 'cart_items', ['cart_id', 'variant_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_cart_items_cart_id_variant_id', 'cart_items', type_='unique')
+    op.drop_constraint('uq_carts_user_id', 'carts', type_='unique')
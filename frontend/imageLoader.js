@@ -1,4 +1,16 @@
-export default function imageLoader({ src }) {
+// Widths the backend renders every uploaded image at (IMAGE_WIDTHS)
+const DERIVATIVE_WIDTHS = [320, 640, 960, 1280, 1920];
+
+// Uploaded originals live at .../images/<xx>/<sha256>/original.<ext>
+const UPLOADED_ORIGINAL = /(\/images\/[0-9a-f]{2}\/[0-9a-f]{64}\/)original\.\w+$/;
+
+export default function imageLoader({ src, width }) {
+    // Uploaded images: the smallest WebP derivative at least as wide as requested
+    const match = UPLOADED_ORIGINAL.exec(src);
+    if (match) {
+        const derivative = DERIVATIVE_WIDTHS.find((w) => w >= width) || DERIVATIVE_WIDTHS[DERIVATIVE_WIDTHS.length - 1];
+        return src.slice(0, match.index) + `${match[1]}${derivative}.webp`;
+    }
     // Return src as-is, basePath will be handled by Next.js config
     return src;
 }
@@ -91,6 +91,18 @@ export const cartService = {
         const response = await api.delete(`/cart/items/${itemId}`);
         return response.data;
     },
+
+    // operations: [{ op: 'add', variant_id, quantity }, { op: 'update', item_id, quantity }, { op: 'remove', item_id }]
+    applyBatch: async (operations) => {
+        const response = await api.post('/cart/batch', { operations });
+        return response.data;
+    },
+
+    // items: the guest cart as [{ variant_id, quantity }], merged after login
+    mergeGuestCart: async (items) => {
+        const response = await api.post('/cart/merge', { items });
+        return response.data;
+    },
 };
 
 // Order services